@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import numpy as np
-from scipy import ndimage
 
 
 WINDOW_SIZE = 5
@@ -11,14 +10,61 @@ WINDOW_SIZE = 5
 def compute_entropy(gray: np.ndarray) -> np.ndarray:
     if gray.ndim != 2:
         raise ValueError("Entropy map requires grayscale image")
-    gray = gray.astype(np.uint8)
+    from ..kernels import active_backend
+
+    return active_backend().compute_entropy(gray.astype(np.uint8))
+
+
+def entropy_by_levels(gray: np.ndarray) -> np.ndarray:
+    """Reference entropy of a uint8 image: one box filter per grey level present."""
+    from scipy import ndimage
+
     entropy_map = np.zeros_like(gray, dtype=np.float32)
-    for value in range(256):
-        mask = (gray == value).astype(np.float32)
-        prob = ndimage.uniform_filter(mask, size=WINDOW_SIZE)
+    mask = np.empty_like(gray)
+    prob = np.empty_like(entropy_map)
+    term = np.empty_like(entropy_map)
+    # Grey levels absent from the image contribute nothing.
+    for value in np.flatnonzero(np.bincount(gray.reshape(-1), minlength=256)):
+        np.equal(gray, value, out=mask)
+        ndimage.uniform_filter(mask, size=WINDOW_SIZE, output=prob)
         with np.errstate(divide="ignore", invalid="ignore"):
-            term = np.where(prob > 0, -prob * np.log2(prob), 0)
-        entropy_map += term
+            np.log2(prob, out=term)
+            term *= prob
+        np.subtract(entropy_map, term, out=entropy_map, where=prob > 0)
+    entropy_map /= np.log2(256)
+    np.clip(entropy_map, 0.0, 1.0, out=entropy_map)
+    return entropy_map
+
+
+def entropy_by_counts(gray: np.ndarray) -> np.ndarray:
+    """Entropy of a uint8 image from equality counts within each window.
+
+    A window whose ``j``-th sample occurs ``c_j`` times has entropy
+    ``log2(n) - sum_j log2(c_j) / n``, so comparing the ``n`` shifted views pairwise
+    replaces one box filter per grey level. Matches ``entropy_by_levels`` up to float32
+    rounding, not bit for bit, so it serves the scanner rather than the kernel backends.
+    """
+    if gray.ndim != 2:
+        raise ValueError("Entropy map requires grayscale image")
+    half = WINDOW_SIZE // 2
+    height, width = gray.shape
+    # "symmetric" padding is the "reflect" mode of the box filters.
+    padded = np.pad(gray, half, mode="symmetric")
+    views = [padded[dy : dy + height, dx : dx + width] for dy in range(WINDOW_SIZE) for dx in range(WINDOW_SIZE)]
+    counts = [np.ones(gray.shape, dtype=np.uint8) for _ in views]
+    equal = np.empty(gray.shape, dtype=bool)
+    for i, view in enumerate(views):
+        for j in range(i + 1, len(views)):
+            np.equal(view, views[j], out=equal)
+            counts[i] += equal
+            counts[j] += equal
+    # Counts run from 1 to the window area; index 0 is never looked up.
+    log_counts = np.log2(np.arange(len(views) + 1, dtype=np.float32).clip(1))
+    entropy_map = np.zeros(gray.shape, dtype=np.float32)
+    for count in counts:
+        entropy_map += log_counts[count]
+    entropy_map *= np.float32(-1.0 / len(views))
+    entropy_map += np.float32(np.log2(len(views)))
     entropy_map /= np.log2(256)
-    entropy_map = np.clip(entropy_map, 0.0, 1.0)
+    np.clip(entropy_map, 0.0, 1.0, out=entropy_map)
     return entropy_map
@@ -2,15 +2,35 @@
 from __future__ import annotations
 
 import numpy as np
-from scipy import ndimage
 
 
-def compute_gradient(gray: np.ndarray) -> np.ndarray:
+def gradient_magnitude(gray: np.ndarray) -> np.ndarray:
+    """Unnormalised Sobel magnitude; each value only depends on its 3x3 neighbourhood."""
     if gray.ndim != 2:
         raise ValueError("Grayscale image required")
-    gx = ndimage.sobel(gray.astype(np.float32), axis=1)
-    gy = ndimage.sobel(gray.astype(np.float32), axis=0)
-    mag = np.sqrt(gx ** 2 + gy ** 2)
-    if mag.max() == 0:
-        return np.zeros_like(mag, dtype=np.float32)
-    return (mag - mag.min()) / (mag.max() - mag.min() + 1e-9)
+    from scipy import ndimage
+
+    gray = gray.astype(np.float32, copy=False)
+    mag = ndimage.sobel(gray, axis=1)
+    gy = ndimage.sobel(gray, axis=0)
+    np.multiply(mag, mag, out=mag)
+    np.multiply(gy, gy, out=gy)
+    mag += gy
+    del gy
+    np.sqrt(mag, out=mag)
+    return mag
+
+
+def normalise_gradient(mag: np.ndarray) -> np.ndarray:
+    """Scale a whole-image magnitude map to 0..1 in place."""
+    high = mag.max()
+    if high == 0:
+        return mag
+    low = mag.min()
+    mag -= low
+    mag /= np.float32(high - low + 1e-9)
+    return mag
+
+
+def compute_gradient(gray: np.ndarray) -> np.ndarray:
+    return normalise_gradient(gradient_magnitude(gray))
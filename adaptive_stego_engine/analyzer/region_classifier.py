@@ -5,7 +5,7 @@ import numpy as np
 
 
 def compute_capacity_map(surface_map: np.ndarray) -> np.ndarray:
-    capacity = np.zeros_like(surface_map, dtype=np.int32)
+    capacity = np.zeros_like(surface_map, dtype=np.uint8)
     capacity[surface_map > 0.25] = 1
     capacity[surface_map > 0.65] = 2
     capacity[surface_map > 0.85] = 3
@@ -1,16 +1,56 @@
 """Texture map aggregator."""
 from __future__ import annotations
 
+from typing import Optional
+
 import numpy as np
 
-from .entropy import compute_entropy
-from .gradient import compute_gradient
+from ..util.memory_plan import row_bands
+from .entropy import WINDOW_SIZE, compute_entropy
+from .gradient import compute_gradient, gradient_magnitude, normalise_gradient
+
+GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114])
+# Pixels converted per band, bounding the float64 temporary of the luminance dot product.
+GRAY_BAND_PIXELS = 1 << 18
+# Rows of context around a band: the Sobel kernel reaches 1 row, the entropy window 2.
+TEXTURE_HALO = max(1, WINDOW_SIZE // 2)
+
+
+def compute_gray(rgb: np.ndarray) -> np.ndarray:
+    height, width = rgb.shape[:2]
+    gray = np.empty((height, width), dtype=np.float32)
+    band = max(1, GRAY_BAND_PIXELS // max(1, width))
+    for start in range(0, height, band):
+        gray[start : start + band] = np.dot(rgb[start : start + band, :, :3], GRAY_WEIGHTS)
+    return gray
+
+
+def compute_texture_maps(
+    rgb: np.ndarray,
+    band_rows: Optional[int] = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Gray, gradient, entropy and surface maps, all float32.
+
+    With ``band_rows`` the gradient and entropy maps are computed in row bands, which
+    bounds their scratch memory and gives results identical to the whole-image path.
+    """
+    gray = compute_gray(rgb)
+    if band_rows is None or band_rows >= gray.shape[0]:
+        gradient_map = compute_gradient(gray)
+        entropy_map = compute_entropy(gray)
+    else:
+        gradient_map = np.empty_like(gray)
+        entropy_map = np.empty_like(gray)
+        for start, stop, lo, hi in row_bands(gray.shape[0], band_rows, TEXTURE_HALO):
+            window = gray[lo:hi]
+            gradient_map[start:stop] = gradient_magnitude(window)[start - lo : stop - lo]
+            entropy_map[start:stop] = compute_entropy(window)[start - lo : stop - lo]
+        gradient_map = normalise_gradient(gradient_map)
+    return gray, gradient_map, entropy_map, combine_surface(gradient_map, entropy_map)
 
 
-def compute_texture_maps(rgb: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
-    gray = np.dot(rgb[..., :3], [0.299, 0.587, 0.114]).astype(np.float32)
-    gradient_map = compute_gradient(gray)
-    entropy_map = compute_entropy(gray)
-    surface_map = 0.6 * gradient_map + 0.4 * entropy_map
-    surface_map = np.clip(surface_map, 0.0, 1.0)
-    return gray, gradient_map, entropy_map, surface_map
+def combine_surface(gradient_map: np.ndarray, entropy_map: np.ndarray) -> np.ndarray:
+    surface_map = 0.6 * gradient_map
+    surface_map += 0.4 * entropy_map
+    np.clip(surface_map, 0.0, 1.0, out=surface_map)
+    return surface_map
@@ -0,0 +1,4 @@
+"""Performance benchmark suite.
+
+Run ``python -m adaptive_stego_engine.benchmarks [suite ...]`` from the repository root.
+"""
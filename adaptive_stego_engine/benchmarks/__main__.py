@@ -0,0 +1,65 @@
+"""Command line entry point for the benchmark suite."""
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import Callable, Dict
+
+from . import (
+    backends,
+    block_safety,
+    concurrency,
+    cover_session,
+    import_time,
+    memory,
+    ordering_visits,
+    partial_analysis,
+    pixel_order,
+    png_encode,
+    preview,
+    scan,
+    scheduler,
+    slot_roundtrip,
+)
+
+SUITES: Dict[str, Callable[[argparse.Namespace], object]] = {
+    "backends": backends.run,
+    "block_safety": block_safety.run,
+    "concurrency": concurrency.run,
+    "cover_session": cover_session.run,
+    "import_time": import_time.run,
+    "memory": memory.run,
+    "ordering_visits": ordering_visits.run,
+    "partial_analysis": partial_analysis.run,
+    "pixel_order": pixel_order.run,
+    "png_encode": png_encode.run,
+    "preview": preview.run,
+    "scan": scan.run,
+    "scheduler": scheduler.run,
+    "slot_roundtrip": slot_roundtrip.run,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Adaptive stego engine benchmarks")
+    parser.add_argument("suites", nargs="*", help=f"suites to run (default: all of {', '.join(sorted(SUITES))})")
+    parser.add_argument("--height", type=int, default=1024)
+    parser.add_argument("--width", type=int, default=1024)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    unknown = sorted(set(args.suites) - set(SUITES))
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+    failed = []
+    for name in args.suites or sorted(SUITES):
+        try:
+            SUITES[name](args)
+        except AssertionError as exc:
+            print(f"== {name} FAILED: {exc}", file=sys.stderr)
+            failed.append(name)
+    if failed:
+        sys.exit(f"{len(failed)} suite(s) failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
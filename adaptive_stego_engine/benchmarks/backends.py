@@ -0,0 +1,119 @@
+"""Differential check of every kernel backend on random covers, then per-kernel timings."""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import tempfile
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .. import kernels
+from ..analyzer.texture_map import compute_gray
+from ..embedder.cover_session import CoverSession, EmbedCredentials, build_stream
+from ..extractor.extract_controller import ExtractController
+from ..util.exceptions import StegoEngineError
+from ..util.image_io import save_png
+from ..util.jobs import drain
+from ..util.layout import PixelOrdering, StreamLayout
+from .common import best_of, report, synthetic_cover
+
+CASES = 12
+# The scalar reference backend is timed on at most this many items per kernel.
+REFERENCE_ITEMS = 1 << 14
+
+
+def _random_case(rng: np.random.Generator) -> Tuple[np.ndarray, bytes, str, StreamLayout | None, bool]:
+    height, width = (int(size) for size in rng.integers(64, 161, 2))
+    cover = synthetic_cover(height, width, seed=int(rng.integers(1 << 31)))
+    payload = rng.integers(0, 256, int(rng.integers(1, 48)), dtype=np.uint8).tobytes()
+    password = f"pw-{int(rng.integers(1 << 31))}"
+    layout = None
+    if rng.random() < 0.5:
+        ordering = list(PixelOrdering)[int(rng.integers(len(PixelOrdering)))]
+        layout = StreamLayout(segments=int(rng.integers(1, 4)), ordering=ordering)
+    return cover, payload, password, layout, bool(rng.random() < 0.5)
+
+
+def _outcome(cover: np.ndarray, stream: bytes, seed: str, layout, password: str, tmp: str) -> Tuple[str, str]:
+    """Digest of the stego image (or the embed error) and the extracted payload (or error)."""
+    try:
+        stego, _metrics = drain(CoverSession(cover).iter_embed_stream(stream, seed, layout))
+    except StegoEngineError as exc:
+        return f"embed error: {exc}", ""
+    path = os.path.join(tmp, "stego.png")
+    save_png(path, stego)
+    try:
+        extracted = ExtractController().extract_from_image_symmetric(path, password).hex()
+    except StegoEngineError as exc:
+        extracted = f"extract error: {exc}"
+    return hashlib.sha256(stego.tobytes()).hexdigest(), extracted
+
+
+def _differential(names: List[str]) -> int:
+    rng = np.random.default_rng(7)
+    round_trips = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for case in range(CASES):
+            cover, payload, password, layout, aes = _random_case(rng)
+            credentials = EmbedCredentials(password=password, aes_enabled=aes)
+            stream, seed, _key_slots = build_stream(payload, "password", credentials)
+            outcomes: Dict[str, Tuple[str, str]] = {}
+            for name in names:
+                kernels.set_backend(name)
+                outcomes[name] = _outcome(cover, stream, seed, layout, password, tmp)
+            if len(set(outcomes.values())) != 1:
+                raise AssertionError(f"case {case}: backends disagree: {outcomes}")
+            stego_digest, extracted = outcomes[names[0]]
+            if layout is not None and not stego_digest.startswith("embed error") and extracted != payload.hex():
+                raise AssertionError(f"case {case}: new-format stream did not round-trip")
+            round_trips += extracted == payload.hex()
+    return round_trips
+
+
+def _timings(args: argparse.Namespace, names: List[str], round_trips: int) -> List[dict]:
+    rng = np.random.default_rng(0)
+    cover = synthetic_cover(args.height, args.width)
+    gray = compute_gray(cover)
+    flat = cover.reshape(-1, 3).copy()
+    rows: List[dict] = [{"backends": ",".join(names), "identical_cases": CASES, "round_trips": round_trips}]
+    for name in names:
+        backend = kernels.get_backend(name)
+        items = flat.shape[0] if name != "reference" else min(flat.shape[0], REFERENCE_ITEMS)
+        pixels = rng.choice(flat.shape[0], items, replace=False).astype(np.int64)
+        caps = rng.integers(1, 4, items).astype(np.int64)
+        slot_pixels, slot_channels = backend.expand_slots(pixels, caps)
+        bits = rng.integers(0, 2, slot_pixels.size, dtype=np.uint8)
+        workloads = (
+            ("adjust_capacity", items, lambda: backend.adjust_capacity(gray, pixels, caps)),
+            ("expand_slots", items, lambda: backend.expand_slots(pixels, caps)),
+            ("write_bits", slot_pixels.size, lambda: backend.write_bits(flat, slot_pixels, slot_channels, bits)),
+            ("read_bits", slot_pixels.size, lambda: backend.read_bits(flat, slot_pixels, slot_channels)),
+            ("compute_entropy", gray.size, lambda: backend.compute_entropy(gray.astype(np.uint8))),
+        )
+        for kernel, count, fn in workloads:
+            fn()  # JIT backends compile on first call.
+            seconds = best_of(fn, args.repeats)
+            rows.append(
+                {
+                    "backend": name,
+                    "kernel": kernel,
+                    "items": count,
+                    "seconds": f"{seconds:.4f}",
+                    "items_per_s": f"{count / seconds:,.0f}",
+                }
+            )
+    return rows
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    names = kernels.available_backends()
+    previous = kernels.active_backend().name
+    try:
+        round_trips = _differential(names)
+        rows = _timings(args, names, round_trips)
+    finally:
+        kernels.set_backend(previous)
+    report("backends", rows)
+    return rows
@@ -0,0 +1,45 @@
+"""Per-block scalar drift checks versus the batched block safety evaluation."""
+from __future__ import annotations
+
+import argparse
+from typing import List
+
+import numpy as np
+
+from ..embedder.drift_control import block_safety_batch, block_safety_checker, image_to_blocks
+from .common import best_of, report, synthetic_cover
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    cover = synthetic_cover(args.height, args.width)
+    rng = np.random.default_rng(1)
+    stego = cover ^ rng.integers(0, 2, cover.shape, dtype=np.uint8)
+    original_blocks, mask = image_to_blocks(cover)
+    stego_blocks, _ = image_to_blocks(stego)
+
+    def scalar() -> np.ndarray:
+        return np.array(
+            [
+                block_safety_checker(original_blocks[i][mask[i]], stego_blocks[i][mask[i]])
+                for i in range(original_blocks.shape[0])
+            ]
+        )
+
+    def batched() -> np.ndarray:
+        return block_safety_batch(original_blocks, stego_blocks, mask)
+
+    if not np.array_equal(scalar(), batched()):
+        raise AssertionError("batched block safety diverges from the scalar checker")
+    rows = []
+    for name, fn, repeats in (("scalar", scalar, 1), ("batched", batched, args.repeats)):
+        seconds = best_of(fn, repeats)
+        rows.append(
+            {
+                "checker": name,
+                "blocks": original_blocks.shape[0],
+                "seconds": f"{seconds:.3f}",
+                "blocks_per_s": f"{original_blocks.shape[0] / seconds:,.0f}",
+            }
+        )
+    report("block_safety", rows)
+    return rows
@@ -0,0 +1,48 @@
+"""Shared helpers for the benchmark suite."""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import numpy as np
+
+
+def synthetic_cover(height: int, width: int, seed: int = 0) -> np.ndarray:
+    """Deterministic textured RGB cover mixing smooth gradients and sensor-like noise."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = 128 + 60 * np.sin(x / 23.0) * np.cos(y / 37.0)
+    base += rng.normal(0, 6, (height, width)).astype(np.float32)
+    rgb = np.stack([base, base * 0.9, base * 1.1], axis=-1)
+    return np.clip(rgb, 0, 255).astype(np.uint8)
+
+
+class Timer:
+    def __init__(self) -> None:
+        self.seconds = 0.0
+
+
+@contextmanager
+def timed() -> Iterator[Timer]:
+    timer = Timer()
+    start = time.perf_counter()
+    try:
+        yield timer
+    finally:
+        timer.seconds = time.perf_counter() - start
+
+
+def best_of(fn, repeats: int = 3) -> float:
+    timings: List[float] = []
+    for _ in range(repeats):
+        with timed() as timer:
+            fn()
+        timings.append(timer.seconds)
+    return min(timings)
+
+
+def report(suite: str, rows: List[dict]) -> None:
+    print(f"== {suite}")
+    for row in rows:
+        print("  " + "  ".join(f"{key}={value}" for key, value in row.items()))
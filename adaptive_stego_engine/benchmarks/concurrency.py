@@ -0,0 +1,121 @@
+"""Time shared controllers under concurrent embeds and extracts, then compare threads and processes.
+
+The stress phase runs many password, public-key and multi-recipient jobs at once on one
+``EmbedController`` (with a shared session cache) and one ``ExtractController`` and
+reports how many payloads came back wrong and how often covers and keys were parsed.
+Correctness is asserted on small covers by ``tests/test_concurrency.py``.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+
+from ..embedder.cover_session import CoverSession
+from ..embedder.embed_controller import EmbedController, EmbedSpec
+from ..extractor.extract_controller import ExtractController, ExtractSpec
+from ..util.asym_crypto import KEY_CACHE, generate_rsa_keypair, save_private_key_pem, save_public_key_pem
+from ..util.image_io import save_png
+from ..util.layout import AUTO_TILES, StreamLayout
+from ..util.locked_cache import LockedCache
+from .common import report, synthetic_cover, timed
+
+STRESS_JOBS = 48
+STRESS_THREADS = 8
+COVERS = 3
+RECIPIENTS = 2
+
+
+def _specs(covers: List[str], keys: List[tuple], tmp: str, count: int) -> List[tuple]:
+    """``(EmbedSpec, ExtractSpec, payload)`` triples cycling through covers and modes."""
+    rng = np.random.default_rng(0)
+    jobs = []
+    for index in range(count):
+        cover = covers[index % len(covers)]
+        text = f"job {index}: " + rng.integers(0, 1 << 62, 8).tobytes().hex()
+        stego = os.path.join(tmp, f"stego{index}.png")
+        mode = ("password", "public", "multi")[index % 3]
+        # Whole-image analysis of the full-size first cover would dominate; it gets tiled jobs only.
+        layout = StreamLayout(tiles=AUTO_TILES) if index % 2 or cover == covers[0] else StreamLayout()
+        private, public = keys[index % len(keys)]
+        if mode == "password":
+            embed = EmbedSpec(cover, text, mode, png_path=stego, password=f"pw{index}", layout=layout)
+            extract = ExtractSpec(stego, mode, password=f"pw{index}")
+        elif mode == "public":
+            embed = EmbedSpec(cover, text, mode, png_path=stego, public_key_path=public, layout=layout)
+            extract = ExtractSpec(stego, mode, private_key_path=private)
+        else:
+            recipients = tuple(key[1] for key in keys)
+            embed = EmbedSpec(cover, text, mode, png_path=stego, public_key_paths=recipients, layout=layout)
+            extract = ExtractSpec(stego, mode, private_key_path=private)
+        jobs.append((embed, extract, text.encode("utf-8")))
+    return jobs
+
+
+def _wrong_payloads(payloads: List[bytes], expected: List[bytes]) -> int:
+    return sum(got != want for got, want in zip(payloads, expected)) + abs(len(payloads) - len(expected))
+
+
+def _stress(jobs: List[tuple]) -> dict:
+    sessions: LockedCache[CoverSession] = LockedCache(maxsize=COVERS * 2)
+    embedder, extractor = EmbedController(sessions=sessions), ExtractController()
+    KEY_CACHE.clear()
+    key_misses = KEY_CACHE.misses
+    with timed() as timer, ThreadPoolExecutor(max_workers=STRESS_THREADS) as pool:
+        list(pool.map(embedder.embed_spec, [job[0] for job in jobs]))
+        # Every stego image is read by two threads at once.
+        payloads = list(pool.map(extractor.extract_spec, [job[1] for job in jobs] * 2))
+    return {
+        "phase": "stress",
+        "jobs": len(jobs),
+        "threads": STRESS_THREADS,
+        "extracts": len(payloads),
+        "wrong": _wrong_payloads(payloads, [job[2] for job in jobs] * 2),
+        "session_builds": sessions.misses,
+        "key_parses": KEY_CACHE.misses - key_misses,
+        "seconds": f"{timer.seconds:.2f}",
+    }
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        covers = []
+        for index in range(COVERS):
+            path = os.path.join(tmp, f"cover{index}.png")
+            # Small covers keep whole-image analysis short; tiled jobs use the full size.
+            size = (args.height, args.width) if index == 0 else (256 + 64 * index, 384)
+            save_png(path, synthetic_cover(*size, seed=index))
+            covers.append(path)
+        keys = []
+        for index in range(RECIPIENTS):
+            private, public = generate_rsa_keypair()
+            keys.append((os.path.join(tmp, f"key{index}.pem"), os.path.join(tmp, f"key{index}.pub")))
+            save_private_key_pem(private, keys[-1][0])
+            save_public_key_pem(public, keys[-1][1])
+        jobs = _specs(covers, keys, tmp, STRESS_JOBS)
+        rows.append(_stress(jobs))
+        # At least two workers, so both pools are exercised even on one CPU.
+        workers = max(2, os.cpu_count() or 1)
+        for processes in (False, True):
+            name = "processes" if processes else "threads"
+            embedded = EmbedController().embed_batch([job[0] for job in jobs], max_workers=workers, processes=processes)
+            extracted = ExtractController().extract_batch([job[1] for job in jobs], max_workers=workers, processes=processes)
+            rows.append(
+                {
+                    "phase": "batch",
+                    "pool": name,
+                    "workers": embedded.workers,
+                    "jobs": len(jobs),
+                    "failed": len(embedded.errors) + len(extracted.errors),
+                    "wrong": _wrong_payloads(extracted.results, [job[2] for job in jobs]),
+                    "embed_s": f"{embedded.seconds:.2f}",
+                    "extract_s": f"{extracted.seconds:.2f}",
+                }
+            )
+    report("concurrency", rows)
+    return rows
@@ -0,0 +1,48 @@
+"""Repeated ``embed_from_text`` calls versus one ``CoverSession`` reused for every payload."""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from ..embedder.cover_session import CoverSession, EmbedCredentials
+from ..embedder.embed_controller import EmbedController
+from ..util.image_io import save_png
+from .common import report, synthetic_cover, timed
+
+PAYLOADS = 8
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    payloads = [f"recipient {index}: watermark payload" for index in range(PAYLOADS)]
+    with tempfile.TemporaryDirectory() as tmp:
+        cover_path = os.path.join(tmp, "cover.png")
+        save_png(cover_path, synthetic_cover(args.height, args.width))
+        controller = EmbedController()
+
+        def embed_controller(text: str) -> None:
+            controller.embed_from_text(cover_path, text, "password", password=text)
+
+        def embed_session(session: CoverSession, text: str) -> None:
+            session.embed(text, "password", EmbedCredentials(password=text))
+
+        with timed() as repeated:
+            for text in payloads:
+                embed_controller(text)
+        with timed() as sequential:
+            session = CoverSession.from_path(cover_path)
+            for text in payloads:
+                embed_session(session, text)
+        with timed() as threaded:
+            session = CoverSession.from_path(cover_path)
+            with ThreadPoolExecutor() as pool:
+                list(pool.map(lambda text: embed_session(session, text), payloads))
+
+    rows = [
+        {"strategy": name, "payloads": PAYLOADS, "seconds": f"{timer.seconds:.3f}"}
+        for name, timer in (("embed_from_text", repeated), ("session", sequential), ("session_threads", threaded))
+    ]
+    report("cover_session", rows)
+    return rows
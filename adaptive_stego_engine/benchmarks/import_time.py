@@ -0,0 +1,60 @@
+"""Cold import cost of the entry points, measured with ``python -X importtime``."""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from typing import List, Optional
+
+from .common import report
+
+# Target cold-start cost of importing a controller, in milliseconds.
+STARTUP_BUDGET_MS = 250.0
+MODULES = (
+    "adaptive_stego_engine.embedder.embed_controller",
+    "adaptive_stego_engine.extractor.extract_controller",
+    "adaptive_stego_engine.gui.main_window",
+)
+HEAVY_MODULES = ("scipy", "cryptography", "PIL", "asyncio", "concurrent.futures")
+
+
+def _cumulative_ms(module: str) -> Optional[float]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None
+    for line in reversed(result.stderr.splitlines()):
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000.0
+    return None
+
+
+def _heavy_loaded(module: str) -> List[str]:
+    probe = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True)
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    rows = []
+    for module in MODULES:
+        timings = [_cumulative_ms(module) for _ in range(args.repeats)]
+        if None in timings:
+            rows.append({"module": module, "ms": "unavailable"})
+            continue
+        best = min(timings)
+        rows.append(
+            {
+                "module": module,
+                "ms": f"{best:.1f}",
+                "budget_ms": f"{STARTUP_BUDGET_MS:.0f}",
+                "within_budget": best <= STARTUP_BUDGET_MS,
+                "heavy_loaded": ",".join(_heavy_loaded(module)) or "-",
+            }
+        )
+    report("import_time", rows)
+    return rows
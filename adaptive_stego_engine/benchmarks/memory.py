@@ -0,0 +1,70 @@
+"""Peak resident memory of one embed per stream format, each in a fresh interpreter, against the plan."""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from typing import List
+
+import numpy as np
+
+from ..embedder.cover_session import EmbedCredentials, stream_length
+from ..util.layout import AUTO_TILES, PixelOrdering, StreamLayout
+from ..util.memory_plan import MB, plan_embed
+from .common import report, synthetic_cover
+
+PAYLOAD_BYTES = 1024
+# Format -> layout, as source for the probe and as the object the plan is made for.
+LAYOUTS = {
+    "legacy": ("None", None),
+    "entropy": ("StreamLayout()", StreamLayout()),
+    "keyed": ("StreamLayout(ordering=PixelOrdering.KEYED)", StreamLayout(ordering=PixelOrdering.KEYED)),
+    "tiles": ("StreamLayout(tiles=AUTO_TILES)", StreamLayout(tiles=AUTO_TILES)),
+}
+_PROBE = """
+import resource
+import numpy as np
+from adaptive_stego_engine.embedder.cover_session import CoverSession, EmbedCredentials
+from adaptive_stego_engine.util.layout import AUTO_TILES, PixelOrdering, StreamLayout
+
+rgb = np.load({cover!r})
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+CoverSession(rgb, cache_statistics=False).embed("x" * {payload}, "password", EmbedCredentials(password="bench"), {layout})
+print(baseline, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def _peak_rss_kb(cover_path: str, layout: str) -> List[int]:
+    probe = _PROBE.format(cover=cover_path, payload=PAYLOAD_BYTES, layout=layout)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True, cwd=root)
+    return [int(value) for value in result.stdout.split()]
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    rgb = synthetic_cover(args.height, args.width)
+    stream_len = stream_length("x" * PAYLOAD_BYTES, "password", EmbedCredentials(password="bench"))
+    megapixels = rgb.shape[0] * rgb.shape[1] / 1e6
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cover_path = os.path.join(tmp, "cover.npy")
+        np.save(cover_path, rgb)
+        del rgb
+        for name, (source, layout) in LAYOUTS.items():
+            baseline, peak = _peak_rss_kb(cover_path, source)
+            plan = plan_embed(args.height, args.width, stream_len, layout)
+            rows.append(
+                {
+                    "format": name,
+                    "megapixels": f"{megapixels:.1f}",
+                    "peak_mb": peak // 1024,
+                    "embed_mb": (peak - baseline) // 1024,
+                    # The plan counts the decoded cover, which the probe loads before its baseline.
+                    "planned_mb": plan.peak // MB,
+                    "bytes_per_pixel": f"{(peak - baseline) * 1024 / (megapixels * 1e6):.1f}",
+                }
+            )
+    report("memory", rows)
+    return rows
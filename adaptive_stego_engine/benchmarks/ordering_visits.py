@@ -0,0 +1,39 @@
+"""Pixels visited per KB of payload for each new-format pixel ordering."""
+from __future__ import annotations
+
+import argparse
+from typing import List
+
+from ..embedder.pixel_order import layout_pixel_order, uses_capacity
+from ..embedder.traversal import analyse_stable_capacity, plan_slots
+from ..util.exceptions import StegoEngineError
+from ..util.layout import PixelOrdering, layout_pixels
+from .common import report, synthetic_cover, timed
+
+PAYLOAD_KB = (1, 4, 16, 64)
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    cover = synthetic_cover(args.height, args.width)
+    seed = "sym:bench"
+    stable = analyse_stable_capacity(cover, layout_pixels(seed, cover.shape[0] * cover.shape[1]))
+    rows = []
+    for ordering in PixelOrdering:
+        order = layout_pixel_order(ordering, stable.entropy_map, stable.usable_capacity() if uses_capacity(ordering) else None, seed)
+        for kb in PAYLOAD_KB:
+            with timed() as timer:
+                try:
+                    visited = plan_slots(order, stable, kb * 8192).pixels_visited
+                except StegoEngineError:
+                    visited = None
+            rows.append(
+                {
+                    "ordering": ordering.name.lower(),
+                    "payload_kb": kb,
+                    "pixels_visited": "over capacity" if visited is None else visited,
+                    "visited_per_kb": "-" if visited is None else f"{visited / kb:,.0f}",
+                    "plan_s": f"{timer.seconds:.3f}",
+                }
+            )
+    report("ordering_visits", rows)
+    return rows
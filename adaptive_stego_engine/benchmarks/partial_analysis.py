@@ -0,0 +1,50 @@
+"""Embed and extract time of whole-image versus tile-subset (``AUTO_TILES``) analysis."""
+from __future__ import annotations
+
+import argparse
+from typing import List
+
+import numpy as np
+
+from ..embedder.cover_session import CoverSession, EmbedCredentials, build_stream
+from ..extractor.extract_controller import ExtractController
+from ..util.exceptions import StegoEngineError
+from ..util.jobs import drain
+from ..util.layout import AUTO_TILES, StreamLayout, read_layout
+from .common import report, synthetic_cover, timed
+
+PAYLOAD_KB = (0.25, 2, 8)
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    cover = synthetic_cover(args.height, args.width)
+    credentials = EmbedCredentials(password="bench")
+    rng = np.random.default_rng(0)
+    rows = []
+    for kb in PAYLOAD_KB:
+        payload = rng.integers(0, 256, int(kb * 1024), dtype=np.uint8).tobytes()
+        stream, seed, _key_slots = build_stream(payload, "password", credentials)
+        for name, tiles in (("whole", 0), ("tiles", AUTO_TILES)):
+            try:
+                with timed() as embed_timer:
+                    # A fresh session per run, so analysis is included like in a single-use embed.
+                    stego, _metrics = drain(CoverSession(cover).iter_embed_stream(stream, seed, StreamLayout(tiles=tiles)))
+            except StegoEngineError as exc:
+                rows.append({"payload_kb": kb, "analysis": name, "error": str(exc)})
+                continue
+            layout, stream_len = read_layout(stego, seed)
+            with timed() as extract_timer:
+                extracted = ExtractController().read_layout_stream(stego, seed, layout, stream_len)
+            if extracted != stream:
+                raise AssertionError(f"{name} analysis did not round-trip {kb} KB")
+            rows.append(
+                {
+                    "payload_kb": kb,
+                    "analysis": name,
+                    "tiles": layout.tiles or "-",
+                    "embed_s": f"{embed_timer.seconds:.3f}",
+                    "extract_s": f"{extract_timer.seconds:.3f}",
+                }
+            )
+    report("partial_analysis", rows)
+    return rows
@@ -0,0 +1,47 @@
+"""Materialised entropy pixel order versus the on-demand keyed permutation."""
+from __future__ import annotations
+
+import argparse
+import tracemalloc
+from typing import List
+
+import numpy as np
+
+from ..embedder.pixel_order import build_pixel_order
+from ..util.prng import KeyedPermutation
+from .common import best_of, report
+
+PREFIX_FRACTION = 16
+
+
+def _peak_mb(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    size = args.height * args.width
+    entropy_map = np.random.default_rng(0).random((args.height, args.width), dtype=np.float32)
+    permutation = KeyedPermutation("bench", size)
+    prefix = max(1, size // PREFIX_FRACTION)
+    cases = (
+        ("entropy_full", lambda: build_pixel_order(entropy_map, "bench")),
+        ("keyed_full", lambda: permutation[:]),
+        (f"keyed_prefix_1/{PREFIX_FRACTION}", lambda: permutation[:prefix]),
+    )
+    rows = []
+    for name, fn in cases:
+        rows.append(
+            {
+                "order": name,
+                "pixels": size,
+                "seconds": f"{best_of(fn, args.repeats):.3f}",
+                "peak_mb": f"{_peak_mb(fn):.1f}",
+            }
+        )
+    report("pixel_order", rows)
+    return rows
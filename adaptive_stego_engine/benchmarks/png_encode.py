@@ -0,0 +1,44 @@
+"""PNG encode throughput and output size per ``PngWriteProfile``, against an LSB delta."""
+from __future__ import annotations
+
+import argparse
+from typing import List
+
+import numpy as np
+
+from ..util.image_io import PngWriteProfile, encode_png
+from ..util.lsb_delta import encode_delta
+from .common import best_of, report, synthetic_cover
+
+# LSBs flipped in the stego image the delta row encodes (a few KB of payload).
+DELTA_FLIPS = 1 << 14
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    rgb = synthetic_cover(args.height, args.width)
+    megapixels = rgb.shape[0] * rgb.shape[1] / 1e6
+    rows = []
+    for profile in PngWriteProfile:
+        seconds = best_of(lambda: encode_png(rgb, profile), args.repeats)
+        rows.append(
+            {
+                "profile": profile.value,
+                "seconds": f"{seconds:.3f}",
+                "mp_per_s": f"{megapixels / seconds:.1f}",
+                "size_kb": len(encode_png(rgb, profile)) // 1024,
+            }
+        )
+    stego = rgb.copy()
+    flips = np.random.default_rng(0).choice(stego.size, min(DELTA_FLIPS, stego.size), replace=False)
+    stego.reshape(-1)[flips] ^= 1
+    seconds = best_of(lambda: encode_delta(rgb, stego), args.repeats)
+    rows.append(
+        {
+            "profile": f"lsb_delta ({flips.size} flips)",
+            "seconds": f"{seconds:.3f}",
+            "mp_per_s": f"{megapixels / seconds:.1f}",
+            "size_kb": len(encode_delta(rgb, stego)) // 1024,
+        }
+    )
+    report("png_encode", rows)
+    return rows
@@ -0,0 +1,58 @@
+"""GUI preview cost: full-size decode versus the preview pyramid, for a PNG and an in-memory stego.
+
+Peak memory is what ``tracemalloc`` sees (NumPy arrays); Pillow's own decode buffer is
+not included, so the PNG rows understate both methods by the same amount.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import tracemalloc
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from ..util.image_io import load_png, save_png
+from ..util.preview import PREVIEW_SIZE, build_preview
+from .common import report, synthetic_cover, timed
+
+
+def _measure(fn: Callable[[], np.ndarray]) -> Tuple[float, float, int]:
+    tracemalloc.start()
+    try:
+        with timed() as timer:
+            held = fn()
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+    return timer.seconds, peak, held.nbytes
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    rgb = synthetic_cover(args.height, args.width)
+    maps = {"capacity": np.full(rgb.shape[:2], 3, dtype=np.uint8), "entropy": np.ones(rgb.shape[:2], dtype=np.float32)}
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cover_path = os.path.join(tmp, "cover.png")
+        save_png(cover_path, rgb)
+        cases = [
+            ("png", "full_decode", lambda: load_png(cover_path)),
+            ("png", "pyramid", lambda: build_preview(cover_path, PREVIEW_SIZE).image),
+            ("stego", "pyramid", lambda: build_preview(rgb, PREVIEW_SIZE).image),
+            ("stego", "pyramid+maps", lambda: build_preview(rgb, PREVIEW_SIZE, maps).image),
+        ]
+        for source, method, fn in cases:
+            seconds, peak, held = _measure(fn)
+            rows.append(
+                {
+                    "source": source,
+                    "method": method,
+                    "mp": f"{rgb.shape[0] * rgb.shape[1] / 1e6:.1f}",
+                    "seconds": f"{seconds:.3f}",
+                    "peak_mb": f"{peak:.1f}",
+                    "held_kb": f"{held / 1024:.0f}",
+                }
+            )
+    report("preview", rows)
+    return rows
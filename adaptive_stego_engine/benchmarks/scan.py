@@ -0,0 +1,98 @@
+"""Scanner estimates on adaptively embedded and randomly replaced covers, then scan throughput."""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+from typing import List
+
+import numpy as np
+
+from ..embedder.cover_session import CoverSession, EmbedCredentials
+from ..scanner.scan import FOCUS_MODES, scan_directory, scan_image
+from ..util.image_io import PngWriteProfile, save_png
+from ..util.layout import StreamLayout
+from .common import best_of, report, synthetic_cover
+
+# Embedding rates as fractions of all samples; the adaptive embedder runs out of capacity above about 0.15.
+ADAPTIVE_RATES = (0.0, 0.01, 0.02, 0.05, 0.1)
+UNIFORM_RATES = (0.0, 0.1, 0.3, 0.6)
+# Side of the noisy squares of the mixed cover, laid out like a checkerboard.
+TEXTURE_BLOCK = 128
+# Covers written for the directory scan (decode included).
+DIRECTORY_IMAGES = 8
+
+
+def mixed_cover(height: int, width: int, seed: int = 0) -> np.ndarray:
+    """Smooth cover with noisy squares on half its area, like a photograph's sky and foliage.
+
+    The adaptive embedder confines its changes to the squares, where the "texture" focus looks.
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = 128 + 60 * np.sin(x / 97.0) * np.cos(y / 131.0)
+    textured = (y // TEXTURE_BLOCK + x // TEXTURE_BLOCK) % 2 == 0
+    base += np.where(textured, rng.normal(0, 8, base.shape), rng.normal(0, 0.6, base.shape)).astype(np.float32)
+    rgb = np.stack([base, base * 0.9, base * 1.1], axis=-1)
+    return np.clip(rgb, 0, 255).astype(np.uint8)
+
+
+def _embed_adaptive(session: CoverSession, rate: float, rng: np.random.Generator) -> np.ndarray:
+    size = int(rate * session.rgb.size / 8)
+    if size == 0:
+        return session.rgb
+    payload = rng.integers(0, 256, size, dtype=np.uint8).tobytes()
+    stego, _metrics = session.embed(payload, "password", EmbedCredentials(password="bench"), StreamLayout())
+    return stego
+
+
+def _replace_lsbs(cover: np.ndarray, rate: float, rng: np.random.Generator) -> np.ndarray:
+    stego = cover.copy()
+    chosen = rng.random(stego.shape) < rate
+    stego[chosen] = (stego[chosen] & 0xFE) | rng.integers(0, 2, np.count_nonzero(chosen), dtype=np.uint8)
+    return stego
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    rng = np.random.default_rng(0)
+    session = CoverSession(mixed_cover(args.height, args.width))
+    cover = synthetic_cover(args.height, args.width)
+    megapixels = cover.shape[0] * cover.shape[1] / 1e6
+    rows: List[dict] = []
+    cases = [("adaptive", rate, _embed_adaptive(session, rate, rng)) for rate in ADAPTIVE_RATES]
+    cases += [("uniform", rate, _replace_lsbs(cover, rate, rng)) for rate in UNIFORM_RATES]
+    for embedding, rate, stego in cases:
+        for focus in FOCUS_MODES:
+            result = scan_image(stego, focus)
+            rows.append(
+                {
+                    "embedding": embedding,
+                    "rate": rate,
+                    "focus": focus,
+                    "chi_square": f"{result.chi_square:.3f}",
+                    "rs": f"{result.rs:.3f}",
+                    "spa": f"{result.spa:.3f}",
+                    "score": f"{result.score:.3f}",
+                }
+            )
+    for focus in FOCUS_MODES:
+        seconds = best_of(lambda: scan_image(cover, focus), args.repeats)
+        rows.append({"focus": focus, "seconds": f"{seconds:.3f}", "mp_per_s": f"{megapixels / seconds:.1f}"})
+    with tempfile.TemporaryDirectory() as tmp:
+        for index in range(DIRECTORY_IMAGES):
+            image = synthetic_cover(args.height, args.width, seed=index)
+            save_png(os.path.join(tmp, f"{index:03d}.png"), image, PngWriteProfile.FAST)
+        for focus in FOCUS_MODES:
+            for workers in sorted({1, os.cpu_count() or 1}):
+                seconds = best_of(lambda: scan_directory(tmp, focus, max_workers=workers), args.repeats)
+                rows.append(
+                    {
+                        "directory_images": DIRECTORY_IMAGES,
+                        "focus": focus,
+                        "workers": workers,
+                        "seconds": f"{seconds:.3f}",
+                        "mp_per_s": f"{DIRECTORY_IMAGES * megapixels / seconds:.1f}",
+                    }
+                )
+    report("scan", rows)
+    return rows
@@ -0,0 +1,132 @@
+"""Calibrate the batch cost model, then compare FIFO and longest-first batches of mixed jobs.
+
+Set ``STEGO_COST_MODEL`` to a file path to save the refitted coefficients there, where
+``util.scheduler.load_cost_model`` picks them up for later batches.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import string
+import tempfile
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from ..embedder.embed_controller import EmbedController, EmbedSpec
+from ..extractor.extract_controller import ExtractController, ExtractSpec
+from ..util.image_io import save_png
+from ..util.layout import AUTO_TILES, StreamLayout
+from ..util.memory_plan import plan_embed
+from ..util.scheduler import COST_MODEL_ENV_VAR, CostModel, batch_budget, fit_cost_model, simulate_makespan
+from .common import report, synthetic_cover
+
+AREA_FRACTIONS = (0.25, 0.5, 1.0)
+TILED_PAYLOAD_KB = (0.25, 2, 8)
+WHOLE_PAYLOAD_KB = 1
+# Simulated batch: cover sizes in megapixels and payloads in KB, largest submitted last.
+MIXED_MEGAPIXELS = (1, 1, 2, 4, 4, 8, 12, 12, 24, 48, 48)
+MIXED_PAYLOAD_KB = (0.5, 4, 32)
+SIMULATED_WORKERS = 4
+
+
+def _text(rng: np.random.Generator, kb: float) -> str:
+    letters = np.frombuffer(string.ascii_letters.encode(), dtype=np.uint8)
+    return rng.choice(letters, int(kb * 1024)).tobytes().decode()
+
+
+def _record_rows(records) -> List[dict]:
+    return [
+        {
+            "job": Path(record.name).name,
+            "kind": record.kind,
+            "mp": f"{record.pixels / 1e6:.2f}",
+            "kbit": f"{record.bits / 1e3:.1f}",
+            "predicted_s": f"{record.predicted:.2f}",
+            "actual_s": f"{record.actual:.2f}" if record.actual is not None else record.error,
+        }
+        for record in records
+    ]
+
+
+def _simulated_rows(model: CostModel) -> List[dict]:
+    rng = np.random.default_rng(1)
+    predicted, memory = [], []
+    for megapixels in MIXED_MEGAPIXELS:
+        kb = float(rng.choice(MIXED_PAYLOAD_KB))
+        width = int(np.sqrt(megapixels * 1e6 * 3 / 2))
+        height = int(megapixels * 1e6 // width)
+        stream_len = int(kb * 1024) + 64
+        predicted.append(model.predict("embed", height * width, stream_len * 8))
+        memory.append(plan_embed(height, width, stream_len, StreamLayout(), None).peak)
+    budget = batch_budget()
+    rows = []
+    for name, longest_first in (("fifo", False), ("longest_first", True)):
+        makespan = simulate_makespan(predicted, memory, SIMULATED_WORKERS, budget, longest_first)
+        rows.append(
+            {
+                "schedule": name,
+                "jobs": len(predicted),
+                "workers": SIMULATED_WORKERS,
+                "budget_gb": f"{budget / (1 << 30):.1f}",
+                "makespan_s": f"{makespan:.1f}",
+                "lower_bound_s": f"{max(max(predicted), sum(predicted) / SIMULATED_WORKERS):.1f}",
+            }
+        )
+    return rows
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    rng = np.random.default_rng(0)
+    embed_specs, extract_specs = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        for index, fraction in enumerate(AREA_FRACTIONS):
+            height, width = max(64, int(args.height * fraction**0.5)), max(64, int(args.width * fraction**0.5))
+            cover_path = os.path.join(tmp, f"cover{index}.png")
+            save_png(cover_path, synthetic_cover(height, width, seed=index))
+            whole_path = os.path.join(tmp, f"whole{index}.png")
+            embed_specs.append(
+                EmbedSpec(cover_path, _text(rng, WHOLE_PAYLOAD_KB), "password", png_path=whole_path, password="bench", layout=StreamLayout())
+            )
+            extract_specs.append(ExtractSpec(whole_path, "password", password="bench"))
+            for kb in TILED_PAYLOAD_KB:
+                embed_specs.append(
+                    EmbedSpec(
+                        cover_path,
+                        _text(rng, kb),
+                        "password",
+                        delta_path=os.path.join(tmp, f"tiled{index}_{kb}.sgd"),
+                        password="bench",
+                        layout=StreamLayout(tiles=AUTO_TILES),
+                    )
+                )
+        # One worker, so each measurement is a job's cost on an otherwise idle core.
+        embedded = EmbedController().embed_batch(embed_specs, max_workers=1, cost_model=CostModel())
+        extracted = ExtractController().extract_batch(extract_specs, max_workers=1, cost_model=CostModel())
+    records = embedded.records + extracted.records
+    model = fit_cost_model(records)
+    rows = _record_rows(records)
+    report("scheduler calibration (built-in model)", rows)
+    coefficient_rows = [
+        {
+            "kind": kind,
+            "fixed_s": f"{coefficients.fixed:.3f}",
+            "per_megapixel_s": f"{coefficients.per_megapixel:.3f}",
+            "per_kilobit_s": f"{coefficients.per_kilobit:.4f}",
+        }
+        for kind, coefficients in model.coefficients.items()
+    ]
+    report("scheduler fitted coefficients", coefficient_rows)
+    refitted = [
+        {"job": row["job"], "kind": row["kind"], "refit_s": f"{model.predict(r.kind, r.pixels, r.bits):.2f}", "actual_s": row["actual_s"]}
+        for row, r in zip(rows, records)
+    ]
+    report("scheduler calibration (refitted model)", refitted)
+    destination = os.environ.get(COST_MODEL_ENV_VAR)
+    if destination:
+        model.save(destination)
+        print(f"  saved to {destination}")
+    simulated = _simulated_rows(model)
+    report("scheduler simulated mixed batch", simulated)
+    return rows + coefficient_rows + simulated
@@ -0,0 +1,49 @@
+"""Write and read throughput of the shared slot traversal.
+
+Its round-trip properties are covered by ``tests/test_slot_roundtrip.py``.
+"""
+from __future__ import annotations
+
+import argparse
+from typing import List
+
+import numpy as np
+
+from ..embedder.slots import iter_slot_chunks, raw_capacity, write_bits
+from ..extractor.extraction import read_bits_prefix
+from .common import best_of, report, synthetic_cover
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    rng = np.random.default_rng(42)
+    cover = synthetic_cover(args.height, args.width)
+    flat = cover.reshape(-1, 3)
+    order = rng.permutation(flat.shape[0])
+    capacity_flat = rng.integers(0, 4, flat.shape[0], dtype=np.uint8)
+    slots = int(capacity_flat.sum(dtype=np.int64))
+    bits = rng.integers(0, 2, slots, dtype=np.uint8)
+    stego = cover.copy()
+
+    def write() -> None:
+        written = 0
+        for part in iter_slot_chunks(order, raw_capacity(capacity_flat)):
+            size = part.slot_pixels.size
+            write_bits(stego.reshape(-1, 3), part.slot_pixels, part.slot_channels, bits[written : written + size])
+            written += size
+
+    def read() -> None:
+        read_bits_prefix(stego, order, capacity_flat)
+
+    rows = []
+    for name, fn in (("write", write), ("read", read)):
+        seconds = best_of(fn, args.repeats)
+        rows.append(
+            {
+                "kernel": name,
+                "slots": slots,
+                "seconds": f"{seconds:.3f}",
+                "slots_per_s": f"{slots / seconds:,.0f}",
+            }
+        )
+    report("slot_roundtrip", rows)
+    return rows
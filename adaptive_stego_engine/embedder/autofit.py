@@ -0,0 +1,109 @@
+"""Search capacity profiles and covers for the first embed that passes the quality gate.
+
+A profile is a ``StreamLayout.max_bits`` cap, which the layout descriptor records, so
+the extractor reads a fitted stream without being told which profile won. Profiles are
+tried from the most capacity to the fewest changed LSBs: a quality failure moves to the
+next profile, while a capacity failure skips the cover's remaining profiles, which can
+only hold less. Attempts on one cover share its ``CoverSession``, and the stream is built
+once, so a retry re-runs ordering, embedding and the metrics but never decoding or
+texture analysis. ``EmbedController.iter_embed_auto_fit`` drives the search over cover
+paths; ``cover`` in attempts and results is always the cover's path.
+"""
+from __future__ import annotations
+
+import dataclasses
+import time
+from dataclasses import dataclass
+from typing import Generator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..util.exceptions import CapacityError, QualityError, StegoEngineError
+from ..util.jobs import JobProgress, JobSteps
+from ..util.key_slots import KeySlots
+from ..util.layout import MAX_BITS, StreamLayout
+from .cover_session import CoverSession, EmbedMetrics
+
+CAPACITY_PROFILES: Tuple[int, ...] = tuple(range(MAX_BITS, 0, -1))
+
+
+@dataclass(frozen=True)
+class FitAttempt:
+    cover: str
+    max_bits: int
+    seconds: float
+    error: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class AutoFitResult:
+    stego: np.ndarray
+    metrics: EmbedMetrics
+    cover: str
+    layout: StreamLayout
+    attempts: Tuple[FitAttempt, ...]
+
+    @property
+    def seconds(self) -> float:
+        return sum(attempt.seconds for attempt in self.attempts)
+
+
+class AutoFitError(StegoEngineError):
+    """No cover and profile passed; ``attempts`` lists what was tried."""
+
+    def __init__(self, attempts: Sequence[FitAttempt]) -> None:
+        self.attempts = tuple(attempts)
+        last = f" (last: {attempts[-1].error})" if attempts else ""
+        super().__init__(f"No capacity profile fits the payload after {len(self.attempts)} attempt(s){last}")
+
+
+def validate_profiles(profiles: Sequence[int]) -> Tuple[int, ...]:
+    profiles = tuple(profiles)
+    if not profiles or any(not 1 <= bits <= MAX_BITS for bits in profiles):
+        raise StegoEngineError(f"Capacity profiles must be bit caps between 1 and {MAX_BITS}")
+    return profiles
+
+
+def _rescale(steps: Generator[JobProgress, None, object], start: float, end: float, prefix: str) -> JobSteps:
+    while True:
+        try:
+            progress = next(steps)
+        except StopIteration as stop:
+            return stop.value
+        yield JobProgress(int(start + (end - start) * progress.percent / 100), f"{prefix}{progress.message}")
+
+
+def iter_fit_cover(
+    session: CoverSession,
+    cover: str,
+    stream_bytes: bytes,
+    seed: str,
+    layout: StreamLayout,
+    profiles: Sequence[int],
+    attempts: List[FitAttempt],
+    progress: Tuple[float, float] = (0, 100),
+    key_slots: Optional[KeySlots] = None,
+) -> JobSteps[Optional[AutoFitResult]]:
+    """Try ``profiles`` on one cover, appending to ``attempts``; ``None`` when none fits.
+
+    ``cover`` is the path ``session`` was loaded from, recorded in every attempt.
+    """
+    span = (progress[1] - progress[0]) / len(profiles)
+    for index, max_bits in enumerate(profiles):
+        attempt_layout = dataclasses.replace(layout, max_bits=max_bits)
+        start = time.perf_counter()
+        try:
+            stego, metrics = yield from _rescale(
+                session.iter_embed_stream(stream_bytes, seed, attempt_layout, key_slots),
+                progress[0] + span * index,
+                progress[0] + span * (index + 1),
+                f"[{len(attempts) + 1}] ≤{max_bits} bit(s)/pixel: ",
+            )
+        except (QualityError, CapacityError) as exc:
+            attempts.append(FitAttempt(cover, max_bits, time.perf_counter() - start, str(exc)))
+            if isinstance(exc, CapacityError):
+                return None
+            continue
+        attempts.append(FitAttempt(cover, max_bits, time.perf_counter() - start))
+        return AutoFitResult(stego, metrics, cover, attempt_layout, tuple(attempts))
+    return None
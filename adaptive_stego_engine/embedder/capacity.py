@@ -3,9 +3,12 @@ from __future__ import annotations
 
 import numpy as np
 
+MAX_CAPACITY = 3
+
 
 def refine_capacity_map(base_capacity: np.ndarray, surface_map: np.ndarray) -> np.ndarray:
+    """Per-pixel capacity 0..``MAX_CAPACITY`` as uint8."""
     refined = base_capacity.astype(np.float32)
     refined += surface_map * 0.5
-    refined = np.clip(refined, 0, 3)
-    return refined.astype(np.int32)
+    np.clip(refined, 0, MAX_CAPACITY, out=refined)
+    return refined.astype(np.uint8)
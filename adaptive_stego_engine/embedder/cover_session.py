@@ -0,0 +1,399 @@
+"""Analyse a cover once and embed many payloads into it."""
+from __future__ import annotations
+
+import dataclasses
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..analyzer.region_classifier import compute_capacity_map
+from ..analyzer.texture_map import compute_texture_maps
+from ..util import bitstream
+from ..util.asym_crypto import load_public_key_pem
+from ..util.exceptions import QualityError, StegoEngineError
+from ..util.image_cache import ImageCache
+from ..util.image_io import load_png
+from ..util.jobs import JobProgress, JobSteps, drain, scale_progress
+from ..util.key_slots import KeySlots, SlotPlacement, place_key_slots, reserved_pixels, write_key_slots
+from ..util.layout import AUTO_TILES, StreamLayout, pack_layout, write_layout
+from ..util.metrics import (
+    CoverStatistics,
+    compute_psnr,
+    compute_ssim,
+    cover_statistics,
+    histogram_drift,
+    regional_quality,
+)
+from . import capacity as capacity_module
+from .drift_control import build_block_index
+from .embedding import commit_embedding, iter_plan_embedding
+from .pixel_order import build_pixel_order, layout_pixel_order, uses_capacity
+from .segments import iter_embed_segments
+from .streams import (
+    build_multi_stream,
+    build_public_stream,
+    build_symmetric_stream,
+    multi_stream_overhead,
+    public_seed,
+    public_stream_overhead,
+    recipient_key_slots,
+    symmetric_seed,
+    symmetric_stream_overhead,
+)
+from .tiles import TiledAnalysis, select_tile_count, stream_tiles, tile_regions, tiled_pixel_order
+from .traversal import StableCapacity, analyse_stable_capacity
+
+
+MIN_PSNR = 48.0
+MIN_SSIM = 0.985
+MAX_HIST_DRIFT = 0.02
+
+
+@dataclass
+class EmbedMetrics:
+    psnr: float
+    ssim: float
+    hist_drift: float
+
+
+@dataclass(frozen=True)
+class EmbedCredentials:
+    password: Optional[str] = None
+    aes_enabled: bool = False
+    public_key_path: Optional[str] = None
+    public_key_paths: Tuple[str, ...] = ()
+    # Multi-recipient key slots sealed up front; ``build_stream`` seals fresh ones when unset.
+    key_slots: Optional[KeySlots] = None
+
+
+@dataclass(frozen=True)
+class CoverAnalysis:
+    """Seed-independent legacy analysis: texture maps, capacity and block structure."""
+
+    gray: np.ndarray
+    entropy_map: np.ndarray
+    capacity_flat: np.ndarray
+    block_map: np.ndarray
+    block_sizes: np.ndarray
+
+
+def analyse_cover(rgb: np.ndarray, band_rows: Optional[int] = None) -> CoverAnalysis:
+    gray, _gradient_map, entropy_map, surface_map = compute_texture_maps(rgb, band_rows)
+    base_capacity = compute_capacity_map(surface_map)
+    refined_capacity = capacity_module.refine_capacity_map(base_capacity, surface_map)
+    height, width, _ = rgb.shape
+    block_map, block_sizes = build_block_index(height, width)
+    return CoverAnalysis(
+        gray=gray,
+        entropy_map=entropy_map,
+        capacity_flat=refined_capacity.reshape(-1),
+        block_map=block_map,
+        block_sizes=block_sizes,
+    )
+
+
+def build_stream(
+    payload: str | bytes,
+    mode: str,
+    credentials: EmbedCredentials,
+) -> Tuple[bytes, str, Optional[KeySlots]]:
+    """Stream, seed and (multi-recipient only) key slots for ``payload``; text is UTF-8 encoded."""
+    payload_bytes = payload.encode("utf-8") if isinstance(payload, str) else payload
+    if mode == "password":
+        return (*build_symmetric_stream(payload_bytes, credentials.password or "", credentials.aes_enabled), None)
+    if mode == "public":
+        return (*build_public_stream(payload_bytes, credentials.public_key_path or ""), None)
+    if mode == "multi":
+        key_slots = credentials.key_slots or recipient_key_slots(credentials.public_key_paths)
+        return (*build_multi_stream(payload_bytes, key_slots), key_slots)
+    raise StegoEngineError("Unsupported mode selected")
+
+
+def stream_length(payload: str | bytes, mode: str, credentials: EmbedCredentials) -> int:
+    """Length of the stream ``build_stream`` makes from ``payload``, without deriving any key."""
+    payload_len = len(payload.encode("utf-8") if isinstance(payload, str) else payload)
+    if mode == "password":
+        return payload_len + symmetric_stream_overhead(credentials.aes_enabled)
+    if mode == "public":
+        return payload_len + public_stream_overhead(credentials.public_key_path or "")
+    if mode == "multi":
+        return payload_len + multi_stream_overhead()
+    raise StegoEngineError("Unsupported mode selected")
+
+
+def default_layout(mode: str, layout: Optional[StreamLayout]) -> Optional[StreamLayout]:
+    """Multi-recipient streams are only written in the new format, which records their length."""
+    if mode == "multi" and layout is None:
+        return StreamLayout()
+    return layout
+
+
+def stream_seed(mode: str, credentials: EmbedCredentials) -> str:
+    """Seed ``build_stream`` would return for ``mode``, without building a stream."""
+    if mode == "password":
+        if not credentials.password:
+            raise StegoEngineError("Password is required for symmetric mode")
+        return symmetric_seed(credentials.password)
+    if mode == "public":
+        if not credentials.public_key_path:
+            raise StegoEngineError("Public key is required for asymmetric mode")
+        return public_seed(load_public_key_pem(credentials.public_key_path))
+    if mode == "multi":
+        if credentials.key_slots is None:
+            raise StegoEngineError("Multi-recipient seeds derive from the session key; seal the key slots first")
+        return credentials.key_slots.seed
+    raise StegoEngineError("Unsupported mode selected")
+
+
+def _write_reserved(
+    flat: np.ndarray,
+    seed: str,
+    descriptor: bytes,
+    key_slots: Optional[KeySlots],
+    placement: Optional[SlotPlacement],
+) -> None:
+    descriptor_pixels, _reserved = reserved_pixels(seed, flat.shape[0], placement)
+    write_layout(flat, descriptor_pixels, descriptor)
+    if key_slots is not None:
+        write_key_slots(flat, key_slots, placement)
+
+
+def evaluate_quality(
+    cover: np.ndarray,
+    stego: np.ndarray,
+    stats: Optional[CoverStatistics] = None,
+    band_rows: Optional[int] = None,
+    regions: Optional[Sequence[Tuple[int, int, int, int]]] = None,
+) -> EmbedMetrics:
+    """Metrics of ``stego`` against the quality thresholds.
+
+    ``regions`` bounds where ``stego`` may differ from ``cover`` so the metrics only
+    visit those rectangles (see ``util.metrics.regional_quality``).
+    """
+    if regions is not None:
+        psnr_value, ssim_value, hist_value = regional_quality(cover, stego, regions)
+    else:
+        psnr_value = compute_psnr(cover, stego)
+        ssim_value = compute_ssim(cover, stego, stats, band_rows)
+        hist_value = histogram_drift(cover, stego, stats)
+    if psnr_value < MIN_PSNR or ssim_value < MIN_SSIM or hist_value > MAX_HIST_DRIFT:
+        raise QualityError(
+            f"Quality thresholds not met: PSNR={psnr_value:.2f}, SSIM={ssim_value:.4f}, drift={hist_value:.4f}"
+        )
+    return EmbedMetrics(psnr=psnr_value, ssim=ssim_value, hist_drift=hist_value)
+
+
+class CoverSession:
+    """A decoded cover plus its lazily computed, seed-independent analysis.
+
+    Legacy analysis, LSB-stable analysis and cover metric statistics are each computed
+    on first use and then shared by every ``embed`` call. Cached state is never mutated
+    after it is built, so one session can serve several threads at once.
+
+    The float64 SSIM moments take 48 bytes per pixel; single-use sessions pass
+    ``cache_statistics=False`` to compute them one channel at a time instead.
+    ``band_rows`` selects tiled analysis and banded SSIM (see ``util.memory_plan``).
+    """
+
+    def __init__(self, rgb: np.ndarray, cache_statistics: bool = True, band_rows: Optional[int] = None) -> None:
+        self.rgb = rgb.view()
+        self.rgb.flags.writeable = False
+        self.cache_statistics = cache_statistics
+        self.band_rows = band_rows
+        self._lock = threading.Lock()
+        self._analysis: Optional[CoverAnalysis] = None
+        self._stable: Optional[StableCapacity] = None
+        self._tiled: Optional[TiledAnalysis] = None
+        self._stats: Optional[CoverStatistics] = None
+
+    @classmethod
+    def from_path(
+        cls,
+        cover_path: str,
+        cache: Optional[ImageCache] = None,
+        cache_statistics: bool = True,
+    ) -> "CoverSession":
+        return cls(load_png(cover_path, cache=cache), cache_statistics)
+
+    @classmethod
+    def prepared(
+        cls,
+        rgb: np.ndarray,
+        analysis: Optional[CoverAnalysis] = None,
+        stable: Optional[StableCapacity] = None,
+        cache_statistics: bool = True,
+    ) -> "CoverSession":
+        """Session seeded with analyses computed elsewhere, e.g. mapped from shared memory."""
+        session = cls(rgb, cache_statistics)
+        session._analysis = analysis
+        session._stable = stable
+        return session
+
+    def analysis(self) -> CoverAnalysis:
+        with self._lock:
+            if self._analysis is None:
+                self._analysis = analyse_cover(self.rgb, self.band_rows)
+            return self._analysis
+
+    def stable_analysis(self, seed: str, placement: Optional[SlotPlacement] = None) -> StableCapacity:
+        """LSB-stable analysis with the descriptor under ``seed`` and the key slots of ``placement`` reserved."""
+        with self._lock:
+            if self._stable is None:
+                self._stable = analyse_stable_capacity(self.rgb, np.zeros(0, dtype=np.int64), self.band_rows)
+            stable = self._stable
+        _descriptor, reserved = reserved_pixels(seed, self.rgb.shape[0] * self.rgb.shape[1], placement)
+        return dataclasses.replace(stable, reserved=reserved)
+
+    def tiled_analysis(self) -> TiledAnalysis:
+        """Per-tile LSB-stable analysis, filled in as partially analysed streams need tiles."""
+        with self._lock:
+            if self._tiled is None:
+                self._tiled = TiledAnalysis(self.rgb)
+            return self._tiled
+
+    def analysis_maps(self) -> Dict[str, np.ndarray]:
+        """Capacity and entropy maps of whichever whole-image analysis is already built.
+
+        Never analyses: an empty dict means neither the legacy nor the LSB-stable analysis
+        has run yet. Tile-subset analysis only covers part of the image and is not used.
+        """
+        with self._lock:
+            analysis = self._analysis or self._stable
+        if analysis is None:
+            return {}
+        height, width = self.rgb.shape[:2]
+        return {"capacity": analysis.capacity_flat.reshape(height, width), "entropy": analysis.entropy_map}
+
+    def statistics(self) -> CoverStatistics:
+        with self._lock:
+            if self._stats is None:
+                self._stats = cover_statistics(self.rgb)
+            return self._stats
+
+    def _iter_embed_legacy(self, bits: list[int], seed: str) -> JobSteps[np.ndarray]:
+        yield JobProgress(10, "Analyzing texture…")
+        analysis = self.analysis()
+
+        yield JobProgress(35, "Ordering pixels…")
+        order = build_pixel_order(analysis.entropy_map, seed)
+
+        plan = yield from scale_progress(
+            iter_plan_embedding(
+                self.rgb,
+                order,
+                analysis.capacity_flat,
+                bits,
+                analysis.block_map,
+                analysis.block_sizes,
+                analysis.gray,
+            ),
+            45,
+            80,
+            "Planning embedding…",
+        )
+        yield JobProgress(80, "Embedding payload…")
+        return commit_embedding(self.rgb, plan)
+
+    def _iter_embed_layout(
+        self,
+        stream_bytes: bytes,
+        seed: str,
+        layout: StreamLayout,
+        key_slots: Optional[KeySlots],
+        placement: Optional[SlotPlacement],
+    ) -> JobSteps[np.ndarray]:
+        descriptor = pack_layout(layout, len(stream_bytes))
+        yield JobProgress(10, "Analyzing texture…")
+        stable = self.stable_analysis(seed, placement).capped(layout.max_bits)
+
+        yield JobProgress(35, "Ordering pixels…")
+        usable = stable.usable_capacity() if uses_capacity(layout.ordering) else None
+        order = layout_pixel_order(layout.ordering, stable.entropy_map, usable, seed)
+
+        message = f"Embedding payload across {layout.segments} segment(s)…"
+        yield JobProgress(45, message)
+        stego = self.rgb.copy()
+        flat = stego.reshape(-1, 3)
+        _write_reserved(flat, seed, descriptor, key_slots, placement)
+        bits = np.unpackbits(np.frombuffer(stream_bytes, dtype=np.uint8))
+        yield from scale_progress(iter_embed_segments(flat, order, stable, bits, layout.segments, seed), 45, 80, message)
+        return stego
+
+    def _iter_embed_tiled(
+        self,
+        stream_bytes: bytes,
+        seed: str,
+        layout: StreamLayout,
+        key_slots: Optional[KeySlots],
+        placement: Optional[SlotPlacement],
+    ) -> JobSteps[Tuple[np.ndarray, Optional[list]]]:
+        layout.validate()
+        bits = np.unpackbits(np.frombuffer(stream_bytes, dtype=np.uint8))
+        height, width = self.rgb.shape[:2]
+        _descriptor, reserved = reserved_pixels(seed, height * width, placement)
+        analysis = self.tiled_analysis()
+        yield JobProgress(10, "Analyzing tiles…")
+        if layout.tiles == AUTO_TILES:
+            count = select_tile_count(analysis, seed, reserved, bits.size, layout.segments, layout.max_bits)
+            layout = dataclasses.replace(layout, tiles=count)
+        tiles = stream_tiles(analysis, seed, layout.tiles)
+        analysis.analyse(tiles)
+        descriptor = pack_layout(layout, len(stream_bytes))
+        stable = analysis.stable(reserved).capped(layout.max_bits)
+
+        yield JobProgress(35, f"Ordering pixels of {len(tiles)} tile(s)…")
+        order = tiled_pixel_order(stable, tiles, layout.ordering, seed)
+
+        message = f"Embedding payload across {layout.segments} segment(s)…"
+        yield JobProgress(45, message)
+        stego = self.rgb.copy()
+        flat = stego.reshape(-1, 3)
+        _write_reserved(flat, seed, descriptor, key_slots, placement)
+        yield from scale_progress(iter_embed_segments(flat, order, stable, bits, layout.segments, seed), 45, 80, message)
+        if key_slots is not None:
+            # Thousands of slot pixels are spread over the whole image and their metric
+            # windows cover most of it, so the metrics visit the whole image instead.
+            return stego, None
+        # The descriptor pixels lie anywhere in the image; they are changed regions too.
+        descriptor_regions = [(p // width, p // width + 1, p % width, p % width + 1) for p in reserved.tolist()]
+        return stego, tile_regions(tiles, height, width) + descriptor_regions
+
+    def iter_embed_stream(
+        self,
+        stream_bytes: bytes,
+        seed: str,
+        layout: Optional[StreamLayout] = StreamLayout(),
+        key_slots: Optional[KeySlots] = None,
+    ) -> JobSteps[Tuple[np.ndarray, EmbedMetrics]]:
+        """Embed a built stream; ``layout=None`` writes a legacy stream, which ``key_slots`` rule out."""
+        bits = bitstream.bytes_to_bits(stream_bytes)
+        if len(bits) == 0:
+            raise StegoEngineError("Payload is empty")
+        if layout is None and key_slots is not None:
+            raise StegoEngineError("Key slots are only written with new-format streams")
+        placement = place_key_slots(key_slots, self.rgb.shape[0] * self.rgb.shape[1]) if key_slots else None
+
+        if layout is not None and layout.tiles:
+            stego, regions = yield from self._iter_embed_tiled(stream_bytes, seed, layout, key_slots, placement)
+            yield JobProgress(85, "Computing quality metrics…")
+            return stego, evaluate_quality(self.rgb, stego, band_rows=self.band_rows, regions=regions)
+        if layout is None:
+            stego = yield from self._iter_embed_legacy(bits, seed)
+        else:
+            stego = yield from self._iter_embed_layout(stream_bytes, seed, layout, key_slots, placement)
+
+        yield JobProgress(85, "Computing quality metrics…")
+        stats = self.statistics() if self.cache_statistics else None
+        return stego, evaluate_quality(self.rgb, stego, stats, self.band_rows)
+
+    def embed(
+        self,
+        payload: str | bytes,
+        mode: str,
+        credentials: EmbedCredentials,
+        layout: Optional[StreamLayout] = StreamLayout(),
+    ) -> Tuple[np.ndarray, EmbedMetrics]:
+        stream_bytes, seed, key_slots = build_stream(payload, mode, credentials)
+        return drain(self.iter_embed_stream(stream_bytes, seed, default_layout(mode, layout), key_slots))
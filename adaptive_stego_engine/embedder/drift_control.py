@@ -1,10 +1,24 @@
 """Block-level drift control helpers."""
 from __future__ import annotations
 
+from typing import Tuple
+
 import numpy as np
 
 
 BLOCK_SIZE = 8
+BLOCK_PIXELS = BLOCK_SIZE * BLOCK_SIZE
+HIST_BINS = 16
+# Bin index of every 8-bit value under np.histogram(bins=16, range=(0, 255)) semantics.
+_HIST_EDGES = np.linspace(0, 255, HIST_BINS + 1)
+_HIST_BIN_LUT = np.minimum(np.searchsorted(_HIST_EDGES, np.arange(256), side="right") - 1, HIST_BINS - 1)
+# Variance ratios this close to a threshold are re-checked with the scalar checker.
+_VAR_RATIO_TIE = 1e-9
+_BATCH_CHUNK = 16384
+# With only LSBs changing, original and stego variances stay within sqrt(v) + 0.25 of
+# the LSB-cleared variance v, and LSB flips never cross a 16-bin histogram edge.
+# Blocks at or above this cleared variance therefore always pass the safety checker.
+STABLE_BLOCK_VARIANCE = 100.0
 
 
 def block_safety_checker(original: np.ndarray, stego: np.ndarray) -> bool:
@@ -21,3 +35,144 @@ def block_safety_checker(original: np.ndarray, stego: np.ndarray) -> bool:
         return False
     var_ratio = np.var(stego) / (np.var(original) + 1e-6)
     return 0.75 <= var_ratio <= 1.25
+
+
+def block_grid(height: int, width: int) -> Tuple[int, int]:
+    return (height + BLOCK_SIZE - 1) // BLOCK_SIZE, (width + BLOCK_SIZE - 1) // BLOCK_SIZE
+
+
+def build_block_index(height: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Flat pixel -> block id map and the pixel count of every block."""
+    block_rows, block_cols = block_grid(height, width)
+    rows = np.arange(height, dtype=np.int32) // BLOCK_SIZE
+    cols = np.arange(width, dtype=np.int32) // BLOCK_SIZE
+    block_map = (rows[:, None] * block_cols + cols[None, :]).reshape(-1)
+    row_heights = np.minimum(BLOCK_SIZE, height - np.arange(block_rows) * BLOCK_SIZE)
+    col_widths = np.minimum(BLOCK_SIZE, width - np.arange(block_cols) * BLOCK_SIZE)
+    block_sizes = (row_heights[:, None] * col_widths[None, :]).reshape(-1).astype(np.int32)
+    return block_map, block_sizes
+
+
+def block_pixel_indices(block_ids: np.ndarray, height: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Flat pixel indices ``(len(block_ids), 64)`` of the given blocks plus their validity mask."""
+    _, block_cols = block_grid(height, width)
+    block_y, block_x = np.divmod(np.asarray(block_ids, dtype=np.int64), block_cols)
+    offsets = np.arange(BLOCK_PIXELS)
+    ys = block_y[:, None] * BLOCK_SIZE + offsets[None, :] // BLOCK_SIZE
+    xs = block_x[:, None] * BLOCK_SIZE + offsets[None, :] % BLOCK_SIZE
+    mask = (ys < height) & (xs < width)
+    indices = np.where(mask, ys * width + xs, 0)
+    return indices, mask
+
+
+def image_to_blocks(rgb: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Reshape an ``(H, W, 3)`` image into ``(num_blocks, 64, 3)`` blocks plus a pixel mask.
+
+    Blocks are numbered row-major like ``build_block_index`` and pixels
+    inside a block keep their raster order; edge blocks are zero padded and masked out.
+    """
+    height, width, channels = rgb.shape
+    block_rows, block_cols = block_grid(height, width)
+    pad_h = block_rows * BLOCK_SIZE - height
+    pad_w = block_cols * BLOCK_SIZE - width
+    padded = np.pad(rgb, ((0, pad_h), (0, pad_w), (0, 0))) if pad_h or pad_w else rgb
+    blocks = (
+        padded.reshape(block_rows, BLOCK_SIZE, block_cols, BLOCK_SIZE, channels)
+        .swapaxes(1, 2)
+        .reshape(block_rows * block_cols, BLOCK_PIXELS, channels)
+    )
+    valid = np.zeros((block_rows * BLOCK_SIZE, block_cols * BLOCK_SIZE), dtype=bool)
+    valid[:height, :width] = True
+    mask = (
+        valid.reshape(block_rows, BLOCK_SIZE, block_cols, BLOCK_SIZE)
+        .swapaxes(1, 2)
+        .reshape(block_rows * block_cols, BLOCK_PIXELS)
+    )
+    return blocks, mask
+
+
+def _block_histograms(blocks: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    num_blocks = blocks.shape[0]
+    bins = _HIST_BIN_LUT[blocks] + (np.arange(num_blocks) * HIST_BINS)[:, None, None]
+    counts = np.bincount(bins[mask].reshape(-1), minlength=num_blocks * HIST_BINS)
+    return counts.reshape(num_blocks, HIST_BINS)
+
+
+def _block_variances(blocks: np.ndarray, weights: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    values = blocks.astype(np.int64) * weights
+    total = values.sum(axis=(1, 2))
+    squares = (values * values).sum(axis=(1, 2))
+    # Exact integer numerator, single rounding on the final division.
+    safe_counts = np.maximum(counts, 1)
+    return (safe_counts * squares - total * total) / (safe_counts.astype(np.float64) ** 2)
+
+
+def block_safety_batch(original_blocks: np.ndarray, stego_blocks: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Vectorised ``block_safety_checker`` over ``(num_blocks, 64, 3)`` block stacks.
+
+    ``mask`` marks the real pixels of each block (``(num_blocks, 64)``); the returned
+    boolean vector matches the scalar checker's decision for every block.
+    """
+    safe = np.empty(original_blocks.shape[0], dtype=bool)
+    for start in range(0, original_blocks.shape[0], _BATCH_CHUNK):
+        stop = start + _BATCH_CHUNK
+        safe[start:stop] = _block_safety_chunk(original_blocks[start:stop], stego_blocks[start:stop], mask[start:stop])
+    return safe
+
+
+def _block_safety_chunk(original_blocks: np.ndarray, stego_blocks: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    weights = mask[:, :, None].astype(np.int64)
+    counts = mask.sum(axis=1) * original_blocks.shape[2]
+    safe_counts = np.maximum(counts, 1)
+
+    diff = stego_blocks.astype(np.int16) - original_blocks.astype(np.int16)
+    squared = (diff ** 2).astype(np.int64) * weights
+    mse = squared.sum(axis=(1, 2)) / safe_counts
+
+    orig_hist = _block_histograms(original_blocks, mask)
+    stego_hist = _block_histograms(stego_blocks, mask)
+    drift = np.abs(orig_hist - stego_hist).sum(axis=1) / safe_counts
+
+    var_ratio = _block_variances(stego_blocks, weights, counts) / (
+        _block_variances(original_blocks, weights, counts) + 1e-6
+    )
+    safe = (mse <= 4.0) & (drift <= 0.25) & (var_ratio >= 0.75) & (var_ratio <= 1.25)
+
+    near_tie = (np.abs(var_ratio - 0.75) < _VAR_RATIO_TIE) | (np.abs(var_ratio - 1.25) < _VAR_RATIO_TIE)
+    for block_id in np.flatnonzero(near_tie & (mse <= 4.0) & (drift <= 0.25)):
+        pixels = mask[block_id]
+        safe[block_id] = block_safety_checker(original_blocks[block_id][pixels], stego_blocks[block_id][pixels])
+    safe[counts == 0] = True
+    return safe
+
+
+def stable_block_mask(cleared_rgb: np.ndarray) -> np.ndarray:
+    """Blocks of an LSB-cleared image that pass drift control for any LSB content.
+
+    The result only depends on the upper seven bit planes, so embedder and extractor
+    derive the same mask from cover and stego.
+    """
+    blocks, mask = image_to_blocks(cleared_rgb)
+    stable = np.empty(blocks.shape[0], dtype=bool)
+    for start in range(0, blocks.shape[0], _BATCH_CHUNK):
+        stop = start + _BATCH_CHUNK
+        chunk_mask = mask[start:stop]
+        weights = chunk_mask[:, :, None].astype(np.int64)
+        counts = chunk_mask.sum(axis=1) * blocks.shape[2]
+        variances = _block_variances(blocks[start:stop], weights, counts)
+        stable[start:stop] = variances >= STABLE_BLOCK_VARIANCE
+    return stable
+
+
+def pixel_block_mask(block_mask: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Flat per-pixel view of a per-block boolean mask."""
+    block_rows, block_cols = block_grid(height, width)
+    grid = block_mask.reshape(block_rows, block_cols)
+    rows = np.repeat(grid, BLOCK_SIZE, axis=0)[:height]
+    return np.repeat(rows, BLOCK_SIZE, axis=1)[:, :width].reshape(-1)
+
+
+def block_ids_for(flat_indices: np.ndarray, width: int) -> np.ndarray:
+    block_cols = (width + BLOCK_SIZE - 1) // BLOCK_SIZE
+    ys, xs = np.divmod(flat_indices, width)
+    return (ys // BLOCK_SIZE) * block_cols + xs // BLOCK_SIZE
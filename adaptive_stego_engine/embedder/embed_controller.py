@@ -1,101 +1,276 @@
 """High level embedding controller orchestrating the adaptive pipeline."""
 from __future__ import annotations
 
-import os
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from dataclasses import dataclass, fields
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 
-from ..analyzer.region_classifier import compute_capacity_map
-from ..analyzer.texture_map import compute_texture_maps
-from ..util import bitstream, header
-from ..util.asym_crypto import fingerprint_public_key, load_public_key_pem, rsa_encrypt_key
-from ..util.crypto import PBKDF2_SALT_LEN, aes_gcm_encrypt, derive_key_pbkdf2
 from ..util.exceptions import StegoEngineError
-from ..util.image_io import load_png
-from ..util.metrics import compute_psnr, compute_ssim, histogram_drift
-from . import capacity as capacity_module
-from .embedding import embed_bits_low_level
-from .noise_predictor import adjust_capacity_for_pixel
-from .pixel_order import build_pixel_order
-from .drift_control import BLOCK_SIZE, block_safety_checker
+from ..util.image_io import PngWriteProfile, load_png, png_dimensions, save_png
+from ..util.jobs import CancellationToken, Job, JobProgress, JobSteps
+from ..util.layout import StreamLayout
+from ..util.locked_cache import LockedCache, file_identity
+from ..util.lsb_delta import save_delta
+from ..util.memory_plan import plan_embed
+from ..util.scheduler import BatchReport, BatchTask, CostModel, failed_task, run_batch
+from .autofit import CAPACITY_PROFILES, AutoFitError, AutoFitResult, FitAttempt, iter_fit_cover, validate_profiles
+from .cover_session import CoverSession, EmbedCredentials, EmbedMetrics, build_stream, default_layout, stream_length
+from .sharding import ShardResult, embed_sharded
 
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
 
-@dataclass
-class EmbedMetrics:
-    psnr: float
-    ssim: float
-    hist_drift: float
+
+@dataclass(frozen=True)
+class EmbedSpec:
+    """One job of ``EmbedController.embed_batch``: the arguments of ``embed_to_files``.
+
+    ``layout=None`` opts in to a legacy stream, as for ``embed_from_text``.
+    """
+
+    cover_path: str
+    secret_text: str
+    mode: str
+    png_path: Optional[str] = None
+    delta_path: Optional[str] = None
+    password: Optional[str] = None
+    aes_enabled: bool = False
+    public_key_path: Optional[str] = None
+    layout: Optional[StreamLayout] = StreamLayout()
+    public_key_paths: Tuple[str, ...] = ()
+    png_profile: PngWriteProfile | str = PngWriteProfile.BALANCED
 
 
 class EmbedController:
-    def __init__(self) -> None:
-        pass
-
-    def _build_block_maps(self, height: int, width: int) -> Tuple[np.ndarray, np.ndarray, dict[int, List[int]]]:
-        block_rows = (height + BLOCK_SIZE - 1) // BLOCK_SIZE
-        block_cols = (width + BLOCK_SIZE - 1) // BLOCK_SIZE
-        num_blocks = block_rows * block_cols
-        block_map = np.zeros(height * width, dtype=np.int32)
-        block_pixel_positions: dict[int, List[int]] = {i: [] for i in range(num_blocks)}
-        for idx in range(height * width):
-            y = idx // width
-            x = idx % width
-            block_y = y // BLOCK_SIZE
-            block_x = x // BLOCK_SIZE
-            block_id = block_y * block_cols + block_x
-            block_map[idx] = block_id
-            block_pixel_positions[block_id].append(idx)
-        block_done = np.zeros(num_blocks, dtype=bool)
-        return block_map, block_done, block_pixel_positions
-
-    def _build_symmetric_stream(
+    """Embedding entry points; one instance may serve any number of threads at once.
+
+    Calls keep their state to themselves, and what they share is behind locks: parsed
+    keys (``util.asym_crypto.KEY_CACHE``) and, when given, the ``sessions`` cache.
+    """
+
+    def __init__(
+        self,
+        max_memory_mb: Optional[int] = None,
+        sessions: Optional[LockedCache[CoverSession]] = None,
+    ) -> None:
+        """``max_memory_mb`` (default: ``STEGO_MAX_MEMORY_MB``, else unlimited) bounds each embed.
+
+        ``sessions`` keeps analysed covers by file identity, so repeated and concurrent
+        embeds into one cover decode and analyse it once; each cached session stays
+        resident, which the per-embed memory budget does not account for.
+        """
+        self.max_memory_mb = max_memory_mb
+        self.sessions = sessions
+
+    def _cover_session(self, cover_path: str, band_rows: Optional[int]) -> CoverSession:
+        def create() -> CoverSession:
+            return CoverSession(load_png(cover_path), cache_statistics=False, band_rows=band_rows)
+
+        if self.sessions is None:
+            return create()
+        return self.sessions.get_or_create((file_identity(cover_path), band_rows), create)
+
+    def cached_maps(self, cover_path: str) -> Dict[str, np.ndarray]:
+        """Analysis maps of ``cover_path`` from a cached session (see ``CoverSession.analysis_maps``).
+
+        Never decodes or analyses; empty without a ``sessions`` cache or a cached analysis.
+        """
+        if self.sessions is None:
+            return {}
+        identity = file_identity(cover_path)
+        for key, session in reversed(self.sessions.items()):
+            maps = session.analysis_maps() if key[0] == identity else {}
+            if maps:
+                return maps
+        return {}
+
+    def _iter_embed(
+        self,
+        cover_path: str,
+        secret_text: str,
+        mode: str,
+        credentials: EmbedCredentials,
+        layout: Optional[StreamLayout],
+    ) -> JobSteps[Tuple[np.ndarray, np.ndarray, EmbedMetrics]]:
+        stream_bytes, seed, key_slots = build_stream(secret_text, mode, credentials)
+        layout = default_layout(mode, layout)
+        plan = plan_embed(*png_dimensions(cover_path), len(stream_bytes), layout, self.max_memory_mb)
+        yield JobProgress(2, f"Loading cover image ({plan.describe()})…")
+        session = self._cover_session(cover_path, plan.band_rows)
+        stego, metrics = yield from session.iter_embed_stream(stream_bytes, seed, plan.apply_layout(layout), key_slots)
+        return session.rgb, stego, metrics
+
+    def iter_embed_from_text(
         self,
-        payload_text: str,
-        password: str,
-        aes_enabled: bool,
-    ) -> Tuple[bytes, str]:
-        if not password:
-            raise StegoEngineError("Password is required for symmetric mode")
-        payload_bytes = payload_text.encode("utf-8")
-        plain_header = header.build_plain_header(len(payload_bytes))
-        salt = os.urandom(PBKDF2_SALT_LEN)
-        key = derive_key_pbkdf2(password, salt)
-        hdr_nonce, hdr_ct = header.encrypt_header(plain_header, key)
-        if len(hdr_ct) != len(plain_header) + 16:
-            raise StegoEngineError("Header encryption failed")
-        payload_encrypted = False
-        payload_nonce: Optional[bytes] = None
-        payload_segment = payload_bytes
-        if aes_enabled:
-            payload_encrypted = True
-            payload_nonce, payload_segment = aes_gcm_encrypt(key, payload_bytes)
-        stream = bitstream.pack_symmetric_stream(
-            salt=salt,
-            header_nonce=hdr_nonce,
-            header_ct=hdr_ct,
-            payload_bytes=payload_segment,
-            payload_encrypted=payload_encrypted,
-            payload_nonce=payload_nonce,
+        cover_path: str,
+        secret_text: str,
+        mode: str,
+        password: Optional[str] = None,
+        aes_enabled: bool = False,
+        public_key_path: Optional[str] = None,
+        layout: Optional[StreamLayout] = StreamLayout(),
+        public_key_paths: Sequence[str] = (),
+    ) -> JobSteps[Tuple[np.ndarray, EmbedMetrics]]:
+        """Embed ``secret_text`` into the cover.
+
+        Streams are new-format (``layout`` defaults to ``StreamLayout()``), whose descriptor
+        lets the extractor find the segment count and stream length. ``layout=None`` opts
+        in to a legacy stream, which cannot be extracted again. ``mode="multi"`` wraps one
+        session key for every key in ``public_key_paths`` and always uses the new format.
+        The execution strategy is planned against the memory budget from the image header
+        before the cover is decoded.
+        """
+        credentials = EmbedCredentials(
+            password=password,
+            aes_enabled=aes_enabled,
+            public_key_path=public_key_path,
+            public_key_paths=tuple(public_key_paths),
         )
-        seed = f"sym:{password}"
-        return stream, seed
-
-    def _build_public_stream(self, payload_text: str, public_key_path: str) -> Tuple[bytes, str]:
-        if not public_key_path:
-            raise StegoEngineError("Public key is required for asymmetric mode")
-        payload_bytes = payload_text.encode("utf-8")
-        plain_header = header.build_plain_header(len(payload_bytes))
-        public_key = load_public_key_pem(public_key_path)
-        fingerprint = fingerprint_public_key(public_key)
-        session_key = os.urandom(32)
-        plaintext = plain_header + payload_bytes
-        aes_nonce, aes_cipher = aes_gcm_encrypt(session_key, plaintext)
-        ek = rsa_encrypt_key(public_key, session_key)
-        stream = bitstream.pack_public_stream(ek=ek, aes_nonce=aes_nonce, aes_ct=aes_cipher)
-        seed = f"asym:{fingerprint}"
-        return stream, seed
+        _cover, stego, metrics = yield from self._iter_embed(cover_path, secret_text, mode, credentials, layout)
+        yield JobProgress(100, "Done.")
+        return stego, metrics
+
+    def iter_embed_to_files(
+        self,
+        cover_path: str,
+        secret_text: str,
+        mode: str,
+        png_path: Optional[str] = None,
+        delta_path: Optional[str] = None,
+        password: Optional[str] = None,
+        aes_enabled: bool = False,
+        public_key_path: Optional[str] = None,
+        layout: Optional[StreamLayout] = StreamLayout(),
+        public_key_paths: Sequence[str] = (),
+        png_profile: PngWriteProfile | str = PngWriteProfile.BALANCED,
+    ) -> JobSteps[EmbedMetrics]:
+        """Embed like ``iter_embed_from_text`` and write the stego PNG, its LSB delta, or both.
+
+        The delta (``util.lsb_delta``) only lists the flipped LSBs against the cover, so
+        when the receiving side holds the cover it replaces the PNG and its encode.
+        """
+        if png_path is None and delta_path is None:
+            raise StegoEngineError("Choose a PNG path, a delta path or both")
+        credentials = EmbedCredentials(
+            password=password,
+            aes_enabled=aes_enabled,
+            public_key_path=public_key_path,
+            public_key_paths=tuple(public_key_paths),
+        )
+        cover, stego, metrics = yield from self._iter_embed(cover_path, secret_text, mode, credentials, layout)
+        if delta_path is not None:
+            yield JobProgress(90, "Writing LSB delta…")
+            save_delta(delta_path, cover, stego)
+        if png_path is not None:
+            yield JobProgress(95, "Writing stego PNG…")
+            save_png(png_path, stego, png_profile)
+        yield JobProgress(100, "Done.")
+        return metrics
+
+    def iter_embed_auto_fit(
+        self,
+        cover_paths: Sequence[str],
+        secret_text: str,
+        mode: str,
+        password: Optional[str] = None,
+        aes_enabled: bool = False,
+        public_key_path: Optional[str] = None,
+        layout: Optional[StreamLayout] = StreamLayout(),
+        public_key_paths: Sequence[str] = (),
+        profiles: Sequence[int] = CAPACITY_PROFILES,
+    ) -> JobSteps[AutoFitResult]:
+        """Embed into the first of ``cover_paths`` and capacity profile that passes.
+
+        Opt-in alternative to retrying ``embed_from_text`` by hand after a quality or
+        capacity failure (see ``embedder.autofit``): each cover is decoded and analysed
+        once for all its attempts, and the result lists every attempt with its time.
+        Streams are always new-format, even with ``layout=None``. Raises
+        ``AutoFitError`` with the attempts when nothing fits.
+        """
+        if not cover_paths:
+            raise StegoEngineError("At least one cover is required")
+        profiles = validate_profiles(profiles)
+        credentials = EmbedCredentials(
+            password=password,
+            aes_enabled=aes_enabled,
+            public_key_path=public_key_path,
+            public_key_paths=tuple(public_key_paths),
+        )
+        stream_bytes, seed, key_slots = build_stream(secret_text, mode, credentials)
+        layout = layout or StreamLayout()
+        attempts: List[FitAttempt] = []
+        span = 98 / len(cover_paths)
+        for index, cover_path in enumerate(cover_paths):
+            plan = plan_embed(*png_dimensions(cover_path), len(stream_bytes), layout, self.max_memory_mb)
+            start = 2 + span * index
+            yield JobProgress(int(start), f"Loading cover {index + 1}/{len(cover_paths)} ({plan.describe()})…")
+            session = self._cover_session(cover_path, plan.band_rows)
+            result = yield from iter_fit_cover(
+                session,
+                cover_path,
+                stream_bytes,
+                seed,
+                plan.apply_layout(layout),
+                profiles,
+                attempts,
+                (start, start + span),
+                key_slots,
+            )
+            if result is not None:
+                yield JobProgress(100, "Done.")
+                return result
+        raise AutoFitError(attempts)
+
+    def embed_auto_fit(
+        self,
+        cover_paths: Sequence[str],
+        secret_text: str,
+        mode: str,
+        password: Optional[str] = None,
+        aes_enabled: bool = False,
+        public_key_path: Optional[str] = None,
+        layout: Optional[StreamLayout] = StreamLayout(),
+        public_key_paths: Sequence[str] = (),
+        profiles: Sequence[int] = CAPACITY_PROFILES,
+        token: Optional[CancellationToken] = None,
+    ) -> AutoFitResult:
+        steps = self.iter_embed_auto_fit(
+            cover_paths,
+            secret_text,
+            mode,
+            password=password,
+            aes_enabled=aes_enabled,
+            public_key_path=public_key_path,
+            layout=layout,
+            public_key_paths=public_key_paths,
+            profiles=profiles,
+        )
+        return Job(steps, token).run()
+
+    def embed_job(
+        self,
+        cover_path: str,
+        secret_text: str,
+        mode: str,
+        password: Optional[str] = None,
+        aes_enabled: bool = False,
+        public_key_path: Optional[str] = None,
+        layout: Optional[StreamLayout] = StreamLayout(),
+        token: Optional[CancellationToken] = None,
+        public_key_paths: Sequence[str] = (),
+    ) -> Job[Tuple[np.ndarray, EmbedMetrics]]:
+        steps = self.iter_embed_from_text(
+            cover_path,
+            secret_text,
+            mode,
+            password=password,
+            aes_enabled=aes_enabled,
+            public_key_path=public_key_path,
+            layout=layout,
+            public_key_paths=public_key_paths,
+        )
+        return Job(steps, token)
 
     def embed_from_text(
         self,
@@ -106,47 +281,115 @@ class EmbedController:
         aes_enabled: bool = False,
         public_key_path: Optional[str] = None,
         show_progress: bool = False,
+        layout: Optional[StreamLayout] = StreamLayout(),
+        public_key_paths: Sequence[str] = (),
     ) -> Tuple[np.ndarray, EmbedMetrics]:
-        rgb = load_png(cover_path)
-        gray, gradient_map, entropy_map, surface_map = compute_texture_maps(rgb)
-        base_capacity = compute_capacity_map(surface_map)
-        refined_capacity = capacity_module.refine_capacity_map(base_capacity, surface_map)
-        capacity_flat = refined_capacity.reshape(-1)
-
-        if mode == "password":
-            stream_bytes, seed = self._build_symmetric_stream(secret_text, password or "", aes_enabled)
-        elif mode == "public":
-            stream_bytes, seed = self._build_public_stream(secret_text, public_key_path or "")
-        else:
-            raise StegoEngineError("Unsupported mode selected")
-
-        bits = bitstream.bytes_to_bits(stream_bytes)
-        if len(bits) == 0:
-            raise StegoEngineError("Payload is empty")
-
-        order = build_pixel_order(entropy_map, seed)
-        height, width, _ = rgb.shape
-        block_map, block_done, block_pixel_positions = self._build_block_maps(height, width)
-
-        stego = embed_bits_low_level(
-            rgb,
-            order,
-            capacity_flat,
-            bits,
-            block_map,
-            block_done,
-            block_pixel_positions,
-            gray,
-            adjust_capacity_for_pixel,
-            block_safety_checker,
+        job = self.embed_job(
+            cover_path,
+            secret_text,
+            mode,
+            password=password,
+            aes_enabled=aes_enabled,
+            public_key_path=public_key_path,
+            layout=layout,
+            public_key_paths=public_key_paths,
+        )
+        return job.run()
+
+    def embed_to_files(
+        self,
+        cover_path: str,
+        secret_text: str,
+        mode: str,
+        png_path: Optional[str] = None,
+        delta_path: Optional[str] = None,
+        password: Optional[str] = None,
+        aes_enabled: bool = False,
+        public_key_path: Optional[str] = None,
+        layout: Optional[StreamLayout] = StreamLayout(),
+        public_key_paths: Sequence[str] = (),
+        png_profile: PngWriteProfile | str = PngWriteProfile.BALANCED,
+        token: Optional[CancellationToken] = None,
+    ) -> EmbedMetrics:
+        steps = self.iter_embed_to_files(
+            cover_path,
+            secret_text,
+            mode,
+            png_path=png_path,
+            delta_path=delta_path,
+            password=password,
+            aes_enabled=aes_enabled,
+            public_key_path=public_key_path,
+            layout=layout,
+            public_key_paths=public_key_paths,
+            png_profile=png_profile,
         )
+        return Job(steps, token).run()
 
-        psnr_value = compute_psnr(rgb, stego)
-        ssim_value = compute_ssim(rgb, stego)
-        hist_value = histogram_drift(rgb, stego)
-        if psnr_value < 48.0 or ssim_value < 0.985 or hist_value > 0.02:
-            raise StegoEngineError(
-                f"Quality thresholds not met: PSNR={psnr_value:.2f}, SSIM={ssim_value:.4f}, drift={hist_value:.4f}"
+    def embed_sharded(
+        self,
+        cover_paths: Sequence[str],
+        secret_text: str,
+        mode: str,
+        password: Optional[str] = None,
+        public_key_path: Optional[str] = None,
+        layout: Optional[StreamLayout] = StreamLayout(),
+        max_workers: Optional[int] = None,
+        public_key_paths: Sequence[str] = (),
+    ) -> List[ShardResult]:
+        """Split ``secret_text`` across several covers, loading and embedding them concurrently.
+
+        Shards are placed in proportion to each cover's new-format capacity; the result
+        holds ``(stego, metrics)`` per cover, or ``None`` where no shard was needed.
+        """
+        credentials = EmbedCredentials(
+            password=password,
+            public_key_path=public_key_path,
+            public_key_paths=tuple(public_key_paths),
+        )
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max_workers or max(1, len(cover_paths))) as pool:
+            sessions = [CoverSession(rgb, cache_statistics=False) for rgb in pool.map(load_png, cover_paths)]
+        return embed_sharded(sessions, secret_text.encode("utf-8"), mode, credentials, layout, max_workers)
+
+    def embed_spec(self, spec: EmbedSpec) -> EmbedMetrics:
+        return self.embed_to_files(**{item.name: getattr(spec, item.name) for item in fields(spec)})
+
+    def batch_task(self, spec: EmbedSpec) -> BatchTask:
+        """Cost inputs and memory estimate of ``spec`` from its PNG header and stream size."""
+        layout = default_layout(spec.mode, spec.layout)
+        kind = "embed_tiled" if layout is not None and layout.tiles else "embed"
+        try:
+            height, width = png_dimensions(spec.cover_path)
+            credentials = EmbedCredentials(
+                password=spec.password,
+                aes_enabled=spec.aes_enabled,
+                public_key_path=spec.public_key_path,
+                public_key_paths=tuple(spec.public_key_paths),
             )
-        metrics = EmbedMetrics(psnr=psnr_value, ssim=ssim_value, hist_drift=hist_value)
-        return stego, metrics
+            stream_len = stream_length(spec.secret_text, spec.mode, credentials)
+            plan = plan_embed(height, width, stream_len, layout, self.max_memory_mb)
+        except StegoEngineError as exc:
+            return failed_task(spec.cover_path, kind, exc)
+        return BatchTask(spec.cover_path, kind, height * width, stream_len * 8, plan.peak, self.embed_spec, (spec,))
+
+    def embed_batch(
+        self,
+        specs: Sequence[EmbedSpec],
+        max_workers: Optional[int] = None,
+        batch_memory_mb: Optional[int] = None,
+        cost_model: Optional[CostModel] = None,
+        processes: bool = True,
+        executor: Optional[Executor] = None,
+    ) -> BatchReport:
+        """Run many ``embed_to_files`` jobs through ``util.scheduler.run_batch``.
+
+        Jobs start longest first by predicted cost and only when their estimated peak
+        memory fits in ``batch_memory_mb`` beside the running ones; each job still plans
+        against ``max_memory_mb``. ``results`` holds one ``EmbedMetrics`` per spec.
+        ``processes=False`` runs the jobs on threads of this controller, sharing its
+        caches without spawning or pickling; ``executor`` reuses a caller's pool instead.
+        """
+        tasks = [self.batch_task(spec) for spec in specs]
+        return run_batch(tasks, cost_model, max_workers, batch_memory_mb, processes, executor)
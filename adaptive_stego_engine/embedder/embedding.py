@@ -1,16 +1,19 @@
 """Low-level embedding primitives."""
 from __future__ import annotations
 
-from typing import Dict, List
+from dataclasses import dataclass
+from typing import Dict, Generator, List, Sequence
 
 import numpy as np
 
-from ..util.exceptions import StegoEngineError
+from ..util.exceptions import CapacityError
+from ..util.jobs import LOOP_PROGRESS_INTERVAL, drain
+from .drift_control import block_pixel_indices, block_safety_batch
+from .noise_predictor import adjust_capacity_batch
+from .slots import CHANNEL_ORDER, iter_slot_chunks, write_bits
 
-CHANNEL_ORDER = (2, 1, 0)  # B, G, R
 
-
-def embed_bits_low_level(
+def iter_embed_bits_low_level(
     rgb: np.ndarray,
     order: np.ndarray,
     capacity_flat: np.ndarray,
@@ -21,7 +24,8 @@ def embed_bits_low_level(
     gray_for_coords: np.ndarray,
     adjust_capacity_fn,
     block_safety_checker,
-) -> np.ndarray:
+) -> Generator[tuple[int, int], None, np.ndarray]:
+    """Embed ``bits`` along ``order``, yielding ``(pixels visited, total pixels)`` periodically."""
     stego = rgb.copy()
     flat = stego.reshape(-1, 3)
     orig_flat = rgb.reshape(-1, 3)
@@ -30,10 +34,13 @@ def embed_bits_low_level(
     total_bits = len(bits)
     block_visit_counts = np.zeros_like(block_done, dtype=np.int32)
     block_finalized = np.zeros_like(block_done, dtype=bool)
+    total_pixels = len(order)
 
-    for pixel_index in order:
+    for visited, pixel_index in enumerate(order):
         if bit_idx >= total_bits:
             break
+        if visited % LOOP_PROGRESS_INTERVAL == 0:
+            yield visited, total_pixels
         block_id = int(block_map[pixel_index])
         if block_done[block_id]:
             continue
@@ -65,8 +72,175 @@ def embed_bits_low_level(
             block_finalized[block_id] = True
 
     if bit_idx < total_bits:
-        raise StegoEngineError(
+        raise CapacityError(
             f"Insufficient safe capacity: embedded {bit_idx} / {total_bits} bits"
         )
 
     return flat.reshape(rgb.shape)
+
+
+def embed_bits_low_level(
+    rgb: np.ndarray,
+    order: np.ndarray,
+    capacity_flat: np.ndarray,
+    bits: List[int],
+    block_map: np.ndarray,
+    block_done: np.ndarray,
+    block_pixel_positions: Dict[int, List[int]],
+    gray_for_coords: np.ndarray,
+    adjust_capacity_fn,
+    block_safety_checker,
+) -> np.ndarray:
+    return drain(
+        iter_embed_bits_low_level(
+            rgb,
+            order,
+            capacity_flat,
+            bits,
+            block_map,
+            block_done,
+            block_pixel_positions,
+            gray_for_coords,
+            adjust_capacity_fn,
+            block_safety_checker,
+        )
+    )
+
+
+@dataclass
+class EmbedPlan:
+    """Final LSB writes of an embed plus what the traversal consumed.
+
+    ``pixels``/``channels``/``bits`` list every write that survives drift control;
+    bits planned into rolled-back blocks are counted in ``bits_lost``.
+    """
+
+    pixels: np.ndarray
+    channels: np.ndarray
+    bits: np.ndarray
+    bits_requested: int
+    bits_lost: int
+    pixels_visited: int
+    blocks_checked: int
+    blocks_rolled_back: int
+
+    @property
+    def bits_written(self) -> int:
+        return int(self.pixels.size)
+
+
+def iter_plan_embedding(
+    rgb: np.ndarray,
+    order: np.ndarray,
+    capacity_flat: np.ndarray,
+    bits: Sequence[int],
+    block_map: np.ndarray,
+    block_sizes: np.ndarray,
+    gray_for_coords: np.ndarray,
+) -> Generator[tuple[int, int], None, EmbedPlan]:
+    """Simulate ``embed_bits_low_level`` on the LSB plane without touching ``rgb``.
+
+    Pixels are consumed in vectorised chunks of ``order``. A block is checked once its
+    last pixel is visited with non-zero adjusted capacity, exactly like the sequential
+    loop, and the writes of unsafe blocks are dropped instead of rolled back.
+    """
+    bit_array = np.asarray(bits, dtype=np.uint8)
+    total_bits = int(bit_array.size)
+    total_pixels = len(order)
+    visit_counts = np.zeros(block_sizes.size, dtype=np.int32)
+    checked_blocks: List[np.ndarray] = []
+    write_pixels: List[np.ndarray] = []
+    write_channels: List[np.ndarray] = []
+    bit_idx = 0
+    visited = 0
+
+    def capacity(chunk: np.ndarray) -> np.ndarray:
+        caps = capacity_flat[chunk].astype(np.int64)
+        positive = caps > 0
+        caps[positive] = adjust_capacity_batch(gray_for_coords, chunk[positive], caps[positive])
+        return caps
+
+    for part in iter_slot_chunks(order, capacity, total_bits):
+        yield visited, total_pixels
+        reversed_blocks = block_map[part.pixels][::-1]
+        blocks, first_in_reversed, visits = np.unique(reversed_blocks, return_index=True, return_counts=True)
+        before = visit_counts[blocks]
+        visit_counts[blocks] = before + visits
+        completed = (before < block_sizes[blocks]) & (before + visits >= block_sizes[blocks])
+        # The completing visit is the block's last occurrence in this chunk.
+        completing = part.pixels.size - 1 - first_in_reversed[completed]
+        checked_blocks.append(blocks[completed][part.caps[completing] > 0])
+
+        write_pixels.append(part.slot_pixels)
+        write_channels.append(part.slot_channels)
+        bit_idx += part.slot_pixels.size
+        visited = part.visited
+
+    if bit_idx < total_bits:
+        raise CapacityError(
+            f"Insufficient safe capacity: embedded {bit_idx} / {total_bits} bits"
+        )
+
+    pixels = np.concatenate(write_pixels) if write_pixels else np.zeros(0, dtype=np.int64)
+    channels = np.concatenate(write_channels) if write_channels else np.zeros(0, dtype=np.uint8)
+    checked = np.concatenate(checked_blocks) if checked_blocks else np.zeros(0, dtype=np.int64)
+    unsafe = _unsafe_blocks(rgb, pixels, channels, bit_array, block_map, block_sizes.size, checked)
+    keep = ~np.isin(block_map[pixels], unsafe)
+    yield total_pixels, total_pixels
+    return EmbedPlan(
+        pixels=pixels[keep],
+        channels=channels[keep],
+        bits=bit_array[keep],
+        bits_requested=total_bits,
+        bits_lost=int(np.count_nonzero(~keep)),
+        pixels_visited=visited,
+        blocks_checked=int(checked.size),
+        blocks_rolled_back=int(unsafe.size),
+    )
+
+
+def _unsafe_blocks(
+    rgb: np.ndarray,
+    pixels: np.ndarray,
+    channels: np.ndarray,
+    bits: np.ndarray,
+    block_map: np.ndarray,
+    num_blocks: int,
+    checked: np.ndarray,
+) -> np.ndarray:
+    if checked.size == 0:
+        return checked
+    height, width = rgb.shape[:2]
+    flat = rgb.reshape(-1, 3)
+    indices, mask = block_pixel_indices(checked, height, width)
+    original_blocks = flat[indices]
+    stego_blocks = original_blocks.copy()
+    row_of_block = np.full(num_blocks, -1, dtype=np.int64)
+    row_of_block[checked] = np.arange(checked.size)
+    rows = row_of_block[block_map[pixels]]
+    inside = rows >= 0
+    ys, xs = np.divmod(pixels[inside], width)
+    slots = (ys % 8) * 8 + xs % 8
+    target = stego_blocks[rows[inside], slots, channels[inside]]
+    stego_blocks[rows[inside], slots, channels[inside]] = (target & np.uint8(0xFE)) | bits[inside]
+    safe = block_safety_batch(original_blocks, stego_blocks, mask)
+    return checked[~safe]
+
+
+def plan_embedding(
+    rgb: np.ndarray,
+    order: np.ndarray,
+    capacity_flat: np.ndarray,
+    bits: Sequence[int],
+    block_map: np.ndarray,
+    block_sizes: np.ndarray,
+    gray_for_coords: np.ndarray,
+) -> EmbedPlan:
+    return drain(iter_plan_embedding(rgb, order, capacity_flat, bits, block_map, block_sizes, gray_for_coords))
+
+
+def commit_embedding(rgb: np.ndarray, plan: EmbedPlan) -> np.ndarray:
+    """Apply a plan's writes to a copy of ``rgb`` in a single scatter."""
+    stego = rgb.copy()
+    write_bits(stego.reshape(-1, 3), plan.pixels, plan.channels, plan.bits)
+    return stego
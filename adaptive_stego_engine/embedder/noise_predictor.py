@@ -5,6 +5,9 @@ import numpy as np
 
 
 NEIGHBOR_KERNEL = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+# A deviation from the neighbour mean below the k-th threshold (counting from 0) costs k
+# bits of capacity, keeping at least one once any is lost; above the last it costs all.
+DEVIATION_THRESHOLDS = (5.0, 12.0, 20.0)
 
 
 def adjust_capacity_for_pixel(gray: np.ndarray, y: int, x: int, requested_cap: int) -> int:
@@ -18,10 +21,19 @@ def adjust_capacity_for_pixel(gray: np.ndarray, y: int, x: int, requested_cap: i
         return min(1, requested_cap)
     mean_neighbor = float(np.mean(neighbors))
     deviation = abs(float(gray[y, x]) - mean_neighbor)
-    if deviation < 5:
-        return requested_cap
-    if deviation < 12:
-        return max(1, requested_cap - 1)
-    if deviation < 20:
-        return max(1, requested_cap - 2)
+    for step, threshold in enumerate(DEVIATION_THRESHOLDS):
+        if deviation < threshold:
+            return requested_cap if step == 0 else max(1, requested_cap - step)
     return 0
+
+
+# Deviations this close to a threshold are recomputed with the scalar predictor so
+# vectorised and compiled kernels never depend on float32 summation order.
+DEVIATION_TIE = 1e-3
+
+
+def adjust_capacity_batch(gray: np.ndarray, flat_indices: np.ndarray, requested_caps: np.ndarray) -> np.ndarray:
+    """``adjust_capacity_for_pixel`` over flat pixel indices, on the active kernel backend."""
+    from ..kernels import active_backend
+
+    return active_backend().adjust_capacity(gray, flat_indices, requested_caps)
@@ -1,13 +1,70 @@
-"""Pixel ordering based on entropy + seeded shuffle."""
+"""Pixel ordering based on entropy + seeded shuffle, capacity tiers, or a keyed on-demand permutation."""
 from __future__ import annotations
 
+from typing import Optional, Sequence
+
 import numpy as np
 
 from ..util import prng
+from ..util.exceptions import StegoEngineError
+from ..util.layout import PixelOrdering
+from .capacity import MAX_CAPACITY
 
 
-def build_pixel_order(entropy_map: np.ndarray, seed: str) -> np.ndarray:
-    flat_indices = np.arange(entropy_map.size, dtype=np.int64)
-    sorted_indices = flat_indices[np.argsort(entropy_map.reshape(-1))[::-1]]
-    shuffled = prng.shuffle_indices(sorted_indices, seed)
+def index_dtype(size: int) -> np.dtype:
+    """Narrowest dtype pixel orders use for indices into ``size`` pixels."""
+    return np.dtype(np.uint32) if size <= 1 << 32 else np.dtype(np.int64)
+
+
+def rank_by_entropy(entropy_map: np.ndarray) -> np.ndarray:
+    """Seed-independent half of ``build_pixel_order``; reusable across many seeds."""
+    return np.argsort(entropy_map.reshape(-1))[::-1].astype(index_dtype(entropy_map.size))
+
+
+def shuffle_order(ranked: np.ndarray, seed: str) -> np.ndarray:
+    """Same permutation as ``prng.shuffle_indices(ranked, seed)`` without the Python list round trip."""
+    shuffled = np.array(ranked, dtype=index_dtype(ranked.size))
+    prng.random_state(seed).shuffle(shuffled)
     return shuffled
+
+
+def build_pixel_order(entropy_map: np.ndarray, seed: str) -> np.ndarray:
+    return shuffle_order(rank_by_entropy(entropy_map), seed)
+
+
+def build_tiered_order(capacity_flat: np.ndarray, seed: str) -> np.ndarray:
+    """Pixels grouped by capacity tier from highest to lowest, each tier shuffled."""
+    dtype = index_dtype(capacity_flat.size)
+    tiers = []
+    for tier in range(MAX_CAPACITY, -1, -1):
+        members = np.flatnonzero(capacity_flat == tier).astype(dtype)
+        prng.random_state(f"{seed}|tier{tier}").shuffle(members)
+        tiers.append(members)
+    return np.concatenate(tiers)
+
+
+def uses_capacity(ordering: PixelOrdering) -> bool:
+    """Whether ``layout_pixel_order`` reads ``capacity_flat``; callers pass ``None`` otherwise."""
+    return ordering == PixelOrdering.TIERED
+
+
+def layout_pixel_order(
+    ordering: PixelOrdering,
+    entropy_map: np.ndarray,
+    capacity_flat: Optional[np.ndarray],
+    seed: str,
+) -> Sequence[int]:
+    """Pixel order of a new-format stream.
+
+    ``KEYED`` returns a ``KeyedPermutation``: slices of it are computed on demand, so
+    traversals only pay for the prefix of the order they actually consume. ``TIERED``
+    needs an LSB-invariant ``capacity_flat`` so cover and stego yield the same order;
+    the other orderings ignore it, so no full-image capacity array need be built.
+    """
+    if ordering == PixelOrdering.KEYED:
+        return prng.KeyedPermutation(f"{seed}|order", entropy_map.size)
+    if ordering == PixelOrdering.TIERED:
+        if capacity_flat is None:
+            raise StegoEngineError("Tiered pixel order needs the usable capacity map")
+        return build_tiered_order(capacity_flat, seed)
+    return build_pixel_order(entropy_map, seed)
@@ -0,0 +1,198 @@
+"""Embed into shared covers on a process pool without pickling image arrays.
+
+Covers, their analysis maps and every stego buffer live in shared memory owned by the
+parent (``util.shared_arrays``); jobs carry only segment handles and worker processes
+map the arrays in place.
+"""
+from __future__ import annotations
+
+import dataclasses
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple
+
+import numpy as np
+
+from ..util.exceptions import StegoEngineError
+from ..util.jobs import drain
+from ..util.key_slots import KeySlots
+from ..util.layout import StreamLayout
+from ..util.shared_arrays import SharedArray, SharedArrayPool, export_array
+from .cover_session import (
+    CoverAnalysis,
+    CoverSession,
+    EmbedCredentials,
+    EmbedMetrics,
+    analyse_cover,
+    build_stream,
+    default_layout,
+)
+from .traversal import StableCapacity, analyse_stable_capacity
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+ANALYSIS_FIELDS = tuple(field.name for field in dataclasses.fields(CoverAnalysis))
+# ``reserved`` depends on the seed and is filled in per embed by ``stable_analysis``.
+STABLE_FIELDS = ("capacity_flat", "gray", "entropy_map", "stable_blocks")
+
+
+@dataclass(frozen=True)
+class SharedCover:
+    """Handles of a shared cover and of whichever analyses were computed for it."""
+
+    rgb: SharedArray
+    analysis: Optional[Tuple[SharedArray, ...]] = None
+    stable: Optional[Tuple[SharedArray, ...]] = None
+
+    def handles(self) -> Tuple[SharedArray, ...]:
+        return (self.rgb, *(self.analysis or ()), *(self.stable or ()))
+
+    def _open_session(self, stack: ExitStack, cache_statistics: bool) -> CoverSession:
+        def mapped(handles: Tuple[SharedArray, ...]) -> list:
+            return [stack.enter_context(handle.mapped()) for handle in handles]
+
+        analysis = CoverAnalysis(*mapped(self.analysis)) if self.analysis else None
+        stable = None
+        if self.stable:
+            maps = dict(zip(STABLE_FIELDS, mapped(self.stable)))
+            stable = StableCapacity(reserved=np.zeros(0, dtype=np.int64), **maps)
+        return CoverSession.prepared(mapped((self.rgb,))[0], analysis, stable, cache_statistics)
+
+    @contextmanager
+    def session(self, cache_statistics: bool = False) -> Iterator[CoverSession]:
+        """A ``CoverSession`` over the mapped cover, seeded with the shared analyses.
+
+        The session and any array taken from it must not be used after the block.
+        """
+        with ExitStack() as stack:
+            yield self._open_session(stack, cache_statistics)
+
+
+def _export_analyses(rgb: np.ndarray, legacy: bool, stable: bool) -> Tuple[Optional[tuple], Optional[tuple]]:
+    analysis_handles = stable_handles = None
+    if legacy:
+        analysis = analyse_cover(rgb)
+        analysis_handles = tuple(export_array(getattr(analysis, name)) for name in ANALYSIS_FIELDS)
+    if stable:
+        capacity = analyse_stable_capacity(rgb, np.zeros(0, dtype=np.int64))
+        stable_handles = tuple(export_array(getattr(capacity, name)) for name in STABLE_FIELDS)
+    return analysis_handles, stable_handles
+
+
+def _analyse(rgb_handle: SharedArray, legacy: bool, stable: bool) -> Tuple[Optional[tuple], Optional[tuple]]:
+    # Views are only ever bound inside the helpers, so they are gone before the stack unmaps.
+    with ExitStack() as stack:
+        return _export_analyses(stack.enter_context(rgb_handle.mapped()), legacy, stable)
+
+
+def _embed_into(
+    stack: ExitStack,
+    cover: SharedCover,
+    stego: SharedArray,
+    stream_bytes: bytes,
+    seed: str,
+    layout: Optional[StreamLayout],
+    key_slots: Optional[KeySlots],
+) -> EmbedMetrics:
+    session = stack.enter_context(cover.session())
+    result, metrics = drain(session.iter_embed_stream(stream_bytes, seed, layout, key_slots))
+    stack.enter_context(stego.mapped(writeable=True))[...] = result
+    return metrics
+
+
+def _embed(
+    cover: SharedCover,
+    stego: SharedArray,
+    stream_bytes: bytes,
+    seed: str,
+    layout: Optional[StreamLayout],
+    key_slots: Optional[KeySlots],
+) -> EmbedMetrics:
+    with ExitStack() as stack:
+        return _embed_into(stack, cover, stego, stream_bytes, seed, layout, key_slots)
+
+
+class ProcessEmbedder:
+    """Embeds payloads into shared covers on a ``ProcessPoolExecutor``.
+
+    ``add_cover`` copies a cover into shared memory once and analyses it in a worker,
+    leaving the maps in shared memory too; ``submit`` then embeds into it on any worker.
+    Each job holds a reference to the segments it uses and drops it when the job ends,
+    including when its worker process dies, so no segment outlives its last user.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        from concurrent.futures import ProcessPoolExecutor
+
+        self._arrays = SharedArrayPool()
+        self._executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    def __enter__(self) -> "ProcessEmbedder":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def shared_segments(self) -> int:
+        return len(self._arrays)
+
+    def add_cover(self, rgb: np.ndarray, legacy: bool = True, stable: bool = True) -> SharedCover:
+        """Share ``rgb`` and analyse it for legacy and/or new-format embeds."""
+        if rgb.ndim != 3 or rgb.shape[2] != 3 or rgb.dtype != np.uint8:
+            raise StegoEngineError("Cover must be an RGB uint8 array")
+        rgb_handle = self._arrays.share(rgb)
+        try:
+            analysis, stable_maps = self._executor.submit(_analyse, rgb_handle, legacy, stable).result()
+        except BaseException:
+            self._arrays.release(rgb_handle)
+            raise
+        for handle in (*(analysis or ()), *(stable_maps or ())):
+            self._arrays.adopt(handle)
+        return SharedCover(rgb_handle, analysis, stable_maps)
+
+    def release_cover(self, cover: SharedCover) -> None:
+        """Drop the caller's reference; segments are unlinked once running jobs finish."""
+        self._arrays.release(*cover.handles())
+
+    def submit(
+        self,
+        cover: SharedCover,
+        payload: str | bytes,
+        mode: str,
+        credentials: EmbedCredentials,
+        layout: Optional[StreamLayout] = StreamLayout(),
+    ) -> "Future[Tuple[np.ndarray, EmbedMetrics]]":
+        """Embed ``payload`` into ``cover`` on a worker, like ``CoverSession.embed``."""
+        from concurrent.futures import Future
+
+        layout = default_layout(mode, layout)
+        if (cover.stable if layout is not None else cover.analysis) is None:
+            raise StegoEngineError("Cover was not analysed for this stream format")
+        stream_bytes, seed, key_slots = build_stream(payload, mode, credentials)
+        inputs = cover.handles()
+        self._arrays.acquire(*inputs)
+        stego = self._arrays.allocate(cover.rgb.shape, np.uint8)
+        result: Future = Future()
+
+        def finish(job: Future) -> None:
+            try:
+                metrics = job.result()
+                result.set_result((stego.read(), metrics))
+            except BaseException as exc:
+                result.set_exception(exc)
+            finally:
+                self._arrays.release(stego, *inputs)
+
+        try:
+            job = self._executor.submit(_embed, cover, stego, stream_bytes, seed, layout, key_slots)
+        except BaseException:
+            self._arrays.release(stego, *inputs)
+            raise
+        job.add_done_callback(finish)
+        return result
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        self._arrays.close()
@@ -0,0 +1,176 @@
+"""Independent pixel-order segments for parallel new-format embedding and extraction."""
+from __future__ import annotations
+
+import threading
+from typing import Callable, Generator, List, Optional, Tuple
+
+import numpy as np
+
+from ..util import prng
+from ..util.exceptions import JobCancelledError
+from ..util.jobs import drain
+from .drift_control import block_ids_for
+from .slots import PLAN_CHUNK
+from .traversal import SlotPlan, StableCapacity, iter_plan_slots, read_slots, write_slots
+
+# How often a multi-segment traversal reports progress and notices cancellation.
+SEGMENT_POLL_SECONDS = 0.05
+SegmentSteps = Generator[Tuple[int, int], None, object]
+
+
+def assign_block_segments(num_blocks: int, segments: int, seed: str) -> np.ndarray:
+    """Seeded segment id of every block; segments therefore own disjoint block sets."""
+    rng = prng.random_state(f"{seed}|segments")
+    return rng.integers(0, segments, num_blocks, dtype=np.uint8)
+
+
+def segment_bit_ranges(total_bits: int, segments: int) -> List[Tuple[int, int]]:
+    bounds = [total_bits * k // segments for k in range(segments + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def stream_capacity_bits(stable: StableCapacity, segments: int, seed: str) -> int:
+    """Largest stream, in bits, that ``embed_segments`` can place with ``segments`` segments.
+
+    Segments carry near-equal bit ranges, so the smallest segment bounds the stream.
+    """
+    block_segments = assign_block_segments(stable.stable_blocks.size, segments, seed)
+    per_segment = np.zeros(segments, dtype=np.int64)
+    num_pixels = stable.capacity_flat.size
+    for start in range(0, num_pixels, PLAN_CHUNK):
+        indices = np.arange(start, min(start + PLAN_CHUNK, num_pixels))
+        owners = block_segments[block_ids_for(indices, stable.width)]
+        per_segment += np.bincount(owners, weights=stable.caps_for(indices), minlength=segments).astype(np.int64)
+    return int(per_segment.min()) * segments
+
+
+def _segment_plans(
+    order: np.ndarray,
+    stable: StableCapacity,
+    total_bits: int,
+    segments: int,
+    seed: str,
+):
+    ranges = segment_bit_ranges(total_bits, segments)
+    block_segments = assign_block_segments(stable.stable_blocks.size, segments, seed) if segments > 1 else None
+
+    def plan(segment: int) -> Generator[Tuple[int, int], None, Tuple[SlotPlan, int, int]]:
+        start, stop = ranges[segment]
+        block_filter = None if block_segments is None else block_segments == segment
+        slots = yield from iter_plan_slots(order, stable, stop - start, block_filter=block_filter)
+        return slots, start, stop
+
+    return plan
+
+
+def _iter_map_segments(
+    fn: Callable[[int], SegmentSteps],
+    segments: int,
+    total_bits: int,
+    max_workers: Optional[int],
+) -> Generator[Tuple[int, int], None, list]:
+    """Run the ``fn(segment)`` generators, yielding ``(bits planned, total_bits)`` across all of them.
+
+    A single segment runs inline. Several run on a thread pool while this generator polls
+    their progress, so a cancelled job (which closes it) stops every segment at its next
+    chunk instead of at the end of the traversal.
+    """
+    if segments == 1:
+        result = yield from fn(0)
+        return [result]
+    from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+    planned = [0] * segments
+    stop = threading.Event()
+
+    def run(segment: int):
+        steps = fn(segment)
+        while True:
+            if stop.is_set():
+                steps.close()
+                raise JobCancelledError("Segment stopped")
+            try:
+                planned[segment], _total = next(steps)
+            except StopIteration as done:
+                return done.value
+
+    pool = ThreadPoolExecutor(max_workers=max_workers or segments)
+    try:
+        futures = [pool.submit(run, segment) for segment in range(segments)]
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=SEGMENT_POLL_SECONDS, return_when=FIRST_EXCEPTION)
+            for future in done:
+                future.result()
+            yield sum(planned), total_bits
+        return [future.result() for future in futures]
+    finally:
+        stop.set()
+        pool.shutdown(wait=True)
+
+
+def iter_embed_segments(
+    flat: np.ndarray,
+    order: np.ndarray,
+    stable: StableCapacity,
+    bits: np.ndarray,
+    segments: int,
+    seed: str,
+    max_workers: Optional[int] = None,
+) -> Generator[Tuple[int, int], None, List[SlotPlan]]:
+    """Embed ``bits`` split across ``segments`` concurrently, writing into ``flat`` in place.
+
+    Segment ``k`` carries bits ``segment_bit_ranges(...)[k]`` of the stream along the
+    subsequence of ``order`` that falls into its blocks, so segments never share a pixel.
+    Yields ``(bits planned, total bits)`` while the slots are planned.
+    """
+    plan = _segment_plans(order, stable, bits.size, segments, seed)
+
+    def embed(segment: int) -> SegmentSteps:
+        slots, start, stop = yield from plan(segment)
+        write_slots(flat, slots, bits[start:stop])
+        return slots
+
+    return (yield from _iter_map_segments(embed, segments, bits.size, max_workers))
+
+
+def embed_segments(
+    flat: np.ndarray,
+    order: np.ndarray,
+    stable: StableCapacity,
+    bits: np.ndarray,
+    segments: int,
+    seed: str,
+    max_workers: Optional[int] = None,
+) -> List[SlotPlan]:
+    return drain(iter_embed_segments(flat, order, stable, bits, segments, seed, max_workers))
+
+
+def iter_extract_segments(
+    flat: np.ndarray,
+    order: np.ndarray,
+    stable: StableCapacity,
+    total_bits: int,
+    segments: int,
+    seed: str,
+    max_workers: Optional[int] = None,
+) -> Generator[Tuple[int, int], None, np.ndarray]:
+    plan = _segment_plans(order, stable, total_bits, segments, seed)
+
+    def extract(segment: int) -> SegmentSteps:
+        slots, _start, _stop = yield from plan(segment)
+        return read_slots(flat, slots)
+
+    return np.concatenate((yield from _iter_map_segments(extract, segments, total_bits, max_workers)))
+
+
+def extract_segments(
+    flat: np.ndarray,
+    order: np.ndarray,
+    stable: StableCapacity,
+    total_bits: int,
+    segments: int,
+    seed: str,
+    max_workers: Optional[int] = None,
+) -> np.ndarray:
+    return drain(iter_extract_segments(flat, order, stable, total_bits, segments, seed, max_workers))
@@ -0,0 +1,128 @@
+"""Split one payload into authenticated shards embedded across several covers."""
+from __future__ import annotations
+
+import dataclasses
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..util.exceptions import CapacityError, StegoEngineError
+from ..util.jobs import drain
+from ..util.key_slots import place_key_slots, slot_capacity
+from ..util.layout import LAYOUT_BITS, StreamLayout
+from ..util.shards import SET_ID_LEN, SHARD_HEADER_LEN, pack_shard, split_payload
+from .cover_session import (
+    MAX_HIST_DRIFT,
+    CoverSession,
+    EmbedCredentials,
+    EmbedMetrics,
+    build_stream,
+    stream_seed,
+)
+from .segments import stream_capacity_bits
+from .streams import multi_stream_overhead, public_stream_overhead, recipient_key_slots, symmetric_stream_overhead
+
+ShardResult = Optional[Tuple[np.ndarray, EmbedMetrics]]
+# Fraction of the histogram drift gate a shard may use up.
+DRIFT_BUDGET_MARGIN = 0.9
+
+
+def drift_bit_budget(rgb: np.ndarray) -> int:
+    """Stream bits a cover can take before the histogram drift gate is expected to fail.
+
+    Shard streams are AES-GCM output, so about half of the written LSBs change a value,
+    and each change moves one count between two of the 256 histogram bins.
+    """
+    return int(MAX_HIST_DRIFT * rgb.size * DRIFT_BUDGET_MARGIN)
+
+
+def allocate_shard_sizes(payload_len: int, capacities: Sequence[int]) -> List[int]:
+    """Split ``payload_len`` bytes across covers in proportion to their byte capacity.
+
+    No cover receives more than its capacity; covers may receive zero bytes.
+    """
+    usable = [max(0, capacity) for capacity in capacities]
+    total = sum(usable)
+    if total < payload_len:
+        raise CapacityError(f"Insufficient capacity across covers: {total} / {payload_len} bytes")
+    sizes = [payload_len * capacity // total for capacity in usable]
+    remainder = payload_len - sum(sizes)
+    # Only covers with a fractional share have slack, and there are more of them than ``remainder``.
+    by_slack = sorted(range(len(usable)), key=lambda index: usable[index] - sizes[index], reverse=True)
+    for index in by_slack[:remainder]:
+        sizes[index] += 1
+    return sizes
+
+
+def _shard_credentials(mode: str, credentials: EmbedCredentials) -> Tuple[EmbedCredentials, int]:
+    if mode == "password":
+        # Shards are always AES-GCM protected so their index and set id are authenticated.
+        return dataclasses.replace(credentials, aes_enabled=True), symmetric_stream_overhead(True)
+    if mode == "public":
+        return credentials, public_stream_overhead(credentials.public_key_path or "")
+    if mode == "multi":
+        return credentials, multi_stream_overhead()
+    raise StegoEngineError("Unsupported mode selected")
+
+
+def embed_sharded(
+    sessions: Sequence[CoverSession],
+    payload: bytes,
+    mode: str,
+    credentials: EmbedCredentials,
+    layout: Optional[StreamLayout] = StreamLayout(),
+    max_workers: Optional[int] = None,
+) -> List[ShardResult]:
+    """Embed ``payload`` across ``sessions`` concurrently as new-format streams.
+
+    Returns one entry per cover: the stego image and metrics, or ``None`` for covers
+    that received no shard.
+    """
+    if not payload:
+        raise StegoEngineError("Payload is empty")
+    if not sessions:
+        raise StegoEngineError("At least one cover is required")
+    layout = layout or StreamLayout()
+    layout.validate()
+    shard_credentials, overhead = _shard_credentials(mode, credentials)
+    # Multi-recipient seeds derive from the session key, so every cover gets its own key
+    # slots before its capacity is measured.
+    if mode == "multi":
+        per_cover = [
+            dataclasses.replace(shard_credentials, key_slots=recipient_key_slots(credentials.public_key_paths))
+            for _session in sessions
+        ]
+    else:
+        per_cover = [shard_credentials] * len(sessions)
+
+    def capacity(index: int) -> int:
+        key_slots = per_cover[index].key_slots
+        rgb = sessions[index].rgb
+        placement = None
+        if key_slots is not None:
+            if key_slots.count > slot_capacity(rgb.shape[0] * rgb.shape[1]):
+                return 0
+            placement = place_key_slots(key_slots, rgb.shape[0] * rgb.shape[1])
+        seed = stream_seed(mode, per_cover[index])
+        stable = sessions[index].stable_analysis(seed, placement).capped(layout.max_bits)
+        bits = stream_capacity_bits(stable, layout.segments, seed)
+        bits = min(bits, drift_bit_budget(rgb) - LAYOUT_BITS - (key_slots.bits if key_slots else 0))
+        return bits // 8 - overhead - SHARD_HEADER_LEN
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(sessions)) as pool:
+        sizes = allocate_shard_sizes(len(payload), list(pool.map(capacity, range(len(sessions)))))
+        targets = [index for index, size in enumerate(sizes) if size > 0]
+        shards = split_payload(payload, [sizes[index] for index in targets], os.urandom(SET_ID_LEN))
+
+        def embed(target: int, record: bytes) -> Tuple[np.ndarray, EmbedMetrics]:
+            stream_bytes, seed, key_slots = build_stream(record, mode, per_cover[target])
+            return drain(sessions[target].iter_embed_stream(stream_bytes, seed, layout, key_slots))
+
+        embedded = pool.map(embed, targets, [pack_shard(shard) for shard in shards])
+        results: List[ShardResult] = [None] * len(sessions)
+        for target, result in zip(targets, embedded):
+            results[target] = result
+    return results
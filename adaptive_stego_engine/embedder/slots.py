@@ -0,0 +1,90 @@
+"""Slot traversal engine shared by every embed and extract path.
+
+A traversal walks a pixel order in chunks, asks a capacity function how many LSB slots
+each visited pixel holds and expands them into (pixel, channel) slots, B, G, R first.
+Writers and readers apply ``write_bits``/``read_bits`` to the same slots, so the two
+directions cannot drift apart; they differ only in the capacity function they pass.
+Slot expansion and both kernels run on the active backend (see ``kernels``).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+from ..kernels import active_backend
+
+CHANNEL_ORDER = (2, 1, 0)  # B, G, R
+PLAN_CHUNK = 1 << 16
+LSB_CLEAR_MASK = np.uint8(0xFE)
+
+# Per-pixel slot counts (int64) of a chunk of flat pixel indices.
+CapacityFn = Callable[[np.ndarray], np.ndarray]
+# Which pixels of a chunk of flat pixel indices the traversal may visit.
+PixelFilter = Callable[[np.ndarray], np.ndarray]
+
+
+def expand_slots(pixels: np.ndarray, caps: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Expand per-pixel capacities into (pixel, channel) slots in traversal order."""
+    return active_backend().expand_slots(pixels, caps)
+
+
+@dataclass(frozen=True)
+class SlotChunk:
+    """One chunk of a traversal.
+
+    ``pixels``/``caps`` are the visited pixels and their slot counts, the last one cut
+    short at the bit limit; ``visited`` counts ``order`` positions consumed so far.
+    """
+
+    pixels: np.ndarray
+    caps: np.ndarray
+    slot_pixels: np.ndarray
+    slot_channels: np.ndarray
+    visited: int
+
+
+def raw_capacity(capacity_flat: np.ndarray) -> CapacityFn:
+    return lambda pixels: capacity_flat[pixels].astype(np.int64)
+
+
+def iter_slot_chunks(
+    order: np.ndarray,
+    capacity: CapacityFn,
+    num_bits: Optional[int] = None,
+    pixel_filter: Optional[PixelFilter] = None,
+) -> Iterator[SlotChunk]:
+    """Slots along ``order`` until ``num_bits`` are placed (``None``: the whole order)."""
+    planned = 0
+    visited = 0
+    total_pixels = len(order)
+    while visited < total_pixels and (num_bits is None or planned < num_bits):
+        chunk = np.asarray(order[visited : visited + PLAN_CHUNK], dtype=np.int64)
+        positions = np.arange(visited, visited + chunk.size)
+        visited += chunk.size
+        if pixel_filter is not None:
+            keep = pixel_filter(chunk)
+            chunk, positions = chunk[keep], positions[keep]
+        caps = np.asarray(capacity(chunk), dtype=np.int64)
+        if num_bits is not None:
+            consumed = planned + np.cumsum(caps)
+            done_at = int(np.searchsorted(consumed, num_bits))
+            if done_at < chunk.size:
+                visited = int(positions[done_at]) + 1
+                chunk = chunk[: done_at + 1]
+                caps = caps[: done_at + 1]
+                caps[-1] -= int(consumed[done_at]) - num_bits
+        slot_pixels, slot_channels = expand_slots(chunk, caps)
+        planned += slot_pixels.size
+        yield SlotChunk(chunk, caps, slot_pixels, slot_channels, visited)
+
+
+def write_bits(flat: np.ndarray, pixels: np.ndarray, channels: np.ndarray, bits: np.ndarray) -> None:
+    """Write kernel: set the LSB of each slot of ``flat`` (N×3) to the matching bit."""
+    active_backend().write_bits(flat, pixels, channels, bits)
+
+
+def read_bits(flat: np.ndarray, pixels: np.ndarray, channels: np.ndarray) -> np.ndarray:
+    """Read kernel: the LSB of each slot of ``flat`` (N×3)."""
+    return active_backend().read_bits(flat, pixels, channels)
@@ -0,0 +1,96 @@
+"""Mode-specific stream construction: encrypted header, payload and embedding seed."""
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple
+
+from ..util import bitstream, header
+from ..util.asym_crypto import fingerprint_public_key, load_public_key_pem, rsa_encrypt_key
+from ..util.crypto import AES_NONCE_LEN, AES_TAG_LEN, PBKDF2_SALT_LEN, aes_gcm_encrypt, derive_key_pbkdf2
+from ..util.exceptions import StegoEngineError
+from ..util.key_slots import KeySlots, seal_key_slots
+
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+def symmetric_seed(password: str) -> str:
+    return f"sym:{password}"
+
+
+def public_seed(public_key: rsa.RSAPublicKey) -> str:
+    return f"asym:{fingerprint_public_key(public_key)}"
+
+
+def build_symmetric_stream(payload_bytes: bytes, password: str, aes_enabled: bool) -> Tuple[bytes, str]:
+    if not password:
+        raise StegoEngineError("Password is required for symmetric mode")
+    plain_header = header.build_plain_header(len(payload_bytes))
+    salt = os.urandom(PBKDF2_SALT_LEN)
+    key = derive_key_pbkdf2(password, salt)
+    hdr_nonce, hdr_ct = header.encrypt_header(plain_header, key)
+    if len(hdr_ct) != len(plain_header) + 16:
+        raise StegoEngineError("Header encryption failed")
+    payload_encrypted = False
+    payload_nonce: Optional[bytes] = None
+    payload_segment = payload_bytes
+    if aes_enabled:
+        payload_encrypted = True
+        payload_nonce, payload_segment = aes_gcm_encrypt(key, payload_bytes)
+    stream = bitstream.pack_symmetric_stream(
+        salt=salt,
+        header_nonce=hdr_nonce,
+        header_ct=hdr_ct,
+        payload_bytes=payload_segment,
+        payload_encrypted=payload_encrypted,
+        payload_nonce=payload_nonce,
+    )
+    return stream, symmetric_seed(password)
+
+
+def build_public_stream(payload_bytes: bytes, public_key_path: str) -> Tuple[bytes, str]:
+    if not public_key_path:
+        raise StegoEngineError("Public key is required for asymmetric mode")
+    plain_header = header.build_plain_header(len(payload_bytes))
+    public_key = load_public_key_pem(public_key_path)
+    session_key = os.urandom(32)
+    plaintext = plain_header + payload_bytes
+    aes_nonce, aes_cipher = aes_gcm_encrypt(session_key, plaintext)
+    ek = rsa_encrypt_key(public_key, session_key)
+    stream = bitstream.pack_public_stream(ek=ek, aes_nonce=aes_nonce, aes_ct=aes_cipher)
+    return stream, public_seed(public_key)
+
+
+def recipient_key_slots(public_key_paths: Sequence[str]) -> KeySlots:
+    """A fresh session key wrapped for every recipient (see ``util.key_slots``)."""
+    if not public_key_paths:
+        raise StegoEngineError("At least one recipient public key is required")
+    return seal_key_slots([load_public_key_pem(path) for path in public_key_paths])
+
+
+def build_multi_stream(payload_bytes: bytes, key_slots: KeySlots) -> Tuple[bytes, str]:
+    """Payload under the slots' session key, authenticating every slot as associated data.
+
+    The seed derives from the session key, so only recipients can find the stream.
+    """
+    plain_header = header.build_plain_header(len(payload_bytes))
+    aes_nonce, aes_cipher = aes_gcm_encrypt(key_slots.session_key, plain_header + payload_bytes, key_slots.aad)
+    return bitstream.pack_multi_stream(aes_nonce=aes_nonce, aes_ct=aes_cipher), key_slots.seed
+
+
+def symmetric_stream_overhead(aes_enabled: bool) -> int:
+    """Stream bytes added around a payload by ``build_symmetric_stream``."""
+    header_ct_len = header.HEADER_LEN + AES_TAG_LEN
+    overhead = 1 + PBKDF2_SALT_LEN + AES_NONCE_LEN + header_ct_len + 1
+    return overhead + (AES_NONCE_LEN + AES_TAG_LEN if aes_enabled else 0)
+
+
+def public_stream_overhead(public_key_path: str) -> int:
+    """Stream bytes added around a payload by ``build_public_stream``."""
+    ek_len = load_public_key_pem(public_key_path).key_size // 8
+    return 1 + 2 + ek_len + AES_NONCE_LEN + header.HEADER_LEN + AES_TAG_LEN
+
+
+def multi_stream_overhead() -> int:
+    """Stream bytes added around a payload by ``build_multi_stream``; the key slots are stored apart."""
+    return 1 + AES_NONCE_LEN + header.HEADER_LEN + AES_TAG_LEN
@@ -0,0 +1,172 @@
+"""Payload-proportional LSB-stable analysis over a seeded subset of fixed-size tiles.
+
+Tiles are taken in a seeded order and each is analysed on its own, from the LSB-cleared
+pixels of the tile plus a few halo rows and columns. A tile's analysis is therefore the
+same on cover and stego and does not depend on which other tiles were analysed, so the
+extractor only needs the tile count from the descriptor to rebuild it. The gradient is
+normalised per tile, so capacities differ from the whole-image analysis.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from ..analyzer.entropy import compute_entropy
+from ..analyzer.gradient import gradient_magnitude, normalise_gradient
+from ..analyzer.region_classifier import compute_capacity_map
+from ..analyzer.texture_map import TEXTURE_HALO, combine_surface, compute_gray
+from ..util import prng
+from ..util.exceptions import CapacityError, StegoEngineError
+from ..util.layout import MAX_TILES, PixelOrdering
+from . import capacity as capacity_module
+from .drift_control import BLOCK_SIZE, block_grid, block_ids_for, stable_block_mask
+from .pixel_order import layout_pixel_order, uses_capacity
+from .segments import assign_block_segments
+from .slots import LSB_CLEAR_MASK
+from .traversal import StableCapacity
+
+# Tile edge in pixels; a multiple of BLOCK_SIZE so tiles own whole drift-control blocks.
+TILE_SIZE = 256
+# Pixels read around a tile: the entropy window, the Sobel kernel and the noise predictor.
+TILE_HALO = max(TEXTURE_HALO, 1)
+# Tiles are added until their capacity exceeds the stream by this fraction.
+TILE_CAPACITY_MARGIN = 0.25
+
+Bounds = Tuple[int, int, int, int]
+
+
+def tile_grid(height: int, width: int) -> Tuple[int, int]:
+    return -(-height // TILE_SIZE), -(-width // TILE_SIZE)
+
+
+def tile_sequence(num_tiles: int, seed: str) -> np.ndarray:
+    """Seeded order in which tiles are analysed; a stream with ``n`` tiles uses the first ``n``."""
+    return prng.random_state(f"{seed}|tiles").permutation(num_tiles)
+
+
+def tile_bounds(tile: int, height: int, width: int) -> Bounds:
+    """``(y0, y1, x0, x1)`` of ``tile`` (row-major over the tile grid)."""
+    _rows, cols = tile_grid(height, width)
+    y0, x0 = (tile // cols) * TILE_SIZE, (tile % cols) * TILE_SIZE
+    return y0, min(height, y0 + TILE_SIZE), x0, min(width, x0 + TILE_SIZE)
+
+
+def tile_pixels(bounds: Bounds, width: int) -> np.ndarray:
+    y0, y1, x0, x1 = bounds
+    return (np.arange(y0, y1, dtype=np.int64)[:, None] * width + np.arange(x0, x1, dtype=np.int64)).reshape(-1)
+
+
+class TiledAnalysis:
+    """LSB-stable analysis of a cover filled in one tile at a time.
+
+    The maps span the whole image but start as untouched zero pages, so memory and time
+    grow with the analysed tiles only. ``analyse`` is thread-safe and skips tiles that are
+    already done; tile results are seed-independent and shared by every stream.
+    """
+
+    def __init__(self, rgb: np.ndarray) -> None:
+        self.rgb = rgb
+        height, width = rgb.shape[:2]
+        rows, cols = tile_grid(height, width)
+        self.num_tiles = rows * cols
+        self.capacity_flat = np.zeros(height * width, dtype=np.uint8)
+        self.gray = np.zeros((height, width), dtype=np.float32)
+        self.entropy_map = np.zeros((height, width), dtype=np.float32)
+        self.stable_blocks = np.zeros(int(np.prod(block_grid(height, width))), dtype=bool)
+        self.analysed = np.zeros(self.num_tiles, dtype=bool)
+        self._lock = threading.Lock()
+
+    def analyse(self, tiles: Iterable[int]) -> None:
+        with self._lock:
+            for tile in tiles:
+                if not self.analysed[tile]:
+                    self._analyse_tile(int(tile))
+                    self.analysed[tile] = True
+
+    def _analyse_tile(self, tile: int) -> None:
+        height, width = self.gray.shape
+        y0, y1, x0, x1 = tile_bounds(tile, height, width)
+        wy0, wy1 = max(0, y0 - TILE_HALO), min(height, y1 + TILE_HALO)
+        wx0, wx1 = max(0, x0 - TILE_HALO), min(width, x1 + TILE_HALO)
+        cleared = self.rgb[wy0:wy1, wx0:wx1] & LSB_CLEAR_MASK
+        gray = compute_gray(cleared)
+        inner = (slice(y0 - wy0, y1 - wy0), slice(x0 - wx0, x1 - wx0))
+        gradient_map = normalise_gradient(gradient_magnitude(gray)[inner])
+        entropy_map = compute_entropy(gray)[inner]
+        surface_map = combine_surface(gradient_map, entropy_map)
+        capacity = capacity_module.refine_capacity_map(compute_capacity_map(surface_map), surface_map)
+        # Gray is a per-pixel function, so overlapping halos of neighbouring tiles agree.
+        self.gray[wy0:wy1, wx0:wx1] = gray
+        self.entropy_map[y0:y1, x0:x1] = entropy_map
+        self.capacity_flat.reshape(height, width)[y0:y1, x0:x1] = capacity
+        block_rows, block_cols = block_grid(y1 - y0, x1 - x0)
+        by0, bx0 = y0 // BLOCK_SIZE, x0 // BLOCK_SIZE
+        _rows, cols = block_grid(height, width)
+        self.stable_blocks.reshape(-1, cols)[by0 : by0 + block_rows, bx0 : bx0 + block_cols] = stable_block_mask(
+            cleared[inner]
+        ).reshape(block_rows, block_cols)
+
+    def stable(self, reserved: np.ndarray) -> StableCapacity:
+        """View of the analysed tiles as a ``StableCapacity``; other pixels have no capacity."""
+        return StableCapacity(
+            capacity_flat=self.capacity_flat,
+            gray=self.gray,
+            entropy_map=self.entropy_map,
+            stable_blocks=self.stable_blocks,
+            reserved=reserved,
+        )
+
+
+def stream_tiles(analysis: TiledAnalysis, seed: str, count: int) -> np.ndarray:
+    if not 0 < count <= min(analysis.num_tiles, MAX_TILES):
+        raise StegoEngineError(f"Tile count {count} out of range for an image with {analysis.num_tiles} tiles")
+    return tile_sequence(analysis.num_tiles, seed)[:count]
+
+
+def select_tile_count(
+    analysis: TiledAnalysis,
+    seed: str,
+    reserved: np.ndarray,
+    stream_bits: int,
+    segments: int,
+    max_bits: int = capacity_module.MAX_CAPACITY,
+) -> int:
+    """Fewest leading tiles of the seeded sequence whose capacity fits the stream plus margin.
+
+    Capacity is counted per segment exactly as ``embed_segments`` will use it, so the
+    smallest segment bounds the stream like in ``segments.stream_capacity_bits``.
+    """
+    height, width = analysis.gray.shape
+    stable = analysis.stable(reserved).capped(max_bits)
+    block_segments = assign_block_segments(analysis.stable_blocks.size, segments, seed)
+    per_segment = np.zeros(segments, dtype=np.int64)
+    needed = stream_bits * (1 + TILE_CAPACITY_MARGIN)
+    for count, tile in enumerate(tile_sequence(analysis.num_tiles, seed)[:MAX_TILES].tolist(), start=1):
+        analysis.analyse([tile])
+        indices = tile_pixels(tile_bounds(tile, height, width), width)
+        owners = block_segments[block_ids_for(indices, width)]
+        per_segment += np.bincount(owners, weights=stable.caps_for(indices), minlength=segments).astype(np.int64)
+        if per_segment.min() * segments >= needed:
+            return count
+    raise CapacityError(
+        f"Insufficient safe capacity: {int(per_segment.min()) * segments} bits in all tiles, {stream_bits} needed"
+    )
+
+
+def tile_regions(tiles: Sequence[int], height: int, width: int) -> List[Bounds]:
+    return [tile_bounds(int(tile), height, width) for tile in tiles]
+
+
+def tiled_pixel_order(stable: StableCapacity, tiles: Sequence[int], ordering: PixelOrdering, seed: str) -> np.ndarray:
+    """``layout_pixel_order`` over the pixels of ``tiles`` only, as flat image indices."""
+    height, width = stable.gray.shape
+    pixels = np.concatenate([tile_pixels(bounds, width) for bounds in tile_regions(tiles, height, width)])
+    usable = None
+    if uses_capacity(ordering):
+        usable = np.minimum(stable.capacity_flat[pixels], np.uint8(stable.max_bits))
+        usable[~stable.stable_blocks[block_ids_for(pixels, width)]] = 0
+        usable[np.isin(pixels, stable.reserved)] = 0
+    positions = layout_pixel_order(ordering, stable.entropy_map.reshape(-1)[pixels], usable, seed)
+    return pixels[np.asarray(positions[: pixels.size], dtype=np.int64)]
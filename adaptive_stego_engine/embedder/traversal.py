@@ -0,0 +1,130 @@
+"""LSB-stable slot traversal shared by new-format embedding and extraction.
+
+New-format streams analyse the image with its LSB plane cleared and only use blocks that
+are safe for any LSB content, so the capacity of every pixel is identical on cover and
+stego and no block is ever rolled back. Embedder and extractor then derive the same
+(pixel, channel) slots from the pixel order.
+"""
+from __future__ import annotations
+
+import dataclasses
+from dataclasses import dataclass
+from typing import Generator, Optional, Tuple
+
+import numpy as np
+
+from ..analyzer.region_classifier import compute_capacity_map
+from ..analyzer.texture_map import compute_texture_maps
+from ..util.exceptions import CapacityError
+from ..util.jobs import drain
+from . import capacity as capacity_module
+from .drift_control import block_ids_for, pixel_block_mask, stable_block_mask
+from .noise_predictor import adjust_capacity_batch
+from .slots import LSB_CLEAR_MASK, iter_slot_chunks, read_bits, write_bits
+
+
+@dataclass(frozen=True)
+class StableCapacity:
+    capacity_flat: np.ndarray
+    gray: np.ndarray
+    entropy_map: np.ndarray
+    stable_blocks: np.ndarray
+    reserved: np.ndarray
+    # Capacity profile of the stream: the most bits any pixel carries.
+    max_bits: int = capacity_module.MAX_CAPACITY
+
+    @property
+    def width(self) -> int:
+        return int(self.gray.shape[1])
+
+    def usable_capacity(self) -> np.ndarray:
+        """Refined capacity of every pixel with unstable blocks and reserved pixels zeroed."""
+        caps = np.minimum(self.capacity_flat, np.uint8(self.max_bits))
+        caps[~pixel_block_mask(self.stable_blocks, *self.gray.shape)] = 0
+        caps[self.reserved] = 0
+        return caps
+
+    def caps_for(self, flat_indices: np.ndarray) -> np.ndarray:
+        """Noise-adjusted capacity of the given pixels; zero outside stable blocks."""
+        caps = np.minimum(self.capacity_flat[flat_indices], self.max_bits).astype(np.int64)
+        caps[~self.stable_blocks[block_ids_for(flat_indices, self.width)]] = 0
+        caps[np.isin(flat_indices, self.reserved, assume_unique=True)] = 0
+        positive = caps > 0
+        caps[positive] = adjust_capacity_batch(self.gray, flat_indices[positive], caps[positive])
+        return caps
+
+    def capped(self, max_bits: int) -> "StableCapacity":
+        return dataclasses.replace(self, max_bits=max_bits)
+
+
+@dataclass(frozen=True)
+class SlotPlan:
+    pixels: np.ndarray
+    channels: np.ndarray
+    pixels_visited: int
+
+
+def analyse_stable_capacity(
+    rgb: np.ndarray,
+    reserved: np.ndarray,
+    band_rows: Optional[int] = None,
+) -> StableCapacity:
+    cleared = rgb & LSB_CLEAR_MASK
+    gray, _gradient_map, entropy_map, surface_map = compute_texture_maps(cleared, band_rows)
+    base_capacity = compute_capacity_map(surface_map)
+    refined_capacity = capacity_module.refine_capacity_map(base_capacity, surface_map)
+    return StableCapacity(
+        capacity_flat=refined_capacity.reshape(-1),
+        gray=gray,
+        entropy_map=entropy_map,
+        stable_blocks=stable_block_mask(cleared),
+        reserved=reserved,
+    )
+
+
+def iter_plan_slots(
+    order: np.ndarray,
+    stable: StableCapacity,
+    num_bits: int,
+    block_filter: Optional[np.ndarray] = None,
+) -> Generator[Tuple[int, int], None, SlotPlan]:
+    """First ``num_bits`` (pixel, channel) slots along ``order``, yielding ``(bits planned, num_bits)`` per chunk.
+
+    ``block_filter`` optionally restricts the traversal to pixels of the marked blocks.
+    """
+    def in_filtered_blocks(chunk: np.ndarray) -> np.ndarray:
+        return block_filter[block_ids_for(chunk, stable.width)]
+
+    pixel_filter = None if block_filter is None else in_filtered_blocks
+    chunks = []
+    planned = 0
+    for chunk in iter_slot_chunks(order, stable.caps_for, num_bits, pixel_filter):
+        chunks.append(chunk)
+        planned += chunk.slot_pixels.size
+        yield planned, num_bits
+    if planned < num_bits:
+        raise CapacityError(f"Insufficient safe capacity: embedded {planned} / {num_bits} bits")
+    if not chunks:
+        return SlotPlan(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint8), 0)
+    return SlotPlan(
+        pixels=np.concatenate([chunk.slot_pixels for chunk in chunks]),
+        channels=np.concatenate([chunk.slot_channels for chunk in chunks]),
+        pixels_visited=chunks[-1].visited,
+    )
+
+
+def plan_slots(
+    order: np.ndarray,
+    stable: StableCapacity,
+    num_bits: int,
+    block_filter: Optional[np.ndarray] = None,
+) -> SlotPlan:
+    return drain(iter_plan_slots(order, stable, num_bits, block_filter))
+
+
+def write_slots(flat: np.ndarray, plan: SlotPlan, bits: np.ndarray) -> None:
+    write_bits(flat, plan.pixels, plan.channels, bits)
+
+
+def read_slots(flat: np.ndarray, plan: SlotPlan) -> np.ndarray:
+    return read_bits(flat, plan.pixels, plan.channels)
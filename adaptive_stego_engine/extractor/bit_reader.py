@@ -1,20 +1,27 @@
 """Bit readers for extracting payloads from the bitstream."""
 from __future__ import annotations
 
-from typing import List
-
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from typing import TYPE_CHECKING, List, Optional
 
 from ..util import bitstream, header
 from ..util.asym_crypto import load_private_key_pem, rsa_decrypt_key
 from ..util.crypto import PBKDF2_SALT_LEN, aes_gcm_decrypt, derive_key_pbkdf2
 from ..util.exceptions import StegoEngineError
+from ..util.key_slots import KeySlots
+
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives.asymmetric import rsa
 
 
 def read_payload_symmetric_from_bits(bits: List[int], password: str) -> bytes:
     if not password:
         raise StegoEngineError("Password is required for extraction")
-    data = bitstream.bits_to_bytes(bits)
+    return read_payload_symmetric(bitstream.bits_to_bytes(bits), password)
+
+
+def read_payload_symmetric(data: bytes, password: str) -> bytes:
+    if not password:
+        raise StegoEngineError("Password is required for extraction")
     info = bitstream.unpack_symmetric_stream(data)
     salt = info["salt"]
     if len(salt) != PBKDF2_SALT_LEN:
@@ -38,12 +45,35 @@ def read_payload_symmetric_from_bits(bits: List[int], password: str) -> bytes:
 
 
 def read_payload_asymmetric_from_bits(bits: List[int], private_key_path: str) -> bytes:
-    data = bitstream.bits_to_bytes(bits)
+    return read_payload_asymmetric(bitstream.bits_to_bytes(bits), private_key_path)
+
+
+def read_payload_asymmetric(data: bytes, private_key_path: str, key_slots: Optional[KeySlots] = None) -> bytes:
+    """Payload of a public-key stream, or of a multi-recipient one opened through ``key_slots``."""
+    if key_slots is not None:
+        return read_payload_multi(data, key_slots)
+    return read_payload_with_key(data, load_private_key_pem(private_key_path))
+
+
+def read_payload_with_key(data: bytes, private_key: rsa.RSAPrivateKey) -> bytes:
     info = bitstream.unpack_public_stream(data)
-    private_key = load_private_key_pem(private_key_path)
-    session_key = rsa_decrypt_key(private_key, info["ek"])
-    aesgcm = AESGCM(session_key)
-    plaintext = aesgcm.decrypt(info["aes_nonce"], info["aes_ct"], None)
+    return open_public_payload(info["aes_nonce"], info["aes_ct"], rsa_decrypt_key(private_key, info["ek"]))
+
+
+def read_payload_multi(data: bytes, key_slots: KeySlots) -> bytes:
+    """Payload of a multi-recipient stream; the slot table must authenticate with it."""
+    from cryptography.exceptions import InvalidTag
+
+    info = bitstream.unpack_multi_stream(data)
+    try:
+        return open_public_payload(info["aes_nonce"], info["aes_ct"], key_slots.session_key, key_slots.aad)
+    except InvalidTag as exc:
+        raise StegoEngineError("Recipient key slots or payload failed authentication") from exc
+
+
+def open_public_payload(aes_nonce: bytes, aes_ct: bytes, session_key: bytes, aad: Optional[bytes] = None) -> bytes:
+    """Decrypt the AES-GCM section of a public-key stream with an unwrapped session key."""
+    plaintext = aes_gcm_decrypt(session_key, aes_nonce, aes_ct, aad)
     header_plain = plaintext[: header.HEADER_LEN]
     payload_len = header.validate_header(header_plain)
     payload = plaintext[header.HEADER_LEN : header.HEADER_LEN + payload_len]
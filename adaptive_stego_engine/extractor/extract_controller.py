@@ -1,44 +1,227 @@
 """High level extraction controller."""
 from __future__ import annotations
 
-from ..analyzer.region_classifier import compute_capacity_map
-from ..analyzer.texture_map import compute_texture_maps
-from ..embedder import capacity as capacity_module
-from ..embedder.pixel_order import build_pixel_order
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..embedder.pixel_order import layout_pixel_order, uses_capacity
+from ..embedder.segments import iter_extract_segments
+from ..embedder.tiles import TiledAnalysis, stream_tiles, tiled_pixel_order
+from ..embedder.traversal import analyse_stable_capacity
 from ..util.exceptions import StegoEngineError
-from ..util.image_io import load_png
+from ..util.image_io import load_png, png_dimensions
+from ..util.jobs import CancellationToken, Job, JobProgress, JobSteps, drain, scale_progress
+from ..util.key_slots import KeySlots, SlotPlacement, find_key_slots, reserved_pixels
+from ..util.layout import StreamLayout, read_layout
+from ..util.memory_plan import plan_extract
+from ..util.scheduler import BatchReport, BatchTask, CostModel, failed_task, run_batch
+from ..util.shards import reassemble_shards, unpack_shard
 from ..util.asym_crypto import fingerprint_public_key, load_private_key_pem
-from .bit_reader import read_payload_asymmetric_from_bits, read_payload_symmetric_from_bits
-from .extraction import extract_bits_low_level
+from .bit_reader import read_payload_asymmetric, read_payload_symmetric
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+LEGACY_UNSUPPORTED = (
+    "No new-format stream found for this key; legacy streams without a layout descriptor cannot be extracted"
+)
+
+
+@dataclass(frozen=True)
+class ExtractSpec:
+    """One job of ``ExtractController.extract_batch``: the arguments of ``extract_job``."""
+
+    stego_path: str
+    mode: str
+    password: Optional[str] = None
+    private_key_path: Optional[str] = None
 
 
 class ExtractController:
-    def _prepare_maps(self, path: str):
-        rgb = load_png(path)
-        _gray, _gradient_map, entropy_map, surface_map = compute_texture_maps(rgb)
-        base_capacity = compute_capacity_map(surface_map)
-        refined_capacity = capacity_module.refine_capacity_map(base_capacity, surface_map)
-        return rgb, entropy_map, refined_capacity
+    """Extraction entry points; one instance may serve any number of threads at once.
 
-    def extract_from_image_symmetric(self, stego_path: str, password: str) -> bytes:
+    Calls keep their state to themselves; parsed private keys are shared through the
+    locked ``util.asym_crypto.KEY_CACHE``.
+    """
+
+    def __init__(self, max_memory_mb: Optional[int] = None) -> None:
+        """``max_memory_mb`` (default: ``STEGO_MAX_MEMORY_MB``, else unlimited) bounds each extraction."""
+        self.max_memory_mb = max_memory_mb
+
+    def _iter_extract_layout(
+        self,
+        rgb: np.ndarray,
+        seed: str,
+        layout: StreamLayout,
+        stream_len: int,
+        band_rows: Optional[int] = None,
+        placement: Optional[SlotPlacement] = None,
+    ) -> JobSteps[bytes]:
+        _descriptor, reserved = reserved_pixels(seed, rgb.shape[0] * rgb.shape[1], placement)
+        if layout.tiles:
+            yield JobProgress(10, f"Analyzing {layout.tiles} tile(s)…")
+            analysis = TiledAnalysis(rgb)
+            tiles = stream_tiles(analysis, seed, layout.tiles)
+            analysis.analyse(tiles)
+            stable = analysis.stable(reserved).capped(layout.max_bits)
+            yield JobProgress(35, "Ordering pixels…")
+            order = tiled_pixel_order(stable, tiles, layout.ordering, seed)
+        else:
+            yield JobProgress(10, "Analyzing texture…")
+            stable = analyse_stable_capacity(rgb, reserved, band_rows).capped(layout.max_bits)
+            yield JobProgress(35, "Ordering pixels…")
+            usable = stable.usable_capacity() if uses_capacity(layout.ordering) else None
+            order = layout_pixel_order(layout.ordering, stable.entropy_map, usable, seed)
+        message = f"Reading {layout.segments} segment(s)…"
+        yield JobProgress(45, message)
+        bits = yield from scale_progress(
+            iter_extract_segments(rgb.reshape(-1, 3), order, stable, stream_len * 8, layout.segments, seed),
+            45,
+            85,
+            message,
+        )
+        return np.packbits(bits).tobytes()
+
+    def read_layout_stream(
+        self,
+        rgb: np.ndarray,
+        seed: str,
+        layout: StreamLayout,
+        stream_len: int,
+        placement: Optional[SlotPlacement] = None,
+    ) -> bytes:
+        """Raw new-format stream whose descriptor ``read_layout(rgb, seed)`` returned."""
+        return drain(self._iter_extract_layout(rgb, seed, layout, stream_len, placement=placement))
+
+    def _iter_extract_stream(
+        self,
+        stego_path: str,
+        seed: str,
+        private_key: Optional[rsa.RSAPrivateKey] = None,
+    ) -> JobSteps[Tuple[bytes, Optional[KeySlots]]]:
+        """Read the stream stored under ``seed`` or, failing that, the multi-recipient stream
+        whose key slot ``private_key`` unwraps, returned with its key slots.
+
+        Only new-format streams can be extracted: legacy streams (``layout=None`` embeds)
+        analyse the cover with its LSBs, so the stego image no longer yields the pixel
+        order and capacities they were written with.
+        """
+        plan = plan_extract(*png_dimensions(stego_path), self.max_memory_mb)
+        yield JobProgress(2, f"Loading stego image ({plan.describe()})…")
+        rgb = load_png(stego_path)
+        key_slots = placement = None
+        found = read_layout(rgb, seed)
+        if found is None and private_key is not None:
+            yield JobProgress(5, "Trying recipient key slots…")
+            located = find_key_slots(rgb, private_key)
+            if located is not None:
+                key_slots, placement = located
+                seed = key_slots.seed
+                found = read_layout(rgb, seed, placement.pixels())
+                if found is None:
+                    raise StegoEngineError("Recipient key slot found but the stream descriptor is corrupted")
+        if found is None:
+            raise StegoEngineError(LEGACY_UNSUPPORTED)
+        data = yield from self._iter_extract_layout(rgb, seed, *found, plan.band_rows, placement)
+        yield JobProgress(85, "Decrypting / validating header…")
+        return data, key_slots
+
+    def iter_extract_symmetric(self, stego_path: str, password: str) -> JobSteps[bytes]:
         if not password:
             raise StegoEngineError("Password required for symmetric extraction")
-        rgb, entropy_map, capacity_map = self._prepare_maps(stego_path)
-        seed = f"sym:{password}"
-        order = build_pixel_order(entropy_map, seed)
-        bits = extract_bits_low_level(rgb, order, capacity_map.reshape(-1))
-        return read_payload_symmetric_from_bits(bits, password)
+        data, _key_slots = yield from self._iter_extract_stream(stego_path, f"sym:{password}")
+        payload = read_payload_symmetric(data, password)
+        yield JobProgress(100, "Done.")
+        return payload
 
-    def extract_from_image_asymmetric(self, stego_path: str, private_key_path: str) -> bytes:
+    def iter_extract_asymmetric(self, stego_path: str, private_key_path: str) -> JobSteps[bytes]:
         if not private_key_path:
             raise StegoEngineError("Private key path is required")
-        rgb, entropy_map, capacity_map = self._prepare_maps(stego_path)
         private_key = load_private_key_pem(private_key_path)
         fingerprint = fingerprint_public_key(private_key.public_key())
-        seed = f"asym:{fingerprint}"
-        order = build_pixel_order(entropy_map, seed)
-        bits = extract_bits_low_level(rgb, order, capacity_map.reshape(-1))
-        return read_payload_asymmetric_from_bits(bits, private_key_path)
+        data, key_slots = yield from self._iter_extract_stream(stego_path, f"asym:{fingerprint}", private_key)
+        payload = read_payload_asymmetric(data, private_key_path, key_slots)
+        yield JobProgress(100, "Done.")
+        return payload
+
+    def extract_job(
+        self,
+        stego_path: str,
+        mode: str,
+        password: Optional[str] = None,
+        private_key_path: Optional[str] = None,
+        token: Optional[CancellationToken] = None,
+    ) -> Job[bytes]:
+        if mode == "password":
+            steps = self.iter_extract_symmetric(stego_path, password or "")
+        elif mode in ("public", "multi"):
+            steps = self.iter_extract_asymmetric(stego_path, private_key_path or "")
+        else:
+            raise StegoEngineError("Unsupported mode selected")
+        return Job(steps, token)
+
+    def extract_sharded(
+        self,
+        stego_paths: Sequence[str],
+        mode: str,
+        password: Optional[str] = None,
+        private_key_path: Optional[str] = None,
+        max_workers: Optional[int] = None,
+    ) -> bytes:
+        """Reassemble a payload written by ``EmbedController.embed_sharded``.
+
+        Stego images may be given in any order and are extracted concurrently.
+        """
+        if not stego_paths:
+            raise StegoEngineError("At least one stego image is required")
+
+        def extract(stego_path: str) -> bytes:
+            return self.extract_job(stego_path, mode, password, private_key_path).run()
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(stego_paths)) as pool:
+            records = list(pool.map(extract, stego_paths))
+        return reassemble_shards(unpack_shard(record) for record in records)
+
+    def extract_spec(self, spec: ExtractSpec) -> bytes:
+        return self.extract_job(spec.stego_path, spec.mode, spec.password, spec.private_key_path).run()
+
+    def batch_task(self, spec: ExtractSpec) -> BatchTask:
+        """Cost inputs and memory estimate of ``spec`` from its PNG header alone."""
+        try:
+            height, width = png_dimensions(spec.stego_path)
+            plan = plan_extract(height, width, self.max_memory_mb)
+        except StegoEngineError as exc:
+            return failed_task(spec.stego_path, "extract", exc)
+        return BatchTask(spec.stego_path, "extract", height * width, 0, plan.peak, self.extract_spec, (spec,))
+
+    def extract_batch(
+        self,
+        specs: Sequence[ExtractSpec],
+        max_workers: Optional[int] = None,
+        batch_memory_mb: Optional[int] = None,
+        cost_model: Optional[CostModel] = None,
+        processes: bool = True,
+        executor: Optional[Executor] = None,
+    ) -> BatchReport:
+        """Extract many images through ``util.scheduler.run_batch``; ``results`` holds the payloads.
+
+        ``processes=False`` runs the jobs on threads of this controller without spawning
+        or pickling; ``executor`` reuses a caller's pool instead.
+        """
+        tasks = [self.batch_task(spec) for spec in specs]
+        return run_batch(tasks, cost_model, max_workers, batch_memory_mb, processes, executor)
+
+    def extract_from_image_symmetric(self, stego_path: str, password: str) -> bytes:
+        return Job(self.iter_extract_symmetric(stego_path, password)).run()
+
+    def extract_from_image_asymmetric(self, stego_path: str, private_key_path: str) -> bytes:
+        return Job(self.iter_extract_asymmetric(stego_path, private_key_path)).run()
 
     def extract_from_image(self, stego_path: str, seed: str, aes_enabled: bool) -> bytes:
         # Legacy compatibility wrapper, treat seed as password
@@ -1,19 +1,26 @@
 """Low-level bit extraction logic."""
 from __future__ import annotations
 
-from typing import List
+from typing import Optional
 
-CHANNEL_ORDER = (2, 1, 0)
+import numpy as np
 
+from ..embedder.slots import iter_slot_chunks, raw_capacity, read_bits
 
-def extract_bits_low_level(stego_rgb: np.ndarray, order: np.ndarray, capacity_flat: np.ndarray) -> List[int]:
+
+def read_bits_prefix(
+    stego_rgb: np.ndarray,
+    order: np.ndarray,
+    capacity_flat: np.ndarray,
+    num_bits: Optional[int] = None,
+) -> np.ndarray:
+    """First ``num_bits`` LSBs along ``order`` with ``capacity_flat`` slots per pixel (all when ``None``).
+
+    Only the prefix of ``order`` that holds those bits is read, in vectorised chunks.
+    """
     flat = stego_rgb.reshape(-1, 3)
-    bits: List[int] = []
-    for pixel_index in order:
-        cap = int(capacity_flat[pixel_index])
-        if cap <= 0:
-            continue
-        for channel_offset in range(cap):
-            channel = CHANNEL_ORDER[channel_offset % len(CHANNEL_ORDER)]
-            bits.append(int(flat[pixel_index, channel] & 1))
-    return bits
+    chunks = [
+        read_bits(flat, part.slot_pixels, part.slot_channels)
+        for part in iter_slot_chunks(order, raw_capacity(capacity_flat), num_bits)
+    ]
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.uint8)
@@ -0,0 +1,127 @@
+"""Probe a directory of private keys against a stego image."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from ..util.asym_crypto import fingerprint_public_key, load_private_key_pem
+from ..util.exceptions import StegoEngineError
+from ..util.image_io import load_png
+from ..util.key_slots import open_key_slots, slot_candidates, unwrap_session_key
+from ..util.layout import read_layout
+from .bit_reader import read_payload_multi, read_payload_with_key
+from .extract_controller import ExtractController
+
+
+@dataclass(frozen=True)
+class KeyringEntry:
+    path: Path
+    fingerprint: str
+    private_key: rsa.RSAPrivateKey = field(repr=False, compare=False)
+
+    @property
+    def seed(self) -> str:
+        return f"asym:{self.fingerprint}"
+
+
+@dataclass(frozen=True)
+class KeyringMatch:
+    path: Path
+    fingerprint: str
+    payload: bytes
+
+
+class Keyring:
+    """Private keys parsed once, with their fingerprints and embedding seeds cached.
+
+    ``from_directory`` skips files that are not loadable RSA private keys and lists them
+    in ``skipped``. Key slot unwraps run on threads sharing the parsed keys; OpenSSL
+    releases the GIL while decrypting.
+    """
+
+    def __init__(self, entries: Sequence[KeyringEntry], max_workers: Optional[int] = None) -> None:
+        self.entries: List[KeyringEntry] = list(entries)
+        self.max_workers = max_workers
+        self.skipped: List[Path] = []
+        self._controller = ExtractController()
+
+    @classmethod
+    def from_directory(
+        cls,
+        directory: str | Path,
+        password: Optional[str] = None,
+        pattern: str = "*.pem",
+        max_workers: Optional[int] = None,
+    ) -> "Keyring":
+        entries = []
+        skipped = []
+        for path in sorted(Path(directory).glob(pattern)):
+            try:
+                private_key = load_private_key_pem(path, password)
+            except (ValueError, TypeError):
+                skipped.append(path)
+                continue
+            if not isinstance(private_key, rsa.RSAPrivateKey):
+                skipped.append(path)
+                continue
+            fingerprint = fingerprint_public_key(private_key.public_key())
+            entries.append(KeyringEntry(path, fingerprint, private_key))
+        keyring = cls(entries, max_workers)
+        keyring.skipped = skipped
+        return keyring
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def fingerprints(self) -> List[str]:
+        return [entry.fingerprint for entry in self.entries]
+
+    def extract_with_keyring(self, stego_path: str) -> KeyringMatch:
+        """Payload of ``stego_path`` for whichever key in the ring it was made for.
+
+        New-format streams are matched through their descriptors. Otherwise every key tries
+        the few multi-recipient key slots its hint points to, on a thread pool. Legacy
+        streams cannot be extracted (see ``ExtractController``), so they never match.
+        """
+        if not self.entries:
+            raise StegoEngineError("Keyring is empty")
+        rgb = load_png(stego_path)
+        match = self._match_layout(rgb) or self._match_multi(rgb)
+        if match is None:
+            raise StegoEngineError("No key in the keyring matches this image")
+        return match
+
+    def _match_multi(self, rgb: np.ndarray) -> Optional[KeyringMatch]:
+        candidates = [slot_candidates(rgb, entry.fingerprint) for entry in self.entries]
+        if not any(candidates):
+            return None
+        keys = [entry.private_key for entry in self.entries]
+        if len(keys) == 1:
+            found = [unwrap_session_key(keys[0], candidates[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                found = list(pool.map(unwrap_session_key, keys, candidates))
+        for entry, session_key in zip(self.entries, found):
+            if session_key is None:
+                continue
+            key_slots, placement = open_key_slots(rgb, session_key)
+            located = read_layout(rgb, key_slots.seed, placement.pixels())
+            if located is None:
+                raise StegoEngineError(f"Key {entry.path.name} matched but the stream descriptor is corrupted")
+            data = self._controller.read_layout_stream(rgb, key_slots.seed, *located, placement)
+            return KeyringMatch(entry.path, entry.fingerprint, read_payload_multi(data, key_slots))
+        return None
+
+    def _match_layout(self, rgb: np.ndarray) -> Optional[KeyringMatch]:
+        for entry in self.entries:
+            found = read_layout(rgb, entry.seed)
+            if found is not None:
+                data = self._controller.read_layout_stream(rgb, entry.seed, *found)
+                return KeyringMatch(entry.path, entry.fingerprint, read_payload_with_key(data, entry.private_key))
+        return None
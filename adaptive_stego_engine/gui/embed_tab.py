@@ -2,11 +2,10 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Set, Tuple
 
 import numpy as np
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QImage, QPixmap
 from PyQt6.QtWidgets import (
     QCheckBox,
     QComboBox,
@@ -25,17 +24,28 @@ from PyQt6.QtWidgets import (
 )
 
 from ..embedder.embed_controller import EmbedController, EmbedMetrics
-from ..util.image_io import load_png, save_png
-from ..util.exceptions import StegoEngineError
+from ..util.image_io import save_png
+from ..util.exceptions import JobCancelledError, StegoEngineError
+from ..util.jobs import CancellationToken, JobProgress
+from ..util.layout import StreamLayout
+from ..util.locked_cache import LockedCache
+from ..util.preview import Preview, build_preview
+from .preview import PreviewWorker, preview_pixmap
+
+# Overlay combo entries, in order: none, then ``util.preview.OVERLAY_RANGES`` names.
+OVERLAYS: Tuple[Optional[str], ...] = (None, "capacity", "entropy")
 
 
 class EmbedWorker(QThread):
     progress_changed = pyqtSignal(int, str)
-    finished_success = pyqtSignal(object, object)
+    finished_success = pyqtSignal(object, object, object)
     finished_error = pyqtSignal(str)
+    finished_cancelled = pyqtSignal()
 
     def __init__(
         self,
+        controller: EmbedController,
+        preview_target: Tuple[int, int],
         cover_path: str,
         secret_text: str,
         mode: str,
@@ -44,47 +54,59 @@ class EmbedWorker(QThread):
         public_key_path: Optional[str],
     ) -> None:
         super().__init__()
+        self.controller = controller
+        self.preview_target = preview_target
         self.cover_path = cover_path
         self.secret_text = secret_text
         self.mode = mode
         self.password = password
         self.aes_enabled = aes_enabled
         self.public_key_path = public_key_path
+        self.token = CancellationToken()
+
+    def cancel(self) -> None:
+        self.token.cancel()
+
+    def _emit_progress(self, progress: JobProgress) -> None:
+        self.progress_changed.emit(progress.percent, progress.message)
 
     def run(self) -> None:
-        controller = EmbedController()
         try:
-            self.progress_changed.emit(5, "Loading cover image…")
-            self.progress_changed.emit(25, "Analyzing texture…")
-            stego, metrics = controller.embed_from_text(
+            job = self.controller.embed_job(
                 cover_path=self.cover_path,
                 secret_text=self.secret_text,
                 mode=self.mode,
                 password=self.password,
                 aes_enabled=self.aes_enabled,
                 public_key_path=self.public_key_path,
+                # Only new-format streams can be extracted again.
+                layout=StreamLayout(),
+                token=self.token,
             )
-            self.progress_changed.emit(75, "Embedding payload…")
-            self.progress_changed.emit(90, "Computing quality metrics…")
-            self.progress_changed.emit(100, "Done.")
-            self.finished_success.emit(stego, metrics)
+            stego, metrics = job.run(self._emit_progress)
+            self._emit_progress(JobProgress(100, "Building preview…"))
+            # The embed left the cover's analysis in the controller's session cache.
+            preview = build_preview(stego, self.preview_target, self.controller.cached_maps(self.cover_path))
+            self.finished_success.emit(stego, metrics, preview)
+        except JobCancelledError:  # pragma: no cover - GUI path
+            self.finished_cancelled.emit()
         except Exception as exc:  # pragma: no cover - GUI path
             self.finished_error.emit(str(exc))
 
 
-def _array_to_pixmap(arr: np.ndarray) -> QPixmap:
-    h, w, _ = arr.shape
-    image = QImage(arr.data, w, h, 3 * w, QImage.Format.Format_RGB888)
-    return QPixmap.fromImage(image.copy())
-
-
 class EmbedTab(QWidget):
     def __init__(self) -> None:
         super().__init__()
         self.cover_path: Optional[str] = None
-        self.cover_image: Optional[np.ndarray] = None
+        self.preview: Optional[Preview] = None
+        self.preview_worker: Optional[PreviewWorker] = None
+        # Superseded workers stay referenced until their thread ends.
+        self._preview_workers: Set[PreviewWorker] = set()
         self.stego_image: Optional[np.ndarray] = None
         self.public_key_path: Optional[str] = None
+        # Keeps the last cover's analysis, so re-embedding into it skips decoding and
+        # analysis and the heatmap overlays come from its maps.
+        self.controller = EmbedController(sessions=LockedCache(maxsize=1))
 
         self._build_ui()
 
@@ -99,9 +121,15 @@ class EmbedTab(QWidget):
         self.cover_preview.setFixedSize(240, 240)
         self.cover_preview.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.cover_info = QLabel("–")
+        self.overlay_combo = QComboBox()
+        self.overlay_combo.addItems(["No overlay", "Capacity heatmap", "Entropy heatmap"])
+        self.overlay_combo.currentIndexChanged.connect(self._render_preview)
+        cover_info_layout = QVBoxLayout()
+        cover_info_layout.addWidget(self.cover_info)
+        cover_info_layout.addWidget(self.overlay_combo)
         cover_layout.addWidget(self.cover_button)
         cover_layout.addWidget(self.cover_preview)
-        cover_layout.addWidget(self.cover_info)
+        cover_layout.addLayout(cover_info_layout)
         cover_group.setLayout(cover_layout)
 
         payload_group = QGroupBox("Payload")
@@ -144,7 +172,11 @@ class EmbedTab(QWidget):
         self.save_button = QPushButton("Save Stego…")
         self.save_button.setEnabled(False)
         self.save_button.clicked.connect(self._save_stego)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self._cancel_embedding)
         controls_layout.addWidget(self.run_button)
+        controls_layout.addWidget(self.cancel_button)
         controls_layout.addWidget(self.save_button)
 
         progress_layout = QHBoxLayout()
@@ -167,16 +199,36 @@ class EmbedTab(QWidget):
         path, _ = QFileDialog.getOpenFileName(self, "Select Cover PNG", str(Path.home()), "PNG Images (*.png)")
         if not path:
             return
-        try:
-            img = load_png(path)
-        except StegoEngineError as exc:
-            QMessageBox.critical(self, "Invalid Cover", str(exc))
+        self.cover_info.setText("Loading preview…")
+        worker = PreviewWorker(path, self.cover_preview.size(), self.controller.cached_maps(path))
+        worker.finished_success.connect(lambda preview: self._on_cover_preview(worker, path, preview))
+        worker.finished_error.connect(lambda message: self._on_cover_error(worker, message))
+        worker.finished.connect(lambda: self._preview_workers.discard(worker))
+        self.preview_worker = worker
+        self._preview_workers.add(worker)
+        worker.start()
+
+    def _on_cover_preview(self, worker: PreviewWorker, path: str, preview: Preview) -> None:
+        if worker is not self.preview_worker:  # a later selection superseded this one
             return
         self.cover_path = path
-        self.cover_image = img
-        pixmap = _array_to_pixmap(img)
-        self.cover_preview.setPixmap(pixmap.scaled(self.cover_preview.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-        self.cover_info.setText(f"{img.shape[1]}×{img.shape[0]}")
+        self.preview = preview
+        self.cover_info.setText(f"{preview.width}×{preview.height}")
+        self._render_preview()
+
+    def _on_cover_error(self, worker: PreviewWorker, message: str) -> None:
+        if worker is not self.preview_worker:
+            return
+        self.cover_info.setText(f"{self.preview.width}×{self.preview.height}" if self.preview else "–")
+        QMessageBox.critical(self, "Invalid Cover", message)
+
+    def _render_preview(self) -> None:
+        if self.preview is None:
+            return
+        overlay = OVERLAYS[self.overlay_combo.currentIndex()]
+        if overlay is not None and overlay not in self.preview.overlays:
+            self.status_label.setText("Heatmaps are available once an embed has analysed this cover.")
+        self.cover_preview.setPixmap(preview_pixmap(self.preview, self.cover_preview.size(), overlay))
 
     def _load_text_file(self) -> None:
         path, _ = QFileDialog.getOpenFileName(self, "Load Text", str(Path.home()), "Text Files (*.txt)")
@@ -229,7 +281,10 @@ class EmbedTab(QWidget):
         self.progress_bar.setValue(0)
         self.status_label.setText("Preparing…")
         self.run_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
         self.worker = EmbedWorker(
+            controller=self.controller,
+            preview_target=(self.cover_preview.height(), self.cover_preview.width()),
             cover_path=self.cover_path,
             secret_text=payload_text,
             mode=mode,
@@ -240,18 +295,25 @@ class EmbedTab(QWidget):
         self.worker.progress_changed.connect(self._on_progress)
         self.worker.finished_success.connect(self._on_embed_finished)
         self.worker.finished_error.connect(self._on_embed_error)
+        self.worker.finished_cancelled.connect(self._on_embed_cancelled)
         self.worker.start()
 
+    def _cancel_embedding(self) -> None:
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText("Cancelling…")
+        self.worker.cancel()
+
     def _on_progress(self, value: int, text: str) -> None:
         self.progress_bar.setValue(value)
         self.status_label.setText(text)
 
-    def _on_embed_finished(self, stego: np.ndarray, metrics: EmbedMetrics) -> None:
+    def _on_embed_finished(self, stego: np.ndarray, metrics: EmbedMetrics, preview: Preview) -> None:
         self.run_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
         self.save_button.setEnabled(True)
         self.stego_image = stego
-        pixmap = _array_to_pixmap(stego)
-        self.cover_preview.setPixmap(pixmap.scaled(self.cover_preview.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        self.preview = preview
+        self._render_preview()
         self.status_label.setText(
             f"Embed complete – PSNR {metrics.psnr:.2f} dB, SSIM {metrics.ssim:.4f}, drift {metrics.hist_drift:.4f}"
         )
@@ -259,10 +321,17 @@ class EmbedTab(QWidget):
 
     def _on_embed_error(self, message: str) -> None:
         self.run_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
         self.status_label.setText("Idle.")
         self.progress_bar.setValue(0)
         QMessageBox.critical(self, "Embedding Failed", message)
 
+    def _on_embed_cancelled(self) -> None:
+        self.run_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText("Cancelled.")
+        self.progress_bar.setValue(0)
+
     def _save_stego(self) -> None:
         if self.stego_image is None:
             return
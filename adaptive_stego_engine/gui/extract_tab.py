@@ -2,10 +2,9 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Set
 
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QImage, QPixmap
 from PyQt6.QtWidgets import (
     QCheckBox,
     QComboBox,
@@ -24,20 +23,17 @@ from PyQt6.QtWidgets import (
 )
 
 from ..extractor.extract_controller import ExtractController
-from ..util.exceptions import StegoEngineError
-from ..util.image_io import load_png
-
-
-def _array_to_pixmap(arr):
-    h, w, _ = arr.shape
-    image = QImage(arr.data, w, h, 3 * w, QImage.Format.Format_RGB888)
-    return QPixmap.fromImage(image.copy())
+from ..util.exceptions import JobCancelledError
+from ..util.jobs import CancellationToken, JobProgress
+from ..util.preview import Preview
+from .preview import PreviewWorker, preview_pixmap
 
 
 class ExtractWorker(QThread):
     progress_changed = pyqtSignal(int, str)
     finished_success = pyqtSignal(str)
     finished_error = pyqtSignal(str)
+    finished_cancelled = pyqtSignal()
 
     def __init__(
         self,
@@ -51,20 +47,29 @@ class ExtractWorker(QThread):
         self.mode = mode
         self.password = password
         self.private_key_path = private_key_path
+        self.token = CancellationToken()
+
+    def cancel(self) -> None:
+        self.token.cancel()
+
+    def _emit_progress(self, progress: JobProgress) -> None:
+        self.progress_changed.emit(progress.percent, progress.message)
 
     def run(self) -> None:
         controller = ExtractController()
         try:
-            self.progress_changed.emit(5, "Loading stego image…")
-            self.progress_changed.emit(25, "Analyzing texture…")
-            if self.mode == "password":
-                payload = controller.extract_from_image_symmetric(self.stego_path, self.password or "")
-            else:
-                payload = controller.extract_from_image_asymmetric(self.stego_path, self.private_key_path or "")
-            self.progress_changed.emit(75, "Decrypting / validating header…")
+            job = controller.extract_job(
+                self.stego_path,
+                self.mode,
+                password=self.password,
+                private_key_path=self.private_key_path,
+                token=self.token,
+            )
+            payload = job.run(self._emit_progress)
             text = payload.decode("utf-8", errors="replace")
-            self.progress_changed.emit(100, "Done.")
             self.finished_success.emit(text)
+        except JobCancelledError:  # pragma: no cover - GUI path
+            self.finished_cancelled.emit()
         except Exception as exc:  # pragma: no cover - GUI path
             self.finished_error.emit(str(exc))
 
@@ -74,6 +79,9 @@ class ExtractTab(QWidget):
         super().__init__()
         self.stego_path: Optional[str] = None
         self.private_key_path: Optional[str] = None
+        self.preview_worker: Optional[PreviewWorker] = None
+        # Superseded workers stay referenced until their thread ends.
+        self._preview_workers: Set[PreviewWorker] = set()
         self._build_ui()
 
     def _build_ui(self) -> None:
@@ -128,7 +136,11 @@ class ExtractTab(QWidget):
         controls = QHBoxLayout()
         self.run_button = QPushButton("Run Extraction")
         self.run_button.clicked.connect(self._run_extraction)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self._cancel_extraction)
         controls.addWidget(self.run_button)
+        controls.addWidget(self.cancel_button)
 
         progress_layout = QHBoxLayout()
         self.progress_bar = QProgressBar()
@@ -149,15 +161,27 @@ class ExtractTab(QWidget):
         path, _ = QFileDialog.getOpenFileName(self, "Select Stego PNG", str(Path.home()), "PNG Images (*.png)")
         if not path:
             return
-        try:
-            img = load_png(path)
-        except StegoEngineError as exc:
-            QMessageBox.critical(self, "Invalid Image", str(exc))
+        self.info_label.setText("Loading preview…")
+        worker = PreviewWorker(path, self.preview.size())
+        worker.finished_success.connect(lambda preview: self._on_preview(worker, path, preview))
+        worker.finished_error.connect(lambda message: self._on_preview_error(worker, message))
+        worker.finished.connect(lambda: self._preview_workers.discard(worker))
+        self.preview_worker = worker
+        self._preview_workers.add(worker)
+        worker.start()
+
+    def _on_preview(self, worker: PreviewWorker, path: str, preview: Preview) -> None:
+        if worker is not self.preview_worker:  # a later selection superseded this one
             return
         self.stego_path = path
-        pixmap = _array_to_pixmap(img)
-        self.preview.setPixmap(pixmap.scaled(self.preview.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-        self.info_label.setText(f"{img.shape[1]}×{img.shape[0]}")
+        self.preview.setPixmap(preview_pixmap(preview, self.preview.size()))
+        self.info_label.setText(f"{preview.width}×{preview.height}")
+
+    def _on_preview_error(self, worker: PreviewWorker, message: str) -> None:
+        if worker is not self.preview_worker:
+            return
+        self.info_label.setText("–")
+        QMessageBox.critical(self, "Invalid Image", message)
 
     def _select_private_key(self) -> None:
         path, _ = QFileDialog.getOpenFileName(self, "Select Private Key", str(Path.home()), "PEM Files (*.pem)")
@@ -193,6 +217,7 @@ class ExtractTab(QWidget):
             QMessageBox.warning(self, "Key Required", "Select private key PEM used for embedding.")
             return
         self.run_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
         self.progress_bar.setValue(0)
         self.status_label.setText("Working…")
         self.worker = ExtractWorker(
@@ -204,24 +229,38 @@ class ExtractTab(QWidget):
         self.worker.progress_changed.connect(self._on_progress)
         self.worker.finished_success.connect(self._on_success)
         self.worker.finished_error.connect(self._on_error)
+        self.worker.finished_cancelled.connect(self._on_cancelled)
         self.worker.start()
 
+    def _cancel_extraction(self) -> None:
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText("Cancelling…")
+        self.worker.cancel()
+
     def _on_progress(self, value: int, text: str) -> None:
         self.progress_bar.setValue(value)
         self.status_label.setText(text)
 
     def _on_success(self, text: str) -> None:
         self.run_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
         self.progress_bar.setValue(100)
         self.status_label.setText("Extraction complete.")
         self.output_edit.setPlainText(text)
 
     def _on_error(self, message: str) -> None:
         self.run_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
         self.progress_bar.setValue(0)
         self.status_label.setText("Idle.")
         QMessageBox.critical(self, "Extraction Failed", message)
 
+    def _on_cancelled(self) -> None:
+        self.run_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.status_label.setText("Cancelled.")
+
     def _save_text(self) -> None:
         text = self.output_edit.toPlainText()
         if not text:
@@ -1,22 +1,68 @@
 """Main window hosting tabs."""
 from __future__ import annotations
 
-from PyQt6.QtWidgets import QMainWindow, QTabWidget
+from typing import Callable, Dict, List, Optional, Tuple
 
-from .embed_tab import EmbedTab
-from .extract_tab import ExtractTab
-from .key_tab import KeyTab
+from PyQt6.QtWidgets import QMainWindow, QTabWidget, QWidget
 
 
 class MainWindow(QMainWindow):
+    """Tabs are built when first shown, so startup only pays for the Embed tab."""
+
     def __init__(self) -> None:
         super().__init__()
         self.setWindowTitle("Adaptive Steganography Engine v3.0.0")
-        tabs = QTabWidget()
-        self.embed_tab = EmbedTab()
-        self.extract_tab = ExtractTab()
-        self.key_tab = KeyTab(self.embed_tab, self.extract_tab)
-        tabs.addTab(self.embed_tab, "Embed")
-        tabs.addTab(self.extract_tab, "Extract")
-        tabs.addTab(self.key_tab, "Keys")
-        self.setCentralWidget(tabs)
+        self.tabs = QTabWidget()
+        self._tab_specs: List[Tuple[str, Callable[[], QWidget]]] = [
+            ("Embed", self._build_embed_tab),
+            ("Extract", self._build_extract_tab),
+            ("Keys", self._build_key_tab),
+        ]
+        self._built: Dict[int, QWidget] = {}
+        for title, _factory in self._tab_specs:
+            self.tabs.addTab(QWidget(), title)
+        self.tabs.currentChanged.connect(self._ensure_tab)
+        self.setCentralWidget(self.tabs)
+        self._ensure_tab(0)
+
+    def _ensure_tab(self, index: int) -> Optional[QWidget]:
+        if index < 0:
+            return None
+        if index not in self._built:
+            title, factory = self._tab_specs[index]
+            widget = factory()
+            self._built[index] = widget
+            current = self.tabs.currentIndex()
+            self.tabs.blockSignals(True)
+            self.tabs.removeTab(index)
+            self.tabs.insertTab(index, widget, title)
+            self.tabs.setCurrentIndex(current)
+            self.tabs.blockSignals(False)
+        return self._built[index]
+
+    @property
+    def embed_tab(self) -> QWidget:
+        return self._ensure_tab(0)
+
+    @property
+    def extract_tab(self) -> QWidget:
+        return self._ensure_tab(1)
+
+    @property
+    def key_tab(self) -> QWidget:
+        return self._ensure_tab(2)
+
+    def _build_embed_tab(self) -> QWidget:
+        from .embed_tab import EmbedTab
+
+        return EmbedTab()
+
+    def _build_extract_tab(self) -> QWidget:
+        from .extract_tab import ExtractTab
+
+        return ExtractTab()
+
+    def _build_key_tab(self) -> QWidget:
+        from .key_tab import KeyTab
+
+        return KeyTab(self.embed_tab, self.extract_tab)
@@ -0,0 +1,54 @@
+"""Preview loading off the GUI thread and preview pixmaps with optional heatmaps."""
+from __future__ import annotations
+
+import os
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+from PyQt6.QtCore import QSize, Qt, QThread, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+
+from ..util.preview import OVERLAY_RANGES, Preview, build_preview, heatmap_overlay
+
+
+def array_to_pixmap(arr: np.ndarray) -> QPixmap:
+    arr = np.ascontiguousarray(arr)
+    h, w, _ = arr.shape
+    image = QImage(arr.data, w, h, 3 * w, QImage.Format.Format_RGB888)
+    return QPixmap.fromImage(image.copy())
+
+
+def preview_pixmap(preview: Preview, size: QSize, overlay: Optional[str] = None) -> QPixmap:
+    """``preview`` aspect-fitted into ``size``, with the named overlay blended when the preview has it."""
+    image = preview.image
+    if overlay in preview.overlays:
+        image = heatmap_overlay(image, preview.overlays[overlay], OVERLAY_RANGES[overlay])
+    pixmap = array_to_pixmap(image)
+    return pixmap.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+
+class PreviewWorker(QThread):
+    """Decodes and reduces an image (and its analysis maps) to the pyramid level fitting ``size``."""
+
+    finished_success = pyqtSignal(object)
+    finished_error = pyqtSignal(str)
+
+    def __init__(
+        self,
+        source: Union[str, os.PathLike[str], np.ndarray],
+        size: QSize,
+        maps: Optional[Dict[str, np.ndarray]] = None,
+    ) -> None:
+        super().__init__()
+        self.source = source
+        self.target: Tuple[int, int] = (size.height(), size.width())
+        self.maps = maps
+
+    def run(self) -> None:
+        try:
+            self.finished_success.emit(build_preview(self.source, self.target, self.maps))
+        except Exception as exc:  # pragma: no cover - GUI path
+            self.finished_error.emit(str(exc))
+        finally:
+            # The worker may outlive the preview; do not keep the full-size inputs alive.
+            self.source = self.maps = None
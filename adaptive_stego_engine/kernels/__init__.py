@@ -0,0 +1,102 @@
+"""Registry of interchangeable implementations of the hot per-pixel kernels.
+
+``reference`` holds straightforward scalar definitions, ``numpy`` the vectorised
+kernels used by default and ``numba`` JIT-compiled loops, available only when numba is
+installed. Every backend must produce bit-identical results; the ``backends`` benchmark
+suite checks this on random covers. The active backend comes from ``set_backend`` or
+the ``STEGO_KERNEL_BACKEND`` environment variable.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..util.exceptions import StegoEngineError
+
+BACKEND_ENV_VAR = "STEGO_KERNEL_BACKEND"
+DEFAULT_BACKEND = "numpy"
+# Backend name -> module defining ``BACKEND``; modules are imported on first use.
+BACKEND_MODULES = {
+    "reference": "reference",
+    "numpy": "numpy_backend",
+    "numba": "numba_backend",
+}
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class KernelBackend:
+    name: str
+    # (gray, flat pixel indices, requested capacities) -> noise-adjusted capacities (int64).
+    adjust_capacity: Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+    # (pixels, per-pixel capacities) -> (slot pixels int64, slot channels uint8).
+    expand_slots: Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+    # (flat N×3 image, slot pixels, slot channels, bits) -> None, writing LSBs in place.
+    write_bits: Callable[[np.ndarray, np.ndarray, np.ndarray, np.ndarray], None]
+    # (flat N×3 image, slot pixels, slot channels) -> LSBs (uint8).
+    read_bits: Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+    # uint8-valued grayscale -> normalised local entropy map (float32).
+    compute_entropy: Callable[[np.ndarray], np.ndarray]
+
+
+_lock = threading.Lock()
+_loaded: Dict[str, KernelBackend] = {}
+_active: Optional[KernelBackend] = None
+
+
+def get_backend(name: str) -> KernelBackend:
+    """The backend called ``name``; raises when it is unknown or cannot be imported."""
+    if name not in BACKEND_MODULES:
+        raise StegoEngineError(f"Unknown kernel backend {name!r}; choose one of {', '.join(BACKEND_MODULES)}")
+    with _lock:
+        if name not in _loaded:
+            try:
+                module = importlib.import_module(f".{BACKEND_MODULES[name]}", __name__)
+            except ImportError as exc:
+                raise StegoEngineError(f"Kernel backend {name!r} is not available: {exc}") from exc
+            _loaded[name] = module.BACKEND
+        return _loaded[name]
+
+
+def available_backends() -> List[str]:
+    names = []
+    for name in BACKEND_MODULES:
+        try:
+            get_backend(name)
+        except StegoEngineError:
+            continue
+        names.append(name)
+    return names
+
+
+def set_backend(name: Optional[str]) -> KernelBackend:
+    """Make ``name`` (``None``: the environment default) the active backend for all threads."""
+    global _active
+    backend = get_backend(name) if name is not None else _default_backend()
+    _active = backend
+    return backend
+
+
+def _default_backend() -> KernelBackend:
+    name = os.environ.get(BACKEND_ENV_VAR) or DEFAULT_BACKEND
+    try:
+        return get_backend(name)
+    except StegoEngineError:
+        if name not in BACKEND_MODULES:
+            raise
+        logger.warning("Kernel backend %r is not available; using %r", name, DEFAULT_BACKEND)
+        return get_backend(DEFAULT_BACKEND)
+
+
+def active_backend() -> KernelBackend:
+    global _active
+    if _active is None:
+        _active = _default_backend()
+    return _active
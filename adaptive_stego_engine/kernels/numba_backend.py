@@ -0,0 +1,117 @@
+"""Numba JIT kernels; importing this module fails when numba is not installed.
+
+The entropy kernel stays on NumPy/SciPy: its float32 ``log2`` has to match NumPy's
+bit for bit, which a compiled libm call does not guarantee.
+"""
+from __future__ import annotations
+
+import numba
+import numpy as np
+
+from ..analyzer.entropy import entropy_by_levels
+from ..embedder.noise_predictor import DEVIATION_THRESHOLDS, DEVIATION_TIE, NEIGHBOR_KERNEL, adjust_capacity_for_pixel
+from ..embedder.slots import CHANNEL_ORDER
+from . import KernelBackend
+from .numpy_backend import adjust_capacity as adjust_capacity_numpy
+
+_NEIGHBOR_DY = np.array([dy for dy, _dx in NEIGHBOR_KERNEL], dtype=np.int64)
+_NEIGHBOR_DX = np.array([dx for _dy, dx in NEIGHBOR_KERNEL], dtype=np.int64)
+_THRESHOLDS = np.array(DEVIATION_THRESHOLDS, dtype=np.float64)
+_CHANNEL_LUT = np.array(CHANNEL_ORDER, dtype=np.uint8)
+
+
+@numba.njit(nogil=True)
+def _adjust_kernel(gray, flat_indices, requested_caps, dy, dx, thresholds, tie, adjusted, near_tie):
+    height, width = gray.shape
+    for i in range(flat_indices.size):
+        y = flat_indices[i] // width
+        x = flat_indices[i] % width
+        cap = requested_caps[i]
+        total = np.float32(0.0)
+        count = 0
+        for k in range(dy.size):
+            ny = y + dy[k]
+            nx = x + dx[k]
+            if 0 <= ny < height and 0 <= nx < width:
+                total = np.float32(total + gray[ny, nx])
+                count += 1
+        if count == 0:
+            adjusted[i] = min(1, cap)
+            continue
+        mean = np.float32(total / np.float32(count))
+        deviation = abs(np.float64(gray[y, x]) - np.float64(mean))
+        adjusted[i] = 0
+        for step in range(thresholds.size):
+            if deviation < thresholds[step]:
+                adjusted[i] = cap if step == 0 else max(1, cap - step)
+                break
+        for threshold in thresholds:
+            if abs(deviation - threshold) < tie:
+                near_tie[i] = True
+
+
+def adjust_capacity(gray: np.ndarray, flat_indices: np.ndarray, requested_caps: np.ndarray) -> np.ndarray:
+    if gray.dtype != np.float32:
+        return adjust_capacity_numpy(gray, flat_indices, requested_caps)
+    flat_indices = np.ascontiguousarray(flat_indices, dtype=np.int64)
+    requested_caps = np.ascontiguousarray(requested_caps, dtype=np.int64)
+    adjusted = np.empty(flat_indices.size, dtype=np.int64)
+    near_tie = np.zeros(flat_indices.size, dtype=np.bool_)
+    _adjust_kernel(gray, flat_indices, requested_caps, _NEIGHBOR_DY, _NEIGHBOR_DX, _THRESHOLDS, DEVIATION_TIE, adjusted, near_tie)
+    width = gray.shape[1]
+    for i in np.flatnonzero(near_tie):
+        index = int(flat_indices[i])
+        adjusted[i] = adjust_capacity_for_pixel(gray, index // width, index % width, int(requested_caps[i]))
+    return adjusted
+
+
+@numba.njit(nogil=True)
+def _expand_kernel(pixels, caps, lut, slot_pixels, slot_channels):
+    slot = 0
+    for i in range(pixels.size):
+        for offset in range(caps[i]):
+            slot_pixels[slot] = pixels[i]
+            slot_channels[slot] = lut[offset % lut.size]
+            slot += 1
+
+
+def expand_slots(pixels: np.ndarray, caps: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    pixels = np.ascontiguousarray(pixels, dtype=np.int64)
+    caps = np.ascontiguousarray(caps, dtype=np.int64)
+    total = int(caps[caps > 0].sum())
+    slot_pixels = np.empty(total, dtype=np.int64)
+    slot_channels = np.empty(total, dtype=np.uint8)
+    _expand_kernel(pixels, caps, _CHANNEL_LUT, slot_pixels, slot_channels)
+    return slot_pixels, slot_channels
+
+
+@numba.njit(nogil=True)
+def _write_kernel(flat, pixels, channels, bits):
+    for i in range(pixels.size):
+        flat[pixels[i], channels[i]] = (flat[pixels[i], channels[i]] & np.uint8(0xFE)) | bits[i]
+
+
+@numba.njit(nogil=True)
+def _read_kernel(flat, pixels, channels, out):
+    for i in range(pixels.size):
+        out[i] = flat[pixels[i], channels[i]] & np.uint8(1)
+
+
+def write_bits(flat: np.ndarray, pixels: np.ndarray, channels: np.ndarray, bits: np.ndarray) -> None:
+    _write_kernel(flat, pixels, channels, bits.astype(np.uint8, copy=False))
+
+
+def read_bits(flat: np.ndarray, pixels: np.ndarray, channels: np.ndarray) -> np.ndarray:
+    out = np.empty(len(pixels), dtype=np.uint8)
+    _read_kernel(flat, pixels, channels, out)
+    return out
+
+
+BACKEND = KernelBackend(
+    name="numba",
+    adjust_capacity=adjust_capacity,
+    expand_slots=expand_slots,
+    write_bits=write_bits,
+    read_bits=read_bits,
+    compute_entropy=entropy_by_levels,
+)
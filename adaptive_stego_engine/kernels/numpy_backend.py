@@ -0,0 +1,80 @@
+"""Vectorised NumPy kernels, the default backend."""
+from __future__ import annotations
+
+import numpy as np
+
+from ..analyzer.entropy import entropy_by_levels
+from ..embedder.noise_predictor import DEVIATION_THRESHOLDS, DEVIATION_TIE, NEIGHBOR_KERNEL, adjust_capacity_for_pixel
+from ..embedder.slots import CHANNEL_ORDER, LSB_CLEAR_MASK
+from . import KernelBackend
+
+_CHANNEL_LUT = np.array(CHANNEL_ORDER, dtype=np.uint8)
+
+
+def adjust_capacity(gray: np.ndarray, flat_indices: np.ndarray, requested_caps: np.ndarray) -> np.ndarray:
+    """Vectorised ``adjust_capacity_for_pixel`` over flat pixel indices.
+
+    Neighbour means are accumulated in float32 in the same order ``np.mean`` uses, and
+    near-threshold deviations fall back to the scalar predictor, so results are identical.
+    """
+    h, w = gray.shape
+    flat_indices = np.asarray(flat_indices, dtype=np.int64)
+    requested_caps = np.asarray(requested_caps, dtype=np.int64)
+    ys, xs = np.divmod(flat_indices, w)
+    values = np.empty((len(NEIGHBOR_KERNEL), flat_indices.size), dtype=np.float32)
+    valid = np.empty((len(NEIGHBOR_KERNEL), flat_indices.size), dtype=bool)
+    for k, (dy, dx) in enumerate(NEIGHBOR_KERNEL):
+        ny, nx = ys + dy, xs + dx
+        valid[k] = (ny >= 0) & (ny < h) & (nx >= 0) & (nx < w)
+        values[k] = gray[np.clip(ny, 0, h - 1), np.clip(nx, 0, w - 1)]
+    counts = valid.sum(axis=0)
+
+    # np.mean sums fewer than eight values sequentially and exactly eight pairwise.
+    sequential = np.zeros(flat_indices.size, dtype=np.float32)
+    for k in range(len(NEIGHBOR_KERNEL)):
+        sequential = np.where(valid[k], sequential + values[k], sequential)
+    v = values
+    pairwise = ((v[0] + v[1]) + (v[2] + v[3])) + ((v[4] + v[5]) + (v[6] + v[7]))
+    sums = np.where(counts == len(NEIGHBOR_KERNEL), pairwise, sequential)
+    means = sums / np.maximum(counts, 1).astype(np.float32)
+    deviation = np.abs(gray[ys, xs].astype(np.float64) - means.astype(np.float64))
+
+    # Built from the last threshold inwards: beyond every threshold all capacity is lost.
+    adjusted = np.zeros(flat_indices.size, dtype=np.int64)
+    for step in reversed(range(len(DEVIATION_THRESHOLDS))):
+        kept = requested_caps if step == 0 else np.maximum(1, requested_caps - step)
+        adjusted = np.where(deviation < DEVIATION_THRESHOLDS[step], kept, adjusted)
+    adjusted = np.where(counts == 0, np.minimum(1, requested_caps), adjusted)
+    near_tie = np.zeros(flat_indices.size, dtype=bool)
+    for threshold in DEVIATION_THRESHOLDS:
+        near_tie |= np.abs(deviation - threshold) < DEVIATION_TIE
+    for i in np.flatnonzero(near_tie & (counts > 0)):
+        adjusted[i] = adjust_capacity_for_pixel(gray, int(ys[i]), int(xs[i]), int(requested_caps[i]))
+    return adjusted
+
+
+def expand_slots(pixels: np.ndarray, caps: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    writers = np.flatnonzero(caps > 0)
+    counts = caps[writers]
+    starts = np.cumsum(counts) - counts
+    offsets = np.arange(int(counts.sum())) - np.repeat(starts, counts)
+    return np.repeat(pixels[writers], counts), _CHANNEL_LUT[offsets % len(CHANNEL_ORDER)]
+
+
+def write_bits(flat: np.ndarray, pixels: np.ndarray, channels: np.ndarray, bits: np.ndarray) -> None:
+    current = flat[pixels, channels]
+    flat[pixels, channels] = (current & LSB_CLEAR_MASK) | bits.astype(np.uint8, copy=False)
+
+
+def read_bits(flat: np.ndarray, pixels: np.ndarray, channels: np.ndarray) -> np.ndarray:
+    return flat[pixels, channels] & np.uint8(1)
+
+
+BACKEND = KernelBackend(
+    name="numpy",
+    adjust_capacity=adjust_capacity,
+    expand_slots=expand_slots,
+    write_bits=write_bits,
+    read_bits=read_bits,
+    compute_entropy=entropy_by_levels,
+)
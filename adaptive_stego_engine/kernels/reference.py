@@ -0,0 +1,52 @@
+"""Scalar reference kernels: one pixel or slot at a time, for differential checks."""
+from __future__ import annotations
+
+import numpy as np
+
+from ..analyzer.entropy import entropy_by_levels
+from ..embedder.noise_predictor import adjust_capacity_for_pixel
+from ..embedder.slots import CHANNEL_ORDER, LSB_CLEAR_MASK
+from . import KernelBackend
+
+
+def adjust_capacity(gray: np.ndarray, flat_indices: np.ndarray, requested_caps: np.ndarray) -> np.ndarray:
+    width = gray.shape[1]
+    return np.array(
+        [
+            adjust_capacity_for_pixel(gray, index // width, index % width, cap)
+            for index, cap in zip(np.asarray(flat_indices).tolist(), np.asarray(requested_caps).tolist())
+        ],
+        dtype=np.int64,
+    )
+
+
+def expand_slots(pixels: np.ndarray, caps: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    slot_pixels = []
+    slot_channels = []
+    for pixel, cap in zip(pixels.tolist(), caps.tolist()):
+        for offset in range(cap):
+            slot_pixels.append(pixel)
+            slot_channels.append(CHANNEL_ORDER[offset % len(CHANNEL_ORDER)])
+    return np.array(slot_pixels, dtype=np.int64), np.array(slot_channels, dtype=np.uint8)
+
+
+def write_bits(flat: np.ndarray, pixels: np.ndarray, channels: np.ndarray, bits: np.ndarray) -> None:
+    for pixel, channel, bit in zip(pixels.tolist(), channels.tolist(), bits.tolist()):
+        flat[pixel, channel] = (flat[pixel, channel] & LSB_CLEAR_MASK) | bit
+
+
+def read_bits(flat: np.ndarray, pixels: np.ndarray, channels: np.ndarray) -> np.ndarray:
+    return np.array(
+        [flat[pixel, channel] & 1 for pixel, channel in zip(pixels.tolist(), channels.tolist())],
+        dtype=np.uint8,
+    )
+
+
+BACKEND = KernelBackend(
+    name="reference",
+    adjust_capacity=adjust_capacity,
+    expand_slots=expand_slots,
+    write_bits=write_bits,
+    read_bits=read_bits,
+    compute_entropy=entropy_by_levels,
+)
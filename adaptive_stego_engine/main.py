@@ -1,10 +1,16 @@
 import sys
-from PyQt6.QtWidgets import QApplication
+from pathlib import Path
 
-from gui.main_window import MainWindow
+if __package__ in (None, ""):
+    # Allow ``python main.py`` from inside the package directory.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 
 def main() -> None:
+    from PyQt6.QtWidgets import QApplication
+
+    from adaptive_stego_engine.gui.main_window import MainWindow
+
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
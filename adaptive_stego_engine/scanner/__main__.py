@@ -0,0 +1,49 @@
+"""Command line scanner: ``python -m adaptive_stego_engine.scanner PATH...``.
+
+Prints one row per image and exits with status 1 when any image is flagged, so it can
+gate a batch of stego output before release.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from ..util.exceptions import StegoEngineError
+from .scan import DEFAULT_THRESHOLD, FOCUS_MODES, scan_directory, scan_paths
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LSB steganalysis scanner (chi-square, RS, sample pairs)")
+    parser.add_argument("paths", nargs="+", help="PNG files or directories")
+    parser.add_argument("--focus", choices=FOCUS_MODES, default="image")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--recursive", action="store_true", help="descend into subdirectories")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    try:
+        results = []
+        files = [path for path in args.paths if not Path(path).is_dir()]
+        results.extend(scan_paths(files, args.focus, args.threshold, args.workers))
+        for path in args.paths:
+            if Path(path).is_dir():
+                results.extend(scan_directory(path, args.focus, args.threshold, args.workers, args.recursive))
+    except StegoEngineError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    seconds = time.perf_counter() - start
+    for result in results:
+        print(
+            f"{'FLAG' if result.flagged else 'ok  '}  score={result.score:.3f}  chi={result.chi_square:.3f}"
+            f"  rs={result.rs:.3f}  spa={result.spa:.3f}  {result.path}"
+        )
+    megapixels = sum(result.shape[0] * result.shape[1] for result in results) / 1e6
+    flagged = sum(result.flagged for result in results)
+    print(f"{len(results)} images, {flagged} flagged, {megapixels:.1f} MP in {seconds:.2f} s ({megapixels / max(seconds, 1e-9):.1f} MP/s)")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
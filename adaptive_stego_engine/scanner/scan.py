@@ -0,0 +1,187 @@
+"""Per-image LSB detectability scores, for single images and whole directories."""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..util.exceptions import StegoEngineError
+from ..util.image_io import load_png
+from .statistics import ChiSquareCounts, RsCounts, SamplePairCounts, chi_square_counts, rs_counts, sample_pair_counts
+
+# "image" scans every pixel; "texture" only the pixels the adaptive embedder gives capacity.
+FOCUS_MODES = ("image", "texture")
+# Estimated embedding rates (fraction of samples carrying message bits) at or above this
+# are flagged; clean photographs typically estimate below 0.03, while strongly noisy covers
+# (such as the synthetic benchmark covers) can read higher and may need a raised threshold.
+DEFAULT_THRESHOLD = 0.05
+# The chi-square attack corroborates the rate estimates rather than overriding them: it
+# also reads p close to 1 on some clean, flat covers. A p-value above CHI_SQUARE_THRESHOLD
+# scales the highest rate estimate by up to 1 + CHI_SQUARE_WEIGHT, reached at p = 1, so
+# it can lift a borderline estimate over the threshold but never flags a clean estimate.
+CHI_SQUARE_THRESHOLD = 0.95
+CHI_SQUARE_WEIGHT = 1.0
+# The "texture" focus analyses and scans only evenly spaced row bands of FOCUS_BAND_ROWS
+# rows covering about FOCUS_SAMPLE_PIXELS pixels, so its cost barely grows with image size.
+FOCUS_BAND_ROWS = 64
+FOCUS_SAMPLE_PIXELS = 1 << 18
+# Within them it scans the FOCUS_BLOCK x FOCUS_BLOCK blocks at least half of whose pixels
+# have capacity. Selecting single pixels by their upper bits biases RS and sample pairs
+# (pairs differing only in their LSBs read as smooth and are dropped), so that clean
+# texture estimates negative and hides low embedding rates.
+FOCUS_BLOCK = 8
+
+
+@dataclass(frozen=True)
+class ScanResult:
+    path: str
+    shape: tuple
+    focus: str
+    samples: int
+    chi_square: float
+    rs: float
+    spa: float
+    threshold: float
+
+    @property
+    def score(self) -> float:
+        """Highest estimated embedding rate, raised when the chi-square attack agrees."""
+        support = max(0.0, self.chi_square - CHI_SQUARE_THRESHOLD) / (1.0 - CHI_SQUARE_THRESHOLD)
+        return min(1.0, max(self.rs, self.spa) * (1.0 + CHI_SQUARE_WEIGHT * support))
+
+    @property
+    def flagged(self) -> bool:
+        return self.score >= self.threshold
+
+
+def texture_bands(
+    rgb: np.ndarray,
+    sample_pixels: Optional[int] = FOCUS_SAMPLE_PIXELS,
+) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """``(start, stop, mask)`` of sampled row bands; ``mask`` marks the blocks mostly of capacity pixels.
+
+    The analysis runs on the LSB-cleared image, so the mask is identical on a cover and
+    any stego image made from it. Only the sampled bands and their halo rows are analysed,
+    once each, with the vectorised ``entropy_by_counts``. The gradient is normalised over
+    the sampled bands, so with ``sample_pixels=None`` (every band) the pixel capacities
+    are the embedder's up to float rounding, and otherwise approximate them.
+    """
+    from ..analyzer.entropy import entropy_by_counts
+    from ..analyzer.gradient import gradient_magnitude, normalise_gradient
+    from ..analyzer.region_classifier import compute_capacity_map
+    from ..analyzer.texture_map import TEXTURE_HALO, combine_surface, compute_gray
+    from ..embedder import capacity as capacity_module
+    from ..embedder.slots import LSB_CLEAR_MASK
+    from ..util.memory_plan import row_bands
+
+    height, width = rgb.shape[:2]
+    bands = list(row_bands(height, FOCUS_BAND_ROWS, TEXTURE_HALO))
+    wanted = len(bands) if sample_pixels is None else -(-sample_pixels // (FOCUS_BAND_ROWS * width))
+    picked = np.unique(np.linspace(0, len(bands) - 1, max(1, min(wanted, len(bands)))).round().astype(np.int64))
+    sampled = [bands[index] for index in picked.tolist()]
+    grays, gradients = [], []
+    for start, stop, lo, hi in sampled:
+        gray = compute_gray(rgb[lo:hi] & LSB_CLEAR_MASK)
+        grays.append(gray.astype(np.uint8))
+        gradients.append(gradient_magnitude(gray)[start - lo : stop - lo])
+    # Normalised together, as the embedder normalises the whole image.
+    gradient_map = normalise_gradient(np.concatenate(gradients))
+    offset = 0
+    for (start, stop, lo, hi), gray in zip(sampled, grays):
+        entropy_map = entropy_by_counts(gray)[start - lo : stop - lo]
+        surface_map = combine_surface(gradient_map[offset : offset + stop - start], entropy_map)
+        offset += stop - start
+        capacity = capacity_module.refine_capacity_map(compute_capacity_map(surface_map), surface_map)
+        yield start, stop, _block_majority(capacity > 0)
+
+
+def _block_majority(mask: np.ndarray) -> np.ndarray:
+    """``mask`` with each ``FOCUS_BLOCK`` square block set where at least half of it is set."""
+    height, width = mask.shape
+    rows, cols = -(-height // FOCUS_BLOCK), -(-width // FOCUS_BLOCK)
+    padded = np.zeros((rows * FOCUS_BLOCK, cols * FOCUS_BLOCK), dtype=np.uint8)
+    padded[:height, :width] = mask
+    counts = padded.reshape(rows, FOCUS_BLOCK, cols, FOCUS_BLOCK).sum(axis=(1, 3), dtype=np.int64)
+    # Edge blocks are judged on the pixels they have.
+    sizes = np.outer(
+        np.minimum(FOCUS_BLOCK, height - FOCUS_BLOCK * np.arange(rows)),
+        np.minimum(FOCUS_BLOCK, width - FOCUS_BLOCK * np.arange(cols)),
+    )
+    blocks = 2 * counts >= sizes
+    return np.repeat(np.repeat(blocks, FOCUS_BLOCK, axis=0), FOCUS_BLOCK, axis=1)[:height, :width]
+
+
+def scan_image(
+    rgb: np.ndarray,
+    focus: str = "image",
+    threshold: float = DEFAULT_THRESHOLD,
+    path: str = "",
+) -> ScanResult:
+    if focus not in FOCUS_MODES:
+        raise StegoEngineError(f"Unknown scan focus {focus!r}; choose one of {', '.join(FOCUS_MODES)}")
+    rgb = rgb[..., :3]
+    if focus == "image":
+        chi, rs, spa = chi_square_counts(rgb), rs_counts(rgb), sample_pair_counts(rgb)
+    else:
+        chi = ChiSquareCounts(np.zeros(256, dtype=np.int64))
+        rs = RsCounts(np.zeros((2, 4), dtype=np.int64))
+        spa = SamplePairCounts()
+        for start, stop, mask in texture_bands(rgb):
+            band = rgb[start:stop]
+            chi += chi_square_counts(band, mask)
+            rs += rs_counts(band, mask)
+            spa += sample_pair_counts(band, mask)
+    return ScanResult(
+        path=path,
+        shape=tuple(rgb.shape),
+        focus=focus,
+        samples=int(chi.histogram.sum()),
+        chi_square=chi.probability(),
+        rs=rs.rate(),
+        spa=spa.rate(),
+        threshold=threshold,
+    )
+
+
+def scan_file(path: str | os.PathLike[str], focus: str = "image", threshold: float = DEFAULT_THRESHOLD) -> ScanResult:
+    return scan_image(load_png(path), focus, threshold, path=str(path))
+
+
+def _scan_file_args(args: tuple) -> ScanResult:
+    return scan_file(*args)
+
+
+def scan_paths(
+    paths: List[str | os.PathLike[str]],
+    focus: str = "image",
+    threshold: float = DEFAULT_THRESHOLD,
+    max_workers: Optional[int] = None,
+) -> List[ScanResult]:
+    """Scan ``paths`` on a process pool (one image per task), returning results in input order."""
+    if focus not in FOCUS_MODES:
+        raise StegoEngineError(f"Unknown scan focus {focus!r}; choose one of {', '.join(FOCUS_MODES)}")
+    jobs = [(str(path), focus, threshold) for path in paths]
+    if max_workers == 1 or len(jobs) <= 1:
+        return [_scan_file_args(job) for job in jobs]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_scan_file_args, jobs))
+
+
+def scan_directory(
+    directory: str | os.PathLike[str],
+    focus: str = "image",
+    threshold: float = DEFAULT_THRESHOLD,
+    max_workers: Optional[int] = None,
+    recursive: bool = False,
+) -> List[ScanResult]:
+    root = Path(directory)
+    if not root.is_dir():
+        raise StegoEngineError(f"Not a directory: {root}")
+    pattern = "**/*" if recursive else "*"
+    paths = sorted(path for path in root.glob(pattern) if path.suffix.lower() == ".png" and path.is_file())
+    return scan_paths(paths, focus, threshold, max_workers)
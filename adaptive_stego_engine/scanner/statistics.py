@@ -0,0 +1,182 @@
+"""Vectorised LSB steganalysis statistics over uint8 samples.
+
+Samples are ``(H, W)`` planes or interleaved ``(H, W, C)`` images whose channels are
+pooled. Every statistic is accumulated as integer counts over row bands, so images of
+any size are processed in bounded memory and counts from several images or regions can
+simply be added before an estimate is formed. Masks are ``(H, W)`` booleans.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+# Rows of a plane processed per band; bounds the int16 temporaries of the RS pass.
+SCAN_BAND_ROWS = 64
+# Pixels per RS group and the flipping mask applied to them.
+RS_GROUP = 4
+RS_MASK = (0, 1, 1, 0)
+# Chi-square bins with fewer expected samples are merged away.
+CHI_MIN_EXPECTED = 5.0
+
+
+@dataclass
+class ChiSquareCounts:
+    histogram: np.ndarray
+
+    def __iadd__(self, other: "ChiSquareCounts") -> "ChiSquareCounts":
+        self.histogram += other.histogram
+        return self
+
+    def probability(self) -> float:
+        """Westfeld-Pfitzmann p-value that pairs of values (2k, 2k+1) were equalised by LSB writes."""
+        from scipy.special import chdtrc
+
+        pairs = self.histogram.reshape(-1, 2).astype(np.float64)
+        expected = pairs.sum(axis=1) / 2
+        keep = expected >= CHI_MIN_EXPECTED
+        if np.count_nonzero(keep) < 2:
+            return 0.0
+        statistic = float((((pairs[keep, 0] - expected[keep]) ** 2) / expected[keep]).sum())
+        return float(chdtrc(np.count_nonzero(keep) - 1, statistic))
+
+
+@dataclass
+class RsCounts:
+    """Regular/singular group counts under F1 and F-1 flips, on the plane and its LSB-flipped twin."""
+
+    counts: np.ndarray  # [plane, flipped] x [R_M, S_M, R_-M, S_-M]
+    groups: int = 0
+
+    def __iadd__(self, other: "RsCounts") -> "RsCounts":
+        self.counts += other.counts
+        self.groups += other.groups
+        return self
+
+    def rate(self) -> float:
+        """Fridrich's RS estimate of the fraction of samples carrying a message bit."""
+        if self.groups == 0:
+            return 0.0
+        (r_m, s_m, r_n, s_n), (r_m1, s_m1, r_n1, s_n1) = self.counts / self.groups
+        d0, d1 = r_m - s_m, r_m1 - s_m1
+        n0, n1 = r_n - s_n, r_n1 - s_n1
+        return _smaller_root(2 * (d1 + d0), n0 - n1 - d1 - 3 * d0, d0 - n0, lambda z: z / (z - 0.5))
+
+
+@dataclass
+class SamplePairCounts:
+    """Dumitrescu-Wu-Wang trace set sizes over horizontally adjacent sample pairs."""
+
+    x: int = 0
+    y: int = 0
+    z: int = 0
+    w: int = 0
+    pairs: int = 0
+
+    def __iadd__(self, other: "SamplePairCounts") -> "SamplePairCounts":
+        self.x += other.x
+        self.y += other.y
+        self.z += other.z
+        self.w += other.w
+        self.pairs += other.pairs
+        return self
+
+    def rate(self) -> float:
+        """Sample pair estimate of the fraction of samples carrying a message bit."""
+        if self.pairs == 0:
+            return 0.0
+        return _smaller_root((self.w + self.z) / 2, 2 * self.x - self.pairs, self.y - self.x, lambda p: p)
+
+
+def _smaller_root(a: float, b: float, c: float, to_rate) -> float:
+    if abs(a) < 1e-12:
+        return 0.0 if abs(b) < 1e-12 else min(1.0, max(0.0, to_rate(-c / b)))
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return 0.0
+    roots = ((-b + math.sqrt(disc)) / (2 * a), (-b - math.sqrt(disc)) / (2 * a))
+    root = min(roots, key=abs)
+    try:
+        return min(1.0, max(0.0, to_rate(root)))
+    except ZeroDivisionError:
+        return 1.0
+
+
+def byte_histogram(values: np.ndarray) -> np.ndarray:
+    """``np.bincount(values, minlength=256)`` for uint8, counting two bytes per bin lookup."""
+    values = np.ascontiguousarray(values).reshape(-1)
+    paired = values[: values.size - values.size % 2]
+    counts = np.bincount(paired.view(np.uint16), minlength=1 << 16).reshape(256, 256)
+    histogram = counts.sum(axis=0) + counts.sum(axis=1)
+    if values.size % 2:
+        histogram[values[-1]] += 1
+    return histogram.astype(np.int64)
+
+
+def _channel_mask(mask: np.ndarray, shape: tuple) -> np.ndarray:
+    return mask if len(shape) == 2 else np.broadcast_to(mask[..., None], shape)
+
+
+def chi_square_counts(samples: np.ndarray, mask: Optional[np.ndarray] = None) -> ChiSquareCounts:
+    return ChiSquareCounts(byte_histogram(samples if mask is None else samples[mask]))
+
+
+def _smoothness(a: np.ndarray, b: np.ndarray, c: np.ndarray, d: np.ndarray) -> np.ndarray:
+    return np.abs(b - a) + np.abs(c - b) + np.abs(d - c)
+
+
+def _rs_band(a: np.ndarray, b: np.ndarray, c: np.ndarray, d: np.ndarray) -> np.ndarray:
+    """[R_M, S_M, R_-M, S_-M] of the groups ``(a, b, c, d)`` (int16) under ``RS_MASK``."""
+    base = _smoothness(a, b, c, d)
+    counts = np.empty(4, dtype=np.int64)
+    # F1 swaps 2k <-> 2k+1; F-1 swaps 2k-1 <-> 2k, i.e. moves odd values up and even ones down.
+    for slot, (fb, fc) in enumerate(((b ^ 1, c ^ 1), (((b + 1) ^ 1) - 1, ((c + 1) ^ 1) - 1))):
+        flipped = _smoothness(a, fb, fc, d)
+        counts[2 * slot] = np.count_nonzero(flipped > base)
+        counts[2 * slot + 1] = np.count_nonzero(flipped < base)
+    return counts
+
+
+def rs_counts(samples: np.ndarray, mask: Optional[np.ndarray] = None) -> RsCounts:
+    """RS counts over groups of ``RS_GROUP`` horizontally adjacent samples of one channel."""
+    usable = samples.shape[1] - samples.shape[1] % RS_GROUP
+    result = RsCounts(np.zeros((2, 4), dtype=np.int64))
+    for start in range(0, samples.shape[0], SCAN_BAND_ROWS):
+        band = samples[start : start + SCAN_BAND_ROWS, :usable]
+        rows = band.shape[0]
+        # Group-major int16 copy: group[k] holds the k-th sample of every group, contiguously.
+        group = np.moveaxis(band.reshape(rows, usable // RS_GROUP, RS_GROUP, -1), 2, 0).astype(np.int16, order="C")
+        if mask is not None:
+            inside = mask[start : start + SCAN_BAND_ROWS, :usable].reshape(rows, -1, RS_GROUP).all(axis=2)
+            group = group[:, np.broadcast_to(inside[..., None], group.shape[1:])]
+        result.counts[0] += _rs_band(*group)
+        result.counts[1] += _rs_band(*(member ^ 1 for member in group))
+        result.groups += group[0].size
+    return result
+
+
+def sample_pair_counts(samples: np.ndarray, mask: Optional[np.ndarray] = None) -> SamplePairCounts:
+    """Trace set sizes over horizontally adjacent pairs of samples of one channel."""
+    result = SamplePairCounts()
+    for start in range(0, samples.shape[0], SCAN_BAND_ROWS):
+        band = samples[start : start + SCAN_BAND_ROWS]
+        u, v = band[:, :-1], band[:, 1:]
+        if mask is not None:
+            band_mask = mask[start : start + SCAN_BAND_ROWS]
+            keep = _channel_mask(band_mask[:, :-1] & band_mask[:, 1:], u.shape)
+            u, v = u[keep], v[keep]
+        differ = u != v
+        # Off the diagonal, a pair is in X when u < v with v even or u > v with v odd.
+        in_x = differ & ((u < v) ^ ((v & 1) == 1))
+        x = int(np.count_nonzero(in_x))
+        unequal = int(np.count_nonzero(differ))
+        result += SamplePairCounts(
+            x=x,
+            y=unequal - x,
+            z=int(u.size) - unequal,
+            w=int(np.count_nonzero((u ^ v) == 1)),
+            pairs=int(u.size),
+        )
+    return result
@@ -3,13 +3,31 @@ from __future__ import annotations
 
 import hashlib
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
 
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from .locked_cache import LockedCache, file_identity
+
+# cryptography's RSA backends are imported by the functions that need them, so
+# importing this module (and symmetric-only pipelines) stays cheap.
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+# Parsed key objects by file identity; cryptography's keys are immutable and safe to
+# share between threads, and parsing a private key (with its consistency checks) costs
+# tens of milliseconds.
+KEY_CACHE: LockedCache = LockedCache(maxsize=64)
+
+
+def _oaep() -> padding.OAEP:
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    return padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
 
 
 def generate_rsa_keypair(key_size: int = 2048) -> Tuple[rsa.RSAPrivateKey, rsa.RSAPublicKey]:
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
     private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
     return private_key, private_key.public_key()
 
@@ -19,6 +37,8 @@ def save_private_key_pem(
     path: str | Path,
     password: Optional[str] = None,
 ) -> None:
+    from cryptography.hazmat.primitives import serialization
+
     if password:
         encryption = serialization.BestAvailableEncryption(password.encode("utf-8"))
     else:
@@ -32,6 +52,8 @@ def save_private_key_pem(
 
 
 def save_public_key_pem(public_key: rsa.RSAPublicKey, path: str | Path) -> None:
+    from cryptography.hazmat.primitives import serialization
+
     pem = public_key.public_bytes(
         encoding=serialization.Encoding.PEM,
         format=serialization.PublicFormat.SubjectPublicKeyInfo,
@@ -39,32 +61,46 @@ def save_public_key_pem(public_key: rsa.RSAPublicKey, path: str | Path) -> None:
     Path(path).write_bytes(pem)
 
 
+def _key_identity(kind: str, path: str | Path, password: Optional[str] = None) -> tuple:
+    secret = hashlib.sha256(password.encode("utf-8")).digest() if password else b""
+    return kind, file_identity(path), secret
+
+
 def load_private_key_pem(path: str | Path, password: Optional[str] = None) -> rsa.RSAPrivateKey:
-    data = Path(path).read_bytes()
+    """Parse a private key once per file version; later calls share the cached object."""
+    return KEY_CACHE.get_or_create(
+        _key_identity("private", path, password),
+        lambda: load_private_key_pem_bytes(Path(path).read_bytes(), password),
+    )
+
+
+def load_private_key_pem_bytes(data: bytes, password: Optional[str] = None) -> rsa.RSAPrivateKey:
+    from cryptography.hazmat.primitives import serialization
+
     pwd = password.encode("utf-8") if password else None
     return serialization.load_pem_private_key(data, password=pwd)
 
 
 def load_public_key_pem(path: str | Path) -> rsa.RSAPublicKey:
-    data = Path(path).read_bytes()
-    return serialization.load_pem_public_key(data)
+    from cryptography.hazmat.primitives import serialization
+
+    return KEY_CACHE.get_or_create(
+        _key_identity("public", path),
+        lambda: serialization.load_pem_public_key(Path(path).read_bytes()),
+    )
 
 
 def rsa_encrypt_key(public_key: rsa.RSAPublicKey, key_bytes: bytes) -> bytes:
-    return public_key.encrypt(
-        key_bytes,
-        padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None),
-    )
+    return public_key.encrypt(key_bytes, _oaep())
 
 
 def rsa_decrypt_key(private_key: rsa.RSAPrivateKey, ek_bytes: bytes) -> bytes:
-    return private_key.decrypt(
-        ek_bytes,
-        padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None),
-    )
+    return private_key.decrypt(ek_bytes, _oaep())
 
 
 def fingerprint_public_key(public_key: rsa.RSAPublicKey) -> str:
+    from cryptography.hazmat.primitives import serialization
+
     der = public_key.public_bytes(
         encoding=serialization.Encoding.DER,
         format=serialization.PublicFormat.SubjectPublicKeyInfo,
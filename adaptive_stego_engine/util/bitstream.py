@@ -7,6 +7,7 @@ from .exceptions import StegoEngineError
 
 MODE_SYMMETRIC = 0x01
 MODE_ASYMMETRIC = 0x02
+MODE_MULTI_RECIPIENT = 0x03
 
 
 def bytes_to_bits(data: bytes) -> List[int]:
@@ -126,3 +127,22 @@ def unpack_public_stream(data: bytes) -> Dict[str, bytes]:
     if not aes_ct:
         raise StegoEngineError("Missing AES ciphertext")
     return {"ek": ek, "aes_nonce": aes_nonce, "aes_ct": aes_ct}
+
+
+def pack_multi_stream(*, aes_nonce: bytes, aes_ct: bytes) -> bytes:
+    """The wrapped session keys live in key slots outside the stream (see ``util.key_slots``)."""
+    if len(aes_nonce) != 12:
+        raise StegoEngineError("AES nonce must be 12 bytes")
+    return bytes([MODE_MULTI_RECIPIENT]) + aes_nonce + aes_ct
+
+
+def unpack_multi_stream(data: bytes) -> Dict[str, bytes]:
+    if not data or data[0] != MODE_MULTI_RECIPIENT:
+        raise StegoEngineError("Not a multi-recipient stream")
+    aes_nonce = data[1:13]
+    if len(aes_nonce) != 12:
+        raise StegoEngineError("Corrupted AES nonce")
+    aes_ct = data[13:]
+    if not aes_ct:
+        raise StegoEngineError("Missing AES ciphertext")
+    return {"aes_nonce": aes_nonce, "aes_ct": aes_ct}
@@ -4,10 +4,6 @@ from __future__ import annotations
 import os
 from typing import Optional, Tuple
 
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-
 
 PBKDF2_ITERATIONS = 100_000
 PBKDF2_SALT_LEN = 16
@@ -23,6 +19,9 @@ def derive_key_pbkdf2(
 ) -> bytes:
     if not password:
         raise ValueError("Password must not be empty")
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=length,
@@ -33,6 +32,8 @@ def derive_key_pbkdf2(
 
 
 def aes_gcm_encrypt(key: bytes, plaintext: bytes, aad: Optional[bytes] = None) -> Tuple[bytes, bytes]:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
     nonce = os.urandom(AES_NONCE_LEN)
     aesgcm = AESGCM(key)
     ciphertext = aesgcm.encrypt(nonce, plaintext, aad)
@@ -45,5 +46,7 @@ def aes_gcm_decrypt(
     ct_with_tag: bytes,
     aad: Optional[bytes] = None,
 ) -> bytes:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
     aesgcm = AESGCM(key)
     return aesgcm.decrypt(nonce, ct_with_tag, aad)
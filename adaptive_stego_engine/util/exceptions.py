@@ -5,3 +5,21 @@ class StegoEngineError(Exception):
     """Raised whenever the adaptive engine encounters a fatal error."""
 
     pass
+
+
+class CapacityError(StegoEngineError):
+    """Raised when a cover cannot hold the stream under the active capacity limits."""
+
+    pass
+
+
+class QualityError(StegoEngineError):
+    """Raised when a stego image misses the PSNR, SSIM or histogram drift thresholds."""
+
+    pass
+
+
+class JobCancelledError(StegoEngineError):
+    """Raised when a pipeline job is cancelled through its token."""
+
+    pass
@@ -0,0 +1,148 @@
+"""Optional on-disk cache of decoded RGB pixels stored as memory-mapped ``.npy`` files.
+
+The cache holds at most ``max_bytes`` of entries and evicts the least recently used
+first; writing an entry for a file drops the entries of its earlier versions.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .exceptions import StegoEngineError
+
+CACHE_ENV_VAR = "STEGO_IMAGE_CACHE_DIR"
+CACHE_SIZE_ENV_VAR = "STEGO_IMAGE_CACHE_MB"
+DEFAULT_CACHE_MB = 4096
+_HASH_CHUNK = 1 << 20
+
+_default_cache: Optional["ImageCache"] = None
+_default_lock = threading.Lock()
+
+
+def _content_hash(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _discard(entry: Path) -> None:
+    # Another process may have removed the entry already, or still map it on Windows.
+    try:
+        entry.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+class ImageCache:
+    """Stores validated RGB arrays keyed by file path, size, mtime and content hash.
+
+    Entries are plain ``.npy`` files opened read-only with ``mmap_mode="r"``, so
+    repeated loads are zero-copy and share the OS page cache across processes. Reads
+    refresh an entry's mtime, which orders eviction; unreadable or malformed entries
+    are deleted and reported as misses, so the image is simply decoded again.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], max_bytes: int = DEFAULT_CACHE_MB << 20) -> None:
+        if max_bytes <= 0:
+            raise StegoEngineError("Image cache size must be positive")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def key_for(self, path: str | os.PathLike[str]) -> str:
+        """``<path hash>-<version hash>``; the prefix groups the versions of one file."""
+        file_path = Path(path).resolve()
+        stat = file_path.stat()
+        identity = f"{file_path}|{stat.st_size}|{stat.st_mtime_ns}|{_content_hash(file_path)}"
+        return f"{_sha256(str(file_path))[:16]}-{_sha256(identity)}"
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}.npy"
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        entry = self._entry_path(key)
+        if not entry.exists():
+            return None
+        try:
+            rgb = np.load(entry, mmap_mode="r", allow_pickle=False)
+        except (OSError, ValueError):
+            rgb = None
+        if rgb is None or rgb.dtype != np.uint8 or rgb.ndim != 3 or rgb.shape[2] != 3:
+            _discard(entry)
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return np.asarray(rgb)
+
+    def put(self, key: str, rgb: np.ndarray) -> np.ndarray:
+        entry = self._entry_path(key)
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                np.save(handle, np.ascontiguousarray(rgb), allow_pickle=False)
+            os.replace(tmp_name, entry)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        for stale in self.directory.glob(f"{key.split('-', 1)[0]}-*.npy"):
+            if stale != entry:
+                _discard(stale)
+        self.prune()
+        cached = self.get(key)
+        return cached if cached is not None else rgb
+
+    def prune(self) -> None:
+        """Evict least recently used entries until the cache fits ``max_bytes``."""
+        entries = []
+        for entry in self.directory.glob("*.npy"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        total = sum(size for _mtime, size, _entry in entries)
+        for _mtime, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            _discard(entry)
+            total -= size
+
+    def clear(self) -> None:
+        for entry in self.directory.glob("*.npy"):
+            _discard(entry)
+
+
+def default_image_cache() -> Optional[ImageCache]:
+    """Cache configured through ``set_default_image_cache`` or ``STEGO_IMAGE_CACHE_DIR``
+    (bounded by ``STEGO_IMAGE_CACHE_MB``)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            directory = os.environ.get(CACHE_ENV_VAR)
+            if directory:
+                try:
+                    max_mb = int(os.environ.get(CACHE_SIZE_ENV_VAR) or DEFAULT_CACHE_MB)
+                except ValueError:
+                    raise StegoEngineError(f"{CACHE_SIZE_ENV_VAR} must be a whole number of megabytes") from None
+                _default_cache = ImageCache(directory, max_mb << 20)
+        return _default_cache
+
+
+def set_default_image_cache(cache: Optional[ImageCache]) -> None:
+    global _default_cache
+    with _default_lock:
+        _default_cache = cache
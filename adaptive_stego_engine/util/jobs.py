@@ -0,0 +1,129 @@
+"""Cooperative, cancellable pipeline jobs with progress reporting."""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Generator, Generic, Iterator, Optional, TypeVar
+
+from .exceptions import JobCancelledError
+
+T = TypeVar("T")
+
+LOOP_PROGRESS_INTERVAL = 4096
+
+
+@dataclass(frozen=True)
+class JobProgress:
+    percent: int
+    message: str
+
+
+ProgressCallback = Callable[[JobProgress], None]
+JobSteps = Generator[JobProgress, None, T]
+
+
+class CancellationToken:
+    """Thread-safe flag checked by jobs between progress steps."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise JobCancelledError("Job cancelled")
+
+
+def scale_progress(
+    loop_steps: Generator[tuple[int, int], None, T],
+    start: int,
+    end: int,
+    message: str,
+) -> JobSteps:
+    """Map a kernel's ``(done, total)`` progress onto the ``start..end`` percent range."""
+    while True:
+        try:
+            done, total = next(loop_steps)
+        except StopIteration as stop:
+            return stop.value
+        fraction = done / total if total else 1.0
+        yield JobProgress(start + int((end - start) * min(fraction, 1.0)), message)
+
+
+def drain(steps: Generator[object, None, T]) -> T:
+    """Run a progress generator to completion and return its result."""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+class Job(Generic[T]):
+    """Resumable unit of work built from a generator of progress steps.
+
+    Iterating a job advances it one step at a time; the cancellation token is
+    checked between steps, so a cancelled job stops at the next stage boundary
+    or loop checkpoint.
+    """
+
+    def __init__(self, steps: JobSteps, token: Optional[CancellationToken] = None) -> None:
+        self._steps = steps
+        self.token = token or CancellationToken()
+        self.result: Optional[T] = None
+        self.done = False
+
+    def cancel(self) -> None:
+        self.token.cancel()
+
+    def _advance(self) -> Optional[JobProgress]:
+        if self.done:
+            return None
+        try:
+            self.token.raise_if_cancelled()
+            progress = next(self._steps)
+            self.token.raise_if_cancelled()
+        except StopIteration as stop:
+            self.result = stop.value
+            self.done = True
+            return None
+        except BaseException:
+            self.done = True
+            self._steps.close()
+            raise
+        return progress
+
+    def __iter__(self) -> Iterator[JobProgress]:
+        while True:
+            progress = self._advance()
+            if progress is None:
+                return
+            yield progress
+
+    def run(self, on_progress: Optional[ProgressCallback] = None) -> T:
+        for progress in self:
+            if on_progress is not None:
+                on_progress(progress)
+        return self.result  # type: ignore[return-value]
+
+    async def run_async(self, on_progress: Optional[ProgressCallback] = None) -> T:
+        """Drive the job from an event loop, running each step in the default executor."""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                progress = await loop.run_in_executor(None, self._advance)
+                if progress is None:
+                    return self.result  # type: ignore[return-value]
+                if on_progress is not None:
+                    on_progress(progress)
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
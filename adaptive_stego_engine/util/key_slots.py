@@ -0,0 +1,235 @@
+"""Recipient key slots of multi-recipient streams.
+
+A multi-recipient stream is written under a seed derived from its random session key,
+so its descriptor and pixel order are as hidden as those of a password stream. Each
+recipient finds the session key in a key slot: ``SLOT_LEN`` bytes holding the RSA-OAEP
+wrap of the session key, padded with random bytes. Slots are stored one bit per pixel in
+the blue LSBs of a fixed, publicly seeded pixel sequence, after a ``HEADER_BITS`` header.
+
+The sequence has room for ``slot_capacity`` slots, sized from the image. Each recipient
+is placed within ``SLOT_PROBES`` slots of a hint: the HMAC of its key fingerprint under
+the salt in the header, which the embedder re-derives until every recipient fits. A
+recipient therefore tries at most ``SLOT_PROBES`` RSA decrypts, however many recipients
+the image has. The hint gives a public-key holder nothing to test: slot contents read
+as random bits without the private key. The
+header also holds which slots are used, masked under the session key, and the stream's
+AES-GCM associated data is every used slot, so tampering with any of them fails
+authentication.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import prng
+from .asym_crypto import fingerprint_public_key, rsa_decrypt_key, rsa_encrypt_key
+from .exceptions import StegoEngineError
+from .layout import LAYOUT_CHANNEL, layout_pixels, write_layout
+
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+SLOT_SEED = "multi|slots"
+SLOT_LEN = 512  # one RSA-OAEP wrap under keys of up to 4096 bits
+SLOT_BITS = SLOT_LEN * 8
+SESSION_KEY_LEN = 32
+SALT_LEN = 16
+# The header's slot map has one bit per slot, which bounds every image's slot capacity.
+MAX_SLOTS = 128
+SLOT_MAP_LEN = MAX_SLOTS // 8
+HEADER_BITS = (SALT_LEN + SLOT_MAP_LEN) * 8
+# The slot sequence spans at most 1 / SLOT_PIXEL_SHARE of the pixels; unused slots keep the cover.
+SLOT_PIXEL_SHARE = 4
+SLOT_PROBES = 4
+SALT_ATTEMPTS = 256
+
+
+@dataclass(frozen=True)
+class KeySlots:
+    """Session key of a multi-recipient stream and its slots, one per recipient.
+
+    ``fingerprints`` name the recipient of each slot; only the embedder knows them.
+    """
+
+    session_key: bytes
+    slots: Tuple[bytes, ...]
+    fingerprints: Tuple[str, ...] = ()
+
+    @property
+    def count(self) -> int:
+        return len(self.slots)
+
+    @property
+    def bits(self) -> int:
+        """Pixels the header and the slots take."""
+        return HEADER_BITS + self.count * SLOT_BITS
+
+    @property
+    def seed(self) -> str:
+        return "multi:" + _derive(self.session_key, b"multi-recipient seed").hex()
+
+    @property
+    def aad(self) -> bytes:
+        """The slots in a placement-independent order, authenticated by the stream."""
+        return b"".join(sorted(self.slots))
+
+
+@dataclass(frozen=True)
+class SlotPlacement:
+    """Where an image holds the key slots: the header salt and each slot's index, in slot order."""
+
+    num_pixels: int
+    salt: bytes
+    indices: Tuple[int, ...]
+
+    def pixels(self) -> np.ndarray:
+        """Sorted flat indices of the header and used slot pixels."""
+        return np.sort(_sequence_pixels(self.num_pixels, self.indices))
+
+
+def slot_capacity(num_pixels: int) -> int:
+    """Slots an image of ``num_pixels`` pixels has room for, at most ``MAX_SLOTS``."""
+    return max(0, min(MAX_SLOTS, (num_pixels // SLOT_PIXEL_SHARE - HEADER_BITS) // SLOT_BITS))
+
+
+def seal_key_slots(public_keys: Sequence[rsa.RSAPublicKey]) -> KeySlots:
+    """A fresh session key wrapped in one slot per key, in the order given."""
+    if not 0 < len(public_keys) <= MAX_SLOTS:
+        raise StegoEngineError(f"Multi-recipient streams take between 1 and {MAX_SLOTS} recipients")
+    fingerprints = tuple(fingerprint_public_key(public_key) for public_key in public_keys)
+    if len(set(fingerprints)) != len(fingerprints):
+        raise StegoEngineError("Duplicate recipient")
+    session_key = os.urandom(SESSION_KEY_LEN)
+    slots = []
+    for public_key in public_keys:
+        if public_key.key_size > SLOT_BITS:
+            raise StegoEngineError(f"Recipient keys are limited to {SLOT_BITS} bits")
+        wrapped = rsa_encrypt_key(public_key, session_key)
+        slots.append(wrapped + os.urandom(SLOT_LEN - len(wrapped)))
+    return KeySlots(session_key, tuple(slots), fingerprints)
+
+
+def _derive(key: bytes, label: bytes) -> bytes:
+    return hmac.new(key, label, hashlib.sha256).digest()
+
+
+def _probes(salt: bytes, fingerprint: str, capacity: int) -> List[int]:
+    """Slot indices a recipient's slot may take: its hint and the next ones, wrapping around."""
+    hint = int.from_bytes(_derive(salt, fingerprint.encode("ascii"))[:8], "big") % capacity
+    return [(hint + probe) % capacity for probe in range(min(SLOT_PROBES, capacity))]
+
+
+def place_key_slots(key_slots: KeySlots, num_pixels: int) -> SlotPlacement:
+    """Deterministic placement of the embedder's ``key_slots`` in an image of ``num_pixels`` pixels."""
+    capacity = slot_capacity(num_pixels)
+    if key_slots.count > capacity:
+        raise StegoEngineError(f"Image too small for {key_slots.count} recipient key slots (room for {capacity})")
+    if len(key_slots.fingerprints) != key_slots.count:
+        raise StegoEngineError("Only freshly sealed key slots can be placed")
+    for attempt in range(SALT_ATTEMPTS):
+        salt = _derive(key_slots.session_key, b"slot salt" + attempt.to_bytes(2, "big"))[:SALT_LEN]
+        used: set = set()
+        indices = []
+        for fingerprint in key_slots.fingerprints:
+            free = next((index for index in _probes(salt, fingerprint, capacity) if index not in used), None)
+            if free is None:
+                break
+            used.add(free)
+            indices.append(free)
+        else:
+            return SlotPlacement(num_pixels, salt, tuple(indices))
+    raise StegoEngineError(f"Could not place {key_slots.count} recipient key slots; use a larger cover")
+
+
+def _sequence_pixels(num_pixels: int, indices: Sequence[int]) -> np.ndarray:
+    """Header pixels followed by those of slots ``indices``, in bit order."""
+    positions = [np.arange(HEADER_BITS)]
+    positions += [HEADER_BITS + index * SLOT_BITS + np.arange(SLOT_BITS) for index in indices]
+    return prng.KeyedPermutation(SLOT_SEED, num_pixels).take(np.concatenate(positions))
+
+
+def _mask_slot_map(session_key: bytes, data: bytes) -> bytes:
+    """XOR ``data`` with the session key's slot map mask; the mask is its own inverse."""
+    mask = _derive(session_key, b"slot map")[:SLOT_MAP_LEN]
+    return bytes(a ^ b for a, b in zip(data, mask))
+
+
+def reserved_pixels(
+    seed: str,
+    num_pixels: int,
+    placement: Optional[SlotPlacement] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Descriptor pixels of a stream under ``seed`` and every pixel it reserves, both sorted.
+
+    With a ``placement`` the descriptor avoids the key slot pixels, which are reserved too.
+    """
+    if placement is None:
+        descriptor = layout_pixels(seed, num_pixels)
+        return descriptor, descriptor
+    slots = placement.pixels()
+    descriptor = layout_pixels(seed, num_pixels, slots)
+    return descriptor, np.union1d(descriptor, slots)
+
+
+def write_key_slots(flat: np.ndarray, key_slots: KeySlots, placement: SlotPlacement) -> None:
+    used = sum(1 << index for index in placement.indices).to_bytes(SLOT_MAP_LEN, "big")
+    data = placement.salt + _mask_slot_map(key_slots.session_key, used) + b"".join(key_slots.slots)
+    write_layout(flat, _sequence_pixels(flat.shape[0], placement.indices), data)
+
+
+def _read_sequence(flat: np.ndarray, indices: Sequence[int]) -> bytes:
+    bits = flat[_sequence_pixels(flat.shape[0], indices), LAYOUT_CHANNEL] & np.uint8(1)
+    return np.packbits(bits).tobytes()
+
+
+def slot_candidates(rgb: np.ndarray, fingerprint: str) -> Tuple[bytes, ...]:
+    """The slots the key with ``fingerprint`` may occupy; empty when the image has no room for slots."""
+    flat = rgb.reshape(-1, 3)
+    capacity = slot_capacity(flat.shape[0])
+    if capacity < 1:
+        return ()
+    salt = _read_sequence(flat, ())[:SALT_LEN]
+    indices = _probes(salt, fingerprint, capacity)
+    data = _read_sequence(flat, indices)[HEADER_BITS // 8 :]
+    return tuple(data[i * SLOT_LEN : (i + 1) * SLOT_LEN] for i in range(len(indices)))
+
+
+def unwrap_session_key(private_key: rsa.RSAPrivateKey, candidates: Sequence[bytes]) -> Optional[bytes]:
+    """Session key in the first of ``candidates`` that ``private_key`` unwraps, or ``None``."""
+    key_len = private_key.key_size // 8
+    if key_len > SLOT_LEN:
+        return None
+    for slot in candidates:
+        try:
+            session_key = rsa_decrypt_key(private_key, slot[:key_len])
+        except ValueError:
+            continue
+        if len(session_key) == SESSION_KEY_LEN:
+            return session_key
+    return None
+
+
+def open_key_slots(rgb: np.ndarray, session_key: bytes) -> Tuple[KeySlots, SlotPlacement]:
+    """Every slot of the image whose session key a recipient unwrapped, with their placement."""
+    flat = rgb.reshape(-1, 3)
+    header = _read_sequence(flat, ())
+    capacity = slot_capacity(flat.shape[0])
+    used = int.from_bytes(_mask_slot_map(session_key, header[SALT_LEN:]), "big")
+    indices = tuple(index for index in range(MAX_SLOTS) if used >> index & 1)
+    if not indices or indices[-1] >= capacity:
+        raise StegoEngineError("Recipient key slot found but the slot map is corrupted")
+    data = _read_sequence(flat, indices)[HEADER_BITS // 8 :]
+    slots = tuple(data[i * SLOT_LEN : (i + 1) * SLOT_LEN] for i in range(len(indices)))
+    return KeySlots(session_key, slots), SlotPlacement(flat.shape[0], header[:SALT_LEN], indices)
+
+
+def find_key_slots(rgb: np.ndarray, private_key: rsa.RSAPrivateKey) -> Optional[Tuple[KeySlots, SlotPlacement]]:
+    """Key slots and placement of a multi-recipient image ``private_key`` is a recipient of, or ``None``."""
+    candidates = slot_candidates(rgb, fingerprint_public_key(private_key.public_key()))
+    session_key = unwrap_session_key(private_key, candidates)
+    return None if session_key is None else open_key_slots(rgb, session_key)
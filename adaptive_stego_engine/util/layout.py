@@ -0,0 +1,149 @@
+"""Layout descriptor for new-format streams.
+
+New-format streams start with a fixed-size, CRC-protected descriptor stored one bit per
+pixel in the blue LSB of a seeded set of reserved pixels. It records how the payload
+stream that follows is laid out, so the extractor can read it before any analysis.
+"""
+from __future__ import annotations
+
+import zlib
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Optional, Tuple
+
+import numpy as np
+
+from . import prng
+from .exceptions import StegoEngineError
+
+LAYOUT_MAGIC = b"SG2"
+LAYOUT_VERSION = 1
+# Version 2 adds the tile count of partially analysed streams; whole-image streams keep
+# writing version 1, whose descriptor bytes are unchanged. Version 3 adds the capacity
+# profile (bits per pixel cap) after the tile count, which may then be zero.
+TILED_LAYOUT_VERSION = 2
+PROFILE_LAYOUT_VERSION = 3
+_LAYOUT_VERSIONS = (LAYOUT_VERSION, TILED_LAYOUT_VERSION, PROFILE_LAYOUT_VERSION)
+LAYOUT_LEN = 20
+LAYOUT_BITS = LAYOUT_LEN * 8
+LAYOUT_CHANNEL = 2  # blue
+MAX_SEGMENTS = 255
+MAX_TILES = 0xFFFF
+# ``StreamLayout.tiles`` value asking the embedder to pick the tile count from the payload.
+AUTO_TILES = -1
+# Highest per-pixel capacity the analyzer assigns (``embedder.capacity.MAX_CAPACITY``).
+MAX_BITS = 3
+
+
+class PixelOrdering(IntEnum):
+    """Pixel traversal order of a new-format stream, stored as one descriptor byte."""
+
+    ENTROPY = 0  # entropy sort + seeded shuffle, materialised for every pixel
+    KEYED = 1  # keyed Feistel permutation evaluated on demand
+    TIERED = 2  # capacity tiers 3..0, each shuffled with the seeded PRNG
+
+
+_ORDERING_CODES = frozenset(ordering.value for ordering in PixelOrdering)
+
+
+@dataclass(frozen=True)
+class StreamLayout:
+    """How a new-format stream is laid out.
+
+    ``tiles=0`` analyses the whole image; ``tiles=n`` only the first ``n`` tiles of the
+    seeded tile sequence (see ``embedder.tiles``) and ``AUTO_TILES`` lets the embedder
+    choose just enough tiles for the stream. Descriptors always record the resolved count.
+    ``max_bits`` caps every pixel's capacity (the capacity profile), trading payload room
+    for fewer changed LSBs per pixel.
+    """
+
+    segments: int = 1
+    ordering: PixelOrdering = PixelOrdering.ENTROPY
+    tiles: int = 0
+    max_bits: int = MAX_BITS
+
+    def validate(self) -> None:
+        if not 1 <= self.segments <= MAX_SEGMENTS:
+            raise StegoEngineError(f"Segment count must be between 1 and {MAX_SEGMENTS}")
+        if self.ordering not in _ORDERING_CODES:
+            raise StegoEngineError(f"Unknown pixel ordering: {self.ordering!r}")
+        if self.tiles != AUTO_TILES and not 0 <= self.tiles <= MAX_TILES:
+            raise StegoEngineError(f"Tile count must be between 0 and {MAX_TILES}")
+        if not 1 <= self.max_bits <= MAX_BITS:
+            raise StegoEngineError(f"Bits per pixel cap must be between 1 and {MAX_BITS}")
+
+
+def pack_layout(layout: StreamLayout, stream_len: int) -> bytes:
+    layout.validate()
+    if layout.tiles == AUTO_TILES:
+        raise StegoEngineError("Tile count must be resolved before packing the layout descriptor")
+    if not 0 < stream_len < 2 ** 32:
+        raise StegoEngineError("Stream length out of range for layout descriptor")
+    body = bytearray(LAYOUT_MAGIC)
+    if layout.max_bits != MAX_BITS:
+        version = PROFILE_LAYOUT_VERSION
+    else:
+        version = TILED_LAYOUT_VERSION if layout.tiles else LAYOUT_VERSION
+    body.append(version)
+    body += stream_len.to_bytes(4, "big")
+    body.append(layout.segments)
+    body.append(int(layout.ordering))
+    if version != LAYOUT_VERSION:
+        body += layout.tiles.to_bytes(2, "big")
+    if version == PROFILE_LAYOUT_VERSION:
+        body.append(layout.max_bits)
+    body += bytes(LAYOUT_LEN - 4 - len(body))
+    body += zlib.crc32(body).to_bytes(4, "big")
+    return bytes(body)
+
+
+def unpack_layout(data: bytes) -> Optional[Tuple[StreamLayout, int]]:
+    """Parse a descriptor, returning ``None`` when ``data`` is not a valid one."""
+    if len(data) != LAYOUT_LEN or not data.startswith(LAYOUT_MAGIC):
+        return None
+    body, crc = data[:-4], data[-4:]
+    version = body[3]
+    if zlib.crc32(body).to_bytes(4, "big") != crc or version not in _LAYOUT_VERSIONS:
+        return None
+    stream_len = int.from_bytes(body[4:8], "big")
+    if stream_len == 0 or body[8] == 0 or body[9] not in _ORDERING_CODES:
+        return None
+    tiles = int.from_bytes(body[10:12], "big") if version != LAYOUT_VERSION else 0
+    if version == TILED_LAYOUT_VERSION and tiles == 0:
+        return None
+    max_bits = body[12] if version == PROFILE_LAYOUT_VERSION else MAX_BITS
+    if not 1 <= max_bits <= MAX_BITS:
+        return None
+    layout = StreamLayout(segments=body[8], ordering=PixelOrdering(body[9]), tiles=tiles, max_bits=max_bits)
+    return layout, stream_len
+
+
+def layout_pixels(seed: str, num_pixels: int, exclude: Optional[np.ndarray] = None) -> np.ndarray:
+    """Sorted flat indices of the pixels reserved for the descriptor, none of them in ``exclude``."""
+    excluded = 0 if exclude is None else len(exclude)
+    if num_pixels < LAYOUT_BITS + excluded:
+        raise StegoEngineError("Image too small for a new-format stream")
+    rng = prng.random_state(f"{seed}|layout")
+    if exclude is None:
+        return np.sort(rng.choice(num_pixels, LAYOUT_BITS, replace=False))
+    candidates = rng.choice(num_pixels, LAYOUT_BITS + excluded, replace=False)
+    return np.sort(candidates[~np.isin(candidates, exclude)][:LAYOUT_BITS])
+
+
+def write_layout(flat: np.ndarray, reserved: np.ndarray, descriptor: bytes) -> None:
+    bits = np.unpackbits(np.frombuffer(descriptor, dtype=np.uint8))
+    flat[reserved, LAYOUT_CHANNEL] = (flat[reserved, LAYOUT_CHANNEL] & np.uint8(0xFE)) | bits
+
+
+def read_layout(
+    rgb: np.ndarray,
+    seed: str,
+    exclude: Optional[np.ndarray] = None,
+) -> Optional[Tuple[StreamLayout, int]]:
+    """Descriptor stored under ``seed`` (avoiding ``exclude``), or ``None`` for legacy or foreign images."""
+    flat = rgb.reshape(-1, 3)
+    if flat.shape[0] < LAYOUT_BITS + (0 if exclude is None else len(exclude)):
+        return None
+    reserved = layout_pixels(seed, flat.shape[0], exclude)
+    bits = flat[reserved, LAYOUT_CHANNEL] & np.uint8(1)
+    return unpack_layout(np.packbits(bits).tobytes())
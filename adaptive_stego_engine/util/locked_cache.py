@@ -0,0 +1,93 @@
+"""Bounded LRU cache that many threads can share, computing each missing value once."""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+def file_identity(path: str | os.PathLike[str]) -> Tuple[str, int, int]:
+    """Cache key for the current version of a file: resolved path, size and mtime."""
+    file_path = Path(path).resolve()
+    stat = file_path.stat()
+    return str(file_path), stat.st_size, stat.st_mtime_ns
+
+
+class LockedCache(Generic[V]):
+    """Thread-safe LRU map with single-flight ``get_or_create``.
+
+    Concurrent callers asking for the same missing key wait for the first caller's
+    ``factory`` instead of repeating it, while different keys are computed in parallel.
+    A factory that raises caches nothing, and the waiting callers retry with their own.
+    Pickling (e.g. sending an owner to a worker process) yields an empty cache of the
+    same size, so caches are always per process.
+    """
+
+    def __init__(self, maxsize: int = 32) -> None:
+        if maxsize < 1:
+            raise ValueError("Cache size must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, V]" = OrderedDict()
+        self._pending: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __reduce__(self):
+        return type(self), (self.maxsize,)
+
+    def _lookup(self, key: Hashable) -> Optional[V]:
+        # Caller holds ``_lock``.
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        return None
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            return self._lookup(key)
+
+    def items(self) -> List[Tuple[Hashable, V]]:
+        """Snapshot of the cached entries, least recently used first; counts no hits."""
+        with self._lock:
+            return list(self._entries.items())
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], V]) -> V:
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    return self._lookup(key)
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Lock()
+                    pending.acquire()
+                    break
+            # Another thread is computing this key: wait for it, then look again.
+            with pending:
+                pass
+        try:
+            value = factory()
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.release()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
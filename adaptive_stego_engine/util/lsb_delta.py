@@ -0,0 +1,147 @@
+"""Sparse LSB deltas: a stego image stored as the samples whose LSB differs from its cover.
+
+A delta holds the cover's shape and SHA-256 plus the sorted flat sample indices
+(``pixel * 3 + channel``) of the flipped LSBs, as LEB128 varint gaps compressed with
+zlib, and ends with a CRC-32 of everything before it. ``apply_delta`` needs the exact
+cover and reproduces the stego array bit for bit.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+from .exceptions import StegoEngineError
+
+DELTA_MAGIC = b"SGD"
+DELTA_VERSION = 1
+DELTA_SUFFIX = ".sgd"
+# magic, version, height, width, channels, cover SHA-256, flip count
+_HEADER = struct.Struct(">3sBIIB32sQ")
+_CRC_LEN = 4
+# Samples compared per chunk while collecting flips, bounding the boolean temporaries.
+DELTA_CHUNK = 1 << 24
+DELTA_ZLIB_LEVEL = 6
+
+
+@dataclass(frozen=True)
+class DeltaHeader:
+    shape: Tuple[int, int, int]
+    cover_sha256: bytes
+    flips: int
+
+
+def cover_digest(cover: np.ndarray) -> bytes:
+    return hashlib.sha256(np.ascontiguousarray(cover).data).digest()
+
+
+def flipped_samples(cover: np.ndarray, stego: np.ndarray) -> np.ndarray:
+    """Sorted flat sample indices where ``stego`` differs from ``cover``; only LSBs may differ."""
+    if cover.shape != stego.shape or cover.dtype != np.uint8 or stego.dtype != np.uint8:
+        raise StegoEngineError("Cover and stego must be uint8 arrays of the same shape")
+    cover_flat = cover.reshape(-1)
+    stego_flat = stego.reshape(-1)
+    chunks = []
+    for start in range(0, cover_flat.size, DELTA_CHUNK):
+        diff = cover_flat[start : start + DELTA_CHUNK] ^ stego_flat[start : start + DELTA_CHUNK]
+        if np.any(diff > 1):
+            raise StegoEngineError("Stego differs from cover beyond the LSB plane; no LSB delta exists")
+        chunks.append(np.flatnonzero(diff) + start)
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+
+
+def _encode_varints(values: np.ndarray) -> bytes:
+    values = values.astype(np.uint64)
+    lengths = np.ones(values.size, dtype=np.int64)
+    for k in range(1, 10):
+        lengths += values >= np.uint64(1 << (7 * k))
+    starts = np.cumsum(lengths) - lengths
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    for k in range(int(lengths.max(initial=0))):
+        active = lengths > k
+        byte = (values[active] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (lengths[active] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[active] + k] = byte | more
+    return out.tobytes()
+
+
+def _decode_varints(data: bytes, count: int) -> np.ndarray:
+    raw = np.frombuffer(data, dtype=np.uint8)
+    last = (raw & 0x80) == 0
+    if np.count_nonzero(last) != count or (raw.size and not last[-1]):
+        raise StegoEngineError("Corrupt LSB delta: flip list does not match its count")
+    if count == 0:
+        return np.zeros(0, dtype=np.uint64)
+    starts = np.flatnonzero(np.concatenate(([True], last[:-1])))
+    position = np.arange(raw.size) - np.repeat(starts, np.diff(np.append(starts, raw.size)))
+    if position.max() >= 10:
+        raise StegoEngineError("Corrupt LSB delta: varint too long")
+    shifted = (raw & 0x7F).astype(np.uint64) << (np.uint64(7) * position.astype(np.uint64))
+    return np.add.reduceat(shifted, starts)
+
+
+def encode_delta(cover: np.ndarray, stego: np.ndarray) -> bytes:
+    """Delta that turns ``cover`` into ``stego`` under ``apply_delta``."""
+    if cover.ndim != 3:
+        raise StegoEngineError("LSB deltas need (height, width, channels) images")
+    flips = flipped_samples(cover, stego)
+    gaps = np.diff(flips, prepend=0)
+    height, width, channels = cover.shape
+    body = _HEADER.pack(DELTA_MAGIC, DELTA_VERSION, height, width, channels, cover_digest(cover), flips.size)
+    body += zlib.compress(_encode_varints(gaps), DELTA_ZLIB_LEVEL)
+    return body + zlib.crc32(body).to_bytes(_CRC_LEN, "big")
+
+
+def _parse(delta: bytes) -> Tuple[DeltaHeader, bytes]:
+    if len(delta) < _HEADER.size + _CRC_LEN or not delta.startswith(DELTA_MAGIC):
+        raise StegoEngineError("Not an LSB delta")
+    body, crc = delta[:-_CRC_LEN], delta[-_CRC_LEN:]
+    if zlib.crc32(body).to_bytes(_CRC_LEN, "big") != crc:
+        raise StegoEngineError("Corrupt LSB delta: checksum mismatch")
+    _magic, version, height, width, channels, digest, flips = _HEADER.unpack_from(body)
+    if version != DELTA_VERSION:
+        raise StegoEngineError(f"Unsupported LSB delta version {version}")
+    return DeltaHeader((height, width, channels), digest, flips), body[_HEADER.size :]
+
+
+def read_delta_header(delta: bytes) -> DeltaHeader:
+    return _parse(delta)[0]
+
+
+def apply_delta(cover: np.ndarray, delta: bytes) -> np.ndarray:
+    """The exact stego array ``delta`` was encoded from, rebuilt from its ``cover``."""
+    header, compressed = _parse(delta)
+    if tuple(cover.shape) != header.shape or cover.dtype != np.uint8:
+        raise StegoEngineError(f"Cover shape {tuple(cover.shape)} does not match the delta's {header.shape}")
+    if cover_digest(cover) != header.cover_sha256:
+        raise StegoEngineError("Cover does not match the one the LSB delta was made from")
+    try:
+        packed = zlib.decompress(compressed)
+    except zlib.error as exc:
+        raise StegoEngineError(f"Corrupt LSB delta: {exc}") from None
+    indices = np.cumsum(_decode_varints(packed, header.flips))
+    stego = np.array(cover, copy=True)
+    flat = stego.reshape(-1)
+    if indices.size and int(indices[-1]) >= flat.size:
+        raise StegoEngineError("Corrupt LSB delta: flip index out of range")
+    flat[indices.astype(np.int64)] ^= np.uint8(1)
+    return stego
+
+
+def save_delta(path: str | os.PathLike[str], cover: np.ndarray, stego: np.ndarray) -> None:
+    file_path = Path(path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_bytes(encode_delta(cover, stego))
+
+
+def load_delta(path: str | os.PathLike[str]) -> bytes:
+    try:
+        return Path(path).read_bytes()
+    except OSError as exc:
+        raise StegoEngineError(f"Cannot read LSB delta {path}: {exc}") from None
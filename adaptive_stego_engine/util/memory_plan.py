@@ -0,0 +1,210 @@
+"""Peak memory estimates per pipeline stage and the execution strategy that fits a budget.
+
+Plans are made from the image dimensions and stream size before any heavy allocation.
+Every strategy produces bit-identical analysis, so it only changes how much memory is
+held at once: tiled analysis processes row bands with enough halo rows that each band
+matches the whole-image result and chunked ordering switches new-format embeds to the
+keyed permutation, with a warning since the descriptor then records another ordering.
+Tile streams (``StreamLayout.tiles``) analyse, order and measure only their tiles, so
+their estimates scale with the tiles rather than the image.
+"""
+from __future__ import annotations
+
+import dataclasses
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional, Tuple
+
+from .exceptions import StegoEngineError
+from .layout import AUTO_TILES, MAX_BITS, PixelOrdering, StreamLayout
+
+logger = logging.getLogger(__name__)
+
+MAX_MEMORY_ENV_VAR = "STEGO_MAX_MEMORY_MB"
+MB = 1 << 20
+# Rows per band for tiled analysis and banded SSIM, and the most halo rows a band reads.
+BAND_ROWS = 256
+BAND_HALO_ROWS = 8
+
+# Bytes per pixel, measured with tracemalloc on a 2000x2000 cover and rounded up.
+COVER_BYTES = 3
+DECODE_BYTES = 4  # Pillow's decode buffer, alive until the RGB array is copied out
+ANALYSIS_BYTES = 40  # texture maps, capacity and block stability with their scratch
+ANALYSIS_TILED_BYTES = 28  # the same with texture scratch bounded to one band
+ANALYSIS_KEPT_BYTES = 13  # gray, entropy, capacity and block maps
+ORDER_BYTES = 12  # argsort indices plus the uint32 order
+ORDER_KEPT_BYTES = 4
+STEGO_BYTES = 3
+SSIM_BYTES = 48  # float64 SSIM of one channel
+SSIM_TILED_BYTES = 8  # that channel's SSIM map
+SSIM_BAND_BYTES = 48  # per pixel of one band plus halo
+# Bytes per stream bit.
+PLAN_BYTES_PER_BIT = 34
+# Working set of the chunked loops: block checks, slot plans and segment reads.
+CHUNK_SCRATCH = 64 * MB
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    tiled: bool = False
+    keyed_order: bool = False
+    stages: Dict[str, int] = field(default_factory=dict)
+    budget: Optional[int] = None
+
+    @property
+    def band_rows(self) -> Optional[int]:
+        return BAND_ROWS if self.tiled else None
+
+    @property
+    def peak(self) -> int:
+        return max(self.stages.values(), default=0)
+
+    @property
+    def strategy(self) -> str:
+        parts = [
+            name
+            for name, enabled in (
+                ("tiled analysis", self.tiled),
+                ("chunked order", self.keyed_order),
+            )
+            if enabled
+        ]
+        return " + ".join(parts) or "in-core"
+
+    def describe(self) -> str:
+        budget = "unlimited" if self.budget is None else f"{self.budget // MB} MB"
+        return f"{self.strategy}, estimated peak {self.peak // MB} MB of {budget}"
+
+    def apply_layout(self, layout: Optional[StreamLayout]) -> Optional[StreamLayout]:
+        if layout is None or not self.keyed_order or layout.ordering == PixelOrdering.KEYED:
+            return layout
+        logger.warning(
+            "%s ordering does not fit the memory budget (%s); embedding with KEYED ordering instead",
+            layout.ordering.name,
+            self.describe(),
+        )
+        return dataclasses.replace(layout, ordering=PixelOrdering.KEYED)
+
+
+def memory_budget(max_memory_mb: Optional[int] = None) -> Optional[int]:
+    """Budget in bytes from ``max_memory_mb`` or ``STEGO_MAX_MEMORY_MB``; ``None`` is unlimited."""
+    if max_memory_mb is None:
+        configured = os.environ.get(MAX_MEMORY_ENV_VAR)
+        if not configured:
+            return None
+        try:
+            max_memory_mb = int(configured)
+        except ValueError:
+            raise StegoEngineError(f"{MAX_MEMORY_ENV_VAR} must be a whole number of megabytes") from None
+    if max_memory_mb <= 0:
+        raise StegoEngineError("Memory budget must be positive")
+    return max_memory_mb * MB
+
+
+def row_bands(height: int, band_rows: int, halo: int) -> Iterator[Tuple[int, int, int, int]]:
+    """``(start, stop, lo, hi)`` per band: rows ``start:stop`` computed from rows ``lo:hi``."""
+    for start in range(0, height, band_rows):
+        stop = min(height, start + band_rows)
+        yield start, stop, max(0, start - halo), min(height, stop + halo)
+
+
+def _analysis_stages(height: int, width: int, tiled: bool) -> Dict[str, int]:
+    pixels = height * width
+    analysis = (ANALYSIS_TILED_BYTES if tiled else ANALYSIS_BYTES) * pixels
+    return {
+        "decode": (COVER_BYTES + DECODE_BYTES) * pixels,
+        "analysis": COVER_BYTES * pixels + analysis + CHUNK_SCRATCH,
+    }
+
+
+def _choose(candidates, budget: Optional[int], subject: str) -> ExecutionPlan:
+    plans = [ExecutionPlan(stages=stages, budget=budget, **options) for options, stages in candidates]
+    for plan in plans:
+        if budget is None or plan.peak <= budget:
+            logger.info("%s: %s", subject, plan.describe())
+            return plan
+    leanest = plans[-1]
+    raise StegoEngineError(
+        f"{subject} needs about {leanest.peak // MB} MB even with {leanest.strategy}, "
+        f"over the {budget // MB} MB memory budget"
+    )
+
+
+def plan_embed(
+    height: int,
+    width: int,
+    stream_len: int,
+    layout: Optional[StreamLayout],
+    max_memory_mb: Optional[int] = None,
+) -> ExecutionPlan:
+    """Cheapest strategy whose estimated peak fits; raises ``StegoEngineError`` if none does.
+
+    Chunked ordering is only an option for new-format streams, whose descriptor records it.
+    Tile streams have a single strategy; for ``AUTO_TILES``, whose count is only chosen
+    after analysis, the tiles are estimated at one stream bit per pixel plus the margin.
+    """
+    budget = memory_budget(max_memory_mb)
+    pixels = height * width
+    if layout is not None and layout.tiles:
+        candidates = [({}, _tile_stages(height, width, stream_len, layout.tiles))]
+        return _choose(candidates, budget, f"Embedding tiles into {width}x{height}")
+    kept = (COVER_BYTES + ANALYSIS_KEPT_BYTES) * pixels
+
+    def stages(tiled: bool, keyed_order: bool) -> Dict[str, int]:
+        resident = kept + (0 if keyed_order else ORDER_KEPT_BYTES * pixels) + STEGO_BYTES * pixels
+        if tiled:
+            band = (BAND_ROWS + 2 * BAND_HALO_ROWS) * width
+            ssim = SSIM_TILED_BYTES * pixels + SSIM_BAND_BYTES * band
+        else:
+            ssim = SSIM_BYTES * pixels
+        return {
+            **_analysis_stages(height, width, tiled),
+            "order": kept + (0 if keyed_order else ORDER_BYTES * pixels),
+            "embed": resident + PLAN_BYTES_PER_BIT * stream_len * 8 + CHUNK_SCRATCH,
+            "metrics": resident + ssim,
+        }
+
+    candidates = [({}, stages(False, False)), ({"tiled": True}, stages(True, False))]
+    if layout is not None and layout.ordering != PixelOrdering.KEYED:
+        candidates.append(({"tiled": True, "keyed_order": True}, stages(True, True)))
+    return _choose(candidates, budget, f"Embedding into {width}x{height}")
+
+
+def _tile_stages(height: int, width: int, stream_len: int, tiles: int) -> Dict[str, int]:
+    from ..embedder.tiles import TILE_CAPACITY_MARGIN, TILE_SIZE
+
+    pixels = height * width
+    tile = TILE_SIZE * TILE_SIZE
+    if tiles == AUTO_TILES:
+        tiles = -(-int(stream_len * 8 * (1 + TILE_CAPACITY_MARGIN)) // tile)
+    analysed = min(pixels, tiles * tile)
+    # The analysis maps span the image as zero pages, materialised for analysed tiles only.
+    kept = COVER_BYTES * pixels + ANALYSIS_KEPT_BYTES * analysed
+    resident = kept + ORDER_KEPT_BYTES * analysed + STEGO_BYTES * pixels
+    return {
+        "decode": (COVER_BYTES + DECODE_BYTES) * pixels,
+        "analysis": kept + ANALYSIS_BYTES * tile + CHUNK_SCRATCH,
+        "order": kept + ORDER_BYTES * analysed,
+        "embed": resident + PLAN_BYTES_PER_BIT * stream_len * 8 + CHUNK_SCRATCH,
+        # The metrics visit the tiles' regions only.
+        "metrics": resident + SSIM_BYTES * analysed,
+    }
+
+
+def plan_extract(height: int, width: int, max_memory_mb: Optional[int] = None) -> ExecutionPlan:
+    """Strategy for extracting a new-format stream from a ``height`` x ``width`` image."""
+    budget = memory_budget(max_memory_mb)
+    pixels = height * width
+    kept = (COVER_BYTES + ANALYSIS_KEPT_BYTES) * pixels
+
+    def stages(tiled: bool) -> Dict[str, int]:
+        # At most ``MAX_BITS`` stream bits per pixel, read one uint8 per bit.
+        return {
+            **_analysis_stages(height, width, tiled),
+            "order": kept + ORDER_BYTES * pixels,
+            "read": kept + ORDER_KEPT_BYTES * pixels + MAX_BITS * pixels + CHUNK_SCRATCH,
+        }
+
+    candidates = [({}, stages(False)), ({"tiled": True}, stages(True))]
+    return _choose(candidates, budget, f"Extracting from {width}x{height}")
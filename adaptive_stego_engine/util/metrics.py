@@ -1,46 +1,176 @@
 """Quality metrics for adaptive embedding."""
 from __future__ import annotations
 
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
 import numpy as np
-from scipy.ndimage import gaussian_filter
+
+from .memory_plan import row_bands
+
+SSIM_SIGMA = 1.5
+# Rows ``gaussian_filter`` reads on each side (its default truncation is 4 sigma).
+SSIM_HALO = int(4.0 * SSIM_SIGMA + 0.5)
+METRIC_CHUNK = 1 << 20
+
+
+@dataclass(frozen=True)
+class CoverStatistics:
+    """Cover-side SSIM moments and histogram, reusable across many stego candidates."""
+
+    ssim_moments: Tuple[Tuple[np.ndarray, np.ndarray], ...]
+    histogram: np.ndarray
+
+
+def _ssim_moments(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    from scipy.ndimage import gaussian_filter
+
+    x = x.astype(np.float64)
+    mu_x = gaussian_filter(x, sigma=SSIM_SIGMA)
+    np.multiply(x, x, out=x)
+    sigma_x = gaussian_filter(x, sigma=SSIM_SIGMA)
+    np.multiply(mu_x, mu_x, out=x)
+    sigma_x -= x
+    return mu_x, sigma_x
+
+
+def _histogram(rgb: np.ndarray) -> np.ndarray:
+    return np.histogram(rgb, bins=256, range=(0, 255))[0]
+
+
+def cover_statistics(cover: np.ndarray) -> CoverStatistics:
+    return CoverStatistics(
+        ssim_moments=tuple(_ssim_moments(cover[..., c]) for c in range(cover.shape[2])),
+        histogram=_histogram(cover),
+    )
 
 
 def compute_psnr(cover: np.ndarray, stego: np.ndarray) -> float:
-    cover_f = cover.astype(np.float64)
-    stego_f = stego.astype(np.float64)
-    mse = np.mean((cover_f - stego_f) ** 2)
+    cover_flat = cover.reshape(-1)
+    stego_flat = stego.reshape(-1)
+    # Integer squared error is exact, so chunking does not change the result.
+    squared = 0
+    for start in range(0, cover_flat.size, METRIC_CHUNK):
+        diff = cover_flat[start : start + METRIC_CHUNK].astype(np.int64) - stego_flat[start : start + METRIC_CHUNK]
+        squared += int(np.dot(diff, diff))
+    mse = squared / cover_flat.size
     if mse == 0:
         return 99.0
     return 20 * np.log10(255.0 / np.sqrt(mse))
 
 
-def _ssim_per_channel(x: np.ndarray, y: np.ndarray) -> float:
-    x = x.astype(np.float64)
-    y = y.astype(np.float64)
+def _ssim_per_channel(
+    x: np.ndarray,
+    y: np.ndarray,
+    moments: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    band_rows: Optional[int] = None,
+) -> float:
+    if moments is not None or band_rows is None or band_rows >= x.shape[0]:
+        return float(np.mean(_ssim_map(x, y, moments)))
+    # Same map as the whole-channel path, assembled band by band before the single mean.
+    ssim_map = np.empty(x.shape, dtype=np.float64)
+    for start, stop, lo, hi in row_bands(x.shape[0], band_rows, SSIM_HALO):
+        ssim_map[start:stop] = _ssim_map(x[lo:hi], y[lo:hi])[start - lo : stop - lo]
+    return float(np.mean(ssim_map))
+
+
+def _ssim_map(
+    x: np.ndarray,
+    y: np.ndarray,
+    moments: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> np.ndarray:
+    from scipy.ndimage import gaussian_filter
+
+    mu_x, sigma_x = moments if moments is not None else _ssim_moments(x)
     c1 = (0.01 * 255) ** 2
     c2 = (0.03 * 255) ** 2
-    mu_x = gaussian_filter(x, sigma=1.5)
-    mu_y = gaussian_filter(y, sigma=1.5)
-    sigma_x = gaussian_filter(x * x, sigma=1.5) - mu_x ** 2
-    sigma_y = gaussian_filter(y * y, sigma=1.5) - mu_y ** 2
-    sigma_xy = gaussian_filter(x * y, sigma=1.5) - mu_x * mu_y
-    numerator = (2 * mu_x * mu_y + c1) * (2 * sigma_xy + c2)
-    denominator = (mu_x ** 2 + mu_y ** 2 + c1) * (sigma_x + sigma_y + c2)
-    ssim_map = numerator / (denominator + 1e-12)
-    return float(np.mean(ssim_map))
+    mu_y, sigma_y = _ssim_moments(y)
+    # Same operations as the textbook formula, evaluated into a few reused float64 buffers.
+    numerator = np.multiply(x, y, dtype=np.float64)
+    sigma_xy = gaussian_filter(numerator, sigma=SSIM_SIGMA)
+    np.multiply(mu_x, mu_y, out=numerator)
+    sigma_xy -= numerator
+    numerator *= 2
+    numerator += c1
+    sigma_xy *= 2
+    sigma_xy += c2
+    numerator *= sigma_xy
+    denominator = np.multiply(mu_x, mu_x, out=sigma_xy)
+    np.multiply(mu_y, mu_y, out=mu_y)
+    denominator += mu_y
+    denominator += c1
+    sigma_y += sigma_x
+    sigma_y += c2
+    denominator *= sigma_y
+    denominator += 1e-12
+    numerator /= denominator
+    return numerator
 
 
-def compute_ssim(cover: np.ndarray, stego: np.ndarray) -> float:
+def compute_ssim(
+    cover: np.ndarray,
+    stego: np.ndarray,
+    stats: Optional[CoverStatistics] = None,
+    band_rows: Optional[int] = None,
+) -> float:
+    """Mean SSIM over channels; ``band_rows`` bounds scratch memory without changing the result."""
     if cover.shape != stego.shape:
         raise ValueError("Images must match for SSIM")
     channels = []
     for c in range(cover.shape[2]):
-        channels.append(_ssim_per_channel(cover[..., c], stego[..., c]))
+        moments = stats.ssim_moments[c] if stats is not None else None
+        channels.append(_ssim_per_channel(cover[..., c], stego[..., c], moments, band_rows))
     return float(np.mean(channels))
 
 
-def histogram_drift(cover: np.ndarray, stego: np.ndarray) -> float:
-    cover_hist = np.histogram(cover, bins=256, range=(0, 255))[0]
-    stego_hist = np.histogram(stego, bins=256, range=(0, 255))[0]
+def histogram_drift(cover: np.ndarray, stego: np.ndarray, stats: Optional[CoverStatistics] = None) -> float:
+    cover_hist = stats.histogram if stats is not None else _histogram(cover)
+    stego_hist = _histogram(stego)
     diff = np.abs(cover_hist - stego_hist)
     return float(np.sum(diff) / (cover.size))
+
+
+def regional_quality(
+    cover: np.ndarray,
+    stego: np.ndarray,
+    regions: Sequence[Tuple[int, int, int, int]],
+) -> Tuple[float, float, float]:
+    """PSNR, SSIM and histogram drift of a stego image equal to ``cover`` outside ``regions``.
+
+    ``regions`` are ``(y0, y1, x0, x1)`` rectangles and may overlap; the cost grows with
+    their area, not the image's. PSNR and drift are exact. SSIM is one minus the deficit
+    of the SSIM windows that reach a region, computed from crops with enough halo to match
+    the whole-image map; windows elsewhere compare identical pixels, so the result equals
+    ``compute_ssim`` up to float rounding.
+    """
+    height, width, channels = cover.shape
+    # Untouched zero pages: only the rows around the regions are ever materialised.
+    counted = np.zeros((height, width), dtype=bool)
+    affected = np.zeros((height, width), dtype=bool)
+    squared = 0
+    hist_delta = np.zeros(256, dtype=np.int64)
+    deficit = 0.0
+    for y0, y1, x0, x1 in regions:
+        fresh = ~counted[y0:y1, x0:x1]
+        counted[y0:y1, x0:x1] = True
+        cover_pixels = cover[y0:y1, x0:x1][fresh]
+        stego_pixels = stego[y0:y1, x0:x1][fresh]
+        diff = (cover_pixels.astype(np.int64) - stego_pixels).reshape(-1)
+        squared += int(np.dot(diff, diff))
+        hist_delta += _histogram(cover_pixels) - _histogram(stego_pixels)
+
+        ay0, ay1 = max(0, y0 - SSIM_HALO), min(height, y1 + SSIM_HALO)
+        ax0, ax1 = max(0, x0 - SSIM_HALO), min(width, x1 + SSIM_HALO)
+        fresh = ~affected[ay0:ay1, ax0:ax1]
+        affected[ay0:ay1, ax0:ax1] = True
+        wy0, wy1 = max(0, ay0 - SSIM_HALO), min(height, ay1 + SSIM_HALO)
+        wx0, wx1 = max(0, ax0 - SSIM_HALO), min(width, ax1 + SSIM_HALO)
+        inner = (slice(ay0 - wy0, ay1 - wy0), slice(ax0 - wx0, ax1 - wx0))
+        for c in range(channels):
+            ssim_map = _ssim_map(cover[wy0:wy1, wx0:wx1, c], stego[wy0:wy1, wx0:wx1, c])[inner]
+            deficit += float((1.0 - ssim_map[fresh]).sum())
+    mse = squared / cover.size
+    psnr = 99.0 if mse == 0 else float(20 * np.log10(255.0 / np.sqrt(mse)))
+    ssim = 1.0 - deficit / cover.size
+    drift = float(np.abs(hist_delta).sum() / cover.size)
+    return psnr, ssim, drift
@@ -0,0 +1,114 @@
+"""Downsampled previews for the GUI: a 2×2 box-filter pyramid plus analysis heatmaps.
+
+Only the pyramid level that fits the preview widget is kept. Each level is built from
+the previous one in row bands and the previous one is dropped, so a preview never
+holds another full-size copy of the image. PNG files are shrunk by Pillow while
+decoding and never become a full-size NumPy array at all.
+"""
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from .image_io import load_png_preview, png_dimensions
+from .layout import MAX_BITS
+
+PREVIEW_SIZE = (240, 240)
+# Heatmaps of the cached analysis maps, with the map value drawn at full strength.
+OVERLAY_RANGES: Dict[str, float] = {"capacity": float(MAX_BITS), "entropy": 1.0}
+OVERLAY_ALPHA = 0.6
+_BAND_ROWS = 64
+
+
+@dataclass(frozen=True)
+class Preview:
+    """One pyramid level of an image and of its analysis maps.
+
+    ``height`` and ``width`` are the full-size dimensions; ``overlays`` maps names from
+    ``OVERLAY_RANGES`` to float32 maps with exactly the height and width of ``image``.
+    """
+
+    image: np.ndarray
+    height: int
+    width: int
+    overlays: Dict[str, np.ndarray] = field(default_factory=dict)
+
+
+def pyramid_factor(height: int, width: int, target: Tuple[int, int] = PREVIEW_SIZE) -> int:
+    """Largest power-of-two reduction whose level still covers ``target`` (height, width) when aspect-fitted."""
+    scale = min(target[0] / height, target[1] / width, 1.0)
+    fitted_height, fitted_width = max(1, math.ceil(height * scale)), max(1, math.ceil(width * scale))
+    factor = 1
+    while height // (factor * 2) >= fitted_height and width // (factor * 2) >= fitted_width:
+        factor *= 2
+    return factor
+
+
+def halve(image: np.ndarray, dtype: Optional[np.dtype] = None) -> np.ndarray:
+    """2×2 box-mean downsample (odd last row/column dropped), rounded for integer ``dtype``."""
+    dtype = image.dtype if dtype is None else np.dtype(dtype)
+    height, width = image.shape[0] // 2, image.shape[1] // 2
+    out = np.empty((height, width) + image.shape[2:], dtype=dtype)
+    for start in range(0, height, _BAND_ROWS):
+        stop = min(height, start + _BAND_ROWS)
+        band = image[2 * start : 2 * stop, : 2 * width].astype(np.float32)
+        mean = (band[0::2, 0::2] + band[1::2, 0::2] + band[0::2, 1::2] + band[1::2, 1::2]) * np.float32(0.25)
+        out[start:stop] = np.rint(mean) if np.issubdtype(dtype, np.integer) else mean
+    return out
+
+
+def pyramid_level(image: np.ndarray, factor: int, dtype: Optional[np.dtype] = None) -> np.ndarray:
+    """Level ``log2(factor)`` of ``image``'s pyramid; only two levels are alive at a time."""
+    level = image
+    while factor > 1:
+        level = halve(level, dtype)
+        factor //= 2
+    return np.ascontiguousarray(level, dtype=dtype)
+
+
+def build_preview(
+    source: Union[str, os.PathLike[str], np.ndarray],
+    target: Tuple[int, int] = PREVIEW_SIZE,
+    maps: Optional[Dict[str, np.ndarray]] = None,
+) -> Preview:
+    """Preview of a PNG path or an RGB array, with ``maps`` (full-size, by overlay name) reduced alongside."""
+    if isinstance(source, np.ndarray):
+        height, width = source.shape[:2]
+        factor = pyramid_factor(height, width, target)
+        image = pyramid_level(source, factor)
+    else:
+        height, width = png_dimensions(source)
+        factor = pyramid_factor(height, width, target)
+        image = load_png_preview(source, factor)
+    overlays = {}
+    for name, values in (maps or {}).items():
+        if values.shape[:2] != (height, width):
+            raise ValueError(f"Overlay {name!r} must be full-size")
+        overlays[name] = _pad_to(pyramid_level(values, factor, np.float32), image.shape[:2])
+    return Preview(image, height, width, overlays)
+
+
+def _pad_to(level: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+    # Pillow's reduce keeps the partial block an odd edge leaves, while ``halve`` drops it,
+    # so a PNG preview can be a row or column larger per level than the map reduced here;
+    # the map's edge is repeated to cover it.
+    missing = ((0, shape[0] - level.shape[0]), (0, shape[1] - level.shape[1]))
+    return np.pad(level, missing, mode="edge") if any(after for _, after in missing) else level
+
+
+def heatmap_overlay(image: np.ndarray, values: np.ndarray, value_range: float, alpha: float = OVERLAY_ALPHA) -> np.ndarray:
+    """Blend ``values`` over ``image`` on a yellow→red ramp whose weight grows with the value.
+
+    Pixels with a zero value (no capacity, flat texture) keep their own colour.
+    """
+    if values.shape != image.shape[:2]:
+        raise ValueError("Overlay must match the image")
+    level = np.clip(values / np.float32(value_range), 0, 1)[..., None]
+    colour = np.concatenate([np.full_like(level, 255), 255 * (1 - level), np.zeros_like(level)], axis=-1)
+    weight = np.float32(alpha) * level
+    blended = image * (1 - weight) + colour * weight
+    return np.rint(blended).astype(np.uint8)
@@ -21,3 +21,65 @@ def shuffle_indices(indices: Iterable[int], seed: str) -> np.ndarray:
 
 def random_state(seed: str) -> np.random.Generator:
     return np.random.default_rng(_seed_from_string(seed))
+
+
+FEISTEL_ROUNDS = 4
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    # splitmix64 finaliser; uint64 array arithmetic wraps modulo 2**64.
+    values = (values ^ (values >> np.uint64(30))) * _MIX_1
+    values = (values ^ (values >> np.uint64(27))) * _MIX_2
+    return values ^ (values >> np.uint64(31))
+
+
+class KeyedPermutation:
+    """Keyed permutation of ``range(size)`` evaluated on demand.
+
+    A balanced Feistel network over the smallest even bit width covering ``size``
+    with cycle walking back into the domain, so ``perm[i]`` costs O(1) memory and
+    any prefix can be produced in vectorised chunks without materialising the order.
+    Supports ``len()``, integer indexing, slicing and integer-array indexing.
+    """
+
+    def __init__(self, seed: str, size: int) -> None:
+        if size < 1:
+            raise ValueError("Permutation size must be positive")
+        self.size = size
+        self._half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self._half_mask = np.uint64((1 << self._half_bits) - 1)
+        self._keys = random_state(f"{seed}|feistel").integers(
+            0, np.iinfo(np.uint64).max, FEISTEL_ROUNDS, dtype=np.uint64, endpoint=True
+        )
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _encrypt(self, values: np.ndarray) -> np.ndarray:
+        shift = np.uint64(self._half_bits)
+        left = values >> shift
+        right = values & self._half_mask
+        for key in self._keys:
+            left, right = right, left ^ (_mix64(right ^ key) & self._half_mask)
+        return (left << shift) | right
+
+    def take(self, indices: np.ndarray) -> np.ndarray:
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size and (indices.min() < 0 or indices.max() >= self.size):
+            raise IndexError("Permutation index out of range")
+        values = self._encrypt(indices.astype(np.uint64))
+        pending = np.flatnonzero(values >= np.uint64(self.size))
+        while pending.size:
+            values[pending] = self._encrypt(values[pending])
+            pending = pending[values[pending] >= np.uint64(self.size)]
+        return values.astype(np.int64)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.take(np.arange(*key.indices(self.size), dtype=np.int64))
+        if isinstance(key, (int, np.integer)):
+            index = int(key) + self.size if key < 0 else int(key)
+            return int(self.take(np.array([index]))[0])
+        return self.take(key)
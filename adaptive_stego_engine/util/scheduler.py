@@ -0,0 +1,362 @@
+"""Cost-model-driven scheduling of mixed-size embed and extract batches.
+
+Each job's run time is predicted before anything is decoded, from the image dimensions in
+its PNG header and its stream size, by a linear ``CostModel`` per job kind. Jobs start
+longest first, so big covers do not arrive at the tail of the batch while other workers
+sit idle, and a job is only admitted when its estimated peak memory fits beside the jobs
+already running. Smaller jobs backfill free workers when they are predicted to finish
+before the blocked job could start anyway (EASY backfilling), so admission never delays
+the longest pending job. ``BatchReport`` pairs predicted and measured seconds per job,
+and ``fit_cost_model`` refits the coefficients from them.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .exceptions import StegoEngineError
+from .memory_plan import memory_budget
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+COST_MODEL_ENV_VAR = "STEGO_COST_MODEL"
+JOB_KINDS = ("embed", "embed_tiled", "extract")
+# Records of a kind needed before ``fit_cost_model`` replaces its coefficients.
+MIN_FIT_RECORDS = 3
+
+
+@dataclass(frozen=True)
+class CostCoefficients:
+    fixed: float
+    per_megapixel: float
+    per_kilobit: float
+
+    def predict(self, pixels: int, bits: int) -> float:
+        return self.fixed + self.per_megapixel * pixels / 1e6 + self.per_kilobit * bits / 1e3
+
+
+# Seconds on one core, fitted by the ``scheduler`` benchmark on the synthetic covers.
+# Whole-image jobs are dominated by the texture analysis, tiled embeds by the analysed
+# tiles, whose count follows the stream. Extraction cannot see the layout descriptor before the
+# image is decoded, so it is predicted as a whole-image read, an upper bound for tiled streams.
+DEFAULT_COEFFICIENTS: Dict[str, CostCoefficients] = {
+    "embed": CostCoefficients(0.1, 4.5, 0.002),
+    "embed_tiled": CostCoefficients(0.3, 0.1, 0.003),
+    "extract": CostCoefficients(0.05, 3.0, 0.0),
+}
+
+
+@dataclass(frozen=True)
+class CostModel:
+    coefficients: Dict[str, CostCoefficients] = field(default_factory=lambda: dict(DEFAULT_COEFFICIENTS))
+
+    def predict(self, kind: str, pixels: int, bits: int) -> float:
+        try:
+            return self.coefficients[kind].predict(pixels, bits)
+        except KeyError:
+            raise StegoEngineError(f"No cost coefficients for job kind {kind!r}") from None
+
+    def to_json(self) -> str:
+        return json.dumps({kind: asdict(coefficients) for kind, coefficients in self.coefficients.items()}, indent=2)
+
+    @classmethod
+    def from_json(cls, text: str) -> "CostModel":
+        try:
+            data = json.loads(text)
+            coefficients = {kind: CostCoefficients(**values) for kind, values in data.items()}
+        except (ValueError, TypeError, AttributeError) as exc:
+            raise StegoEngineError(f"Invalid cost model: {exc}") from None
+        return cls({**DEFAULT_COEFFICIENTS, **coefficients})
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        Path(path).write_text(self.to_json() + "\n", encoding="utf-8")
+
+
+def load_cost_model(path: Optional[str | os.PathLike[str]] = None) -> CostModel:
+    """Model saved at ``path`` or ``STEGO_COST_MODEL``; the built-in coefficients otherwise."""
+    path = path or os.environ.get(COST_MODEL_ENV_VAR)
+    if not path:
+        return CostModel()
+    try:
+        return CostModel.from_json(Path(path).read_text(encoding="utf-8"))
+    except OSError as exc:
+        raise StegoEngineError(f"Cannot read cost model {path}: {exc}") from None
+
+
+@dataclass(frozen=True)
+class BatchTask:
+    """One job: ``fn(*args)`` runs on a worker (it must be picklable for process pools)."""
+
+    name: str
+    kind: str
+    pixels: int
+    bits: int
+    memory: int
+    fn: Callable[..., Any]
+    args: tuple = ()
+
+
+def _raise_error(message: str) -> None:
+    raise StegoEngineError(message)
+
+
+def failed_task(name: str, kind: str, error: StegoEngineError) -> BatchTask:
+    """Placeholder for a job rejected while planning, reported as failed without running."""
+    return BatchTask(name, kind, 0, 0, 0, _raise_error, (str(error),))
+
+
+@dataclass(frozen=True)
+class JobRecord:
+    name: str
+    kind: str
+    pixels: int
+    bits: int
+    memory: int
+    predicted: float
+    actual: Optional[float]
+    started: float
+    finished: float
+    error: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class BatchReport:
+    """Results and records in task order; ``results[i]`` is ``None`` where ``records[i].error`` is set."""
+
+    results: List[Any]
+    records: List[JobRecord]
+    seconds: float
+    workers: int
+    budget: int
+
+    @property
+    def errors(self) -> List[JobRecord]:
+        return [record for record in self.records if record.error is not None]
+
+    def refit(self, model: Optional[CostModel] = None) -> CostModel:
+        return fit_cost_model(self.records, model)
+
+
+def fit_cost_model(records: Iterable[JobRecord], base: Optional[CostModel] = None) -> CostModel:
+    """Non-negative least-squares refit per kind; kinds with too few records keep ``base``."""
+    import numpy as np
+    from scipy.optimize import nnls
+
+    base = base or CostModel()
+    by_kind: Dict[str, List[JobRecord]] = {}
+    for record in records:
+        if record.actual is not None:
+            by_kind.setdefault(record.kind, []).append(record)
+    coefficients = dict(base.coefficients)
+    for kind, kind_records in by_kind.items():
+        if len(kind_records) < MIN_FIT_RECORDS:
+            continue
+        features = np.array([(1.0, r.pixels / 1e6, r.bits / 1e3) for r in kind_records])
+        seconds = np.array([r.actual for r in kind_records])
+        solution, _residual = nnls(features, seconds)
+        coefficients[kind] = CostCoefficients(*(float(value) for value in solution))
+    return CostModel(coefficients)
+
+
+def system_memory() -> Optional[int]:
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def batch_budget(max_memory_mb: Optional[int] = None) -> int:
+    """Bytes all running jobs may hold together: the configured budget, else physical memory."""
+    return memory_budget(max_memory_mb) or system_memory() or (1 << 62)
+
+
+class BatchScheduler:
+    """Longest-first admission of jobs onto ``workers`` slots within a memory ``budget``.
+
+    ``start(now)`` returns the jobs to launch at time ``now`` and ``finish(index)`` frees a
+    job's slot and memory. A job estimated above the whole budget is admitted alone.
+    ``longest_first=False`` gives plain FIFO admission (in input order, no backfilling).
+    """
+
+    def __init__(
+        self,
+        predicted: Sequence[float],
+        memory: Sequence[int],
+        workers: int,
+        budget: int,
+        longest_first: bool = True,
+    ) -> None:
+        if workers < 1:
+            raise StegoEngineError("A batch needs at least one worker")
+        self.predicted = list(predicted)
+        self.memory = [min(int(m), budget) for m in memory]
+        self.workers = workers
+        self.budget = budget
+        self.longest_first = longest_first
+        order = range(len(self.predicted))
+        self.pending = sorted(order, key=lambda i: -self.predicted[i]) if longest_first else list(order)
+        self.running: Dict[int, float] = {}
+        self.in_use = 0
+
+    @property
+    def done(self) -> bool:
+        return not self.pending and not self.running
+
+    def _fits(self, index: int) -> bool:
+        return len(self.running) < self.workers and self.in_use + self.memory[index] <= self.budget
+
+    def _shadow(self, head: int) -> Tuple[float, int, int]:
+        """Predicted time at which ``head`` can start, and the memory and slots left beside it then."""
+        free_slots = self.workers - len(self.running)
+        free_memory = self.budget - self.in_use
+        for end, index in sorted((start + self.predicted[i], i) for i, start in self.running.items()):
+            free_slots += 1
+            free_memory += self.memory[index]
+            if free_slots > 0 and free_memory >= self.memory[head]:
+                return end, free_memory - self.memory[head], free_slots - 1
+        return math.inf, 0, 0
+
+    def start(self, now: float) -> List[int]:
+        started: List[int] = []
+        while self.pending and self._fits(self.pending[0]):
+            started.append(self._launch(self.pending.pop(0), now))
+        if not self.pending or not self.longest_first:
+            return started
+        shadow, spare_memory, spare_slots = self._shadow(self.pending[0])
+        for index in list(self.pending[1:]):
+            if not self._fits(index):
+                continue
+            if now + self.predicted[index] > shadow:
+                # Still running when the head starts: only what is left beside the head will do.
+                if spare_slots == 0 or self.memory[index] > spare_memory:
+                    continue
+                spare_slots -= 1
+                spare_memory -= self.memory[index]
+            self.pending.remove(index)
+            started.append(self._launch(index, now))
+        return started
+
+    def _launch(self, index: int, now: float) -> int:
+        self.running[index] = now
+        self.in_use += self.memory[index]
+        return index
+
+    def finish(self, index: int) -> None:
+        del self.running[index]
+        self.in_use -= self.memory[index]
+
+
+def simulate_makespan(
+    predicted: Sequence[float],
+    memory: Sequence[int],
+    workers: int,
+    budget: int,
+    longest_first: bool = True,
+) -> float:
+    """Batch length if every job took exactly its predicted time."""
+    scheduler = BatchScheduler(predicted, memory, workers, budget, longest_first)
+    now = 0.0
+    ends: Dict[int, float] = {}
+    while not scheduler.done:
+        for index in scheduler.start(now):
+            ends[index] = now + scheduler.predicted[index]
+        if not ends:
+            raise StegoEngineError("Scheduler stalled with no running jobs")
+        index = min(ends, key=ends.__getitem__)
+        now = ends.pop(index)
+        scheduler.finish(index)
+    return now
+
+
+def _timed_call(fn: Callable[..., Any], args: tuple) -> Tuple[Any, float, Optional[str]]:
+    start = time.perf_counter()
+    try:
+        result, error = fn(*args), None
+    except StegoEngineError as exc:
+        result, error = None, str(exc)
+    return result, time.perf_counter() - start, error
+
+
+def run_batch(
+    tasks: Sequence[BatchTask],
+    model: Optional[CostModel] = None,
+    max_workers: Optional[int] = None,
+    max_memory_mb: Optional[int] = None,
+    processes: bool = True,
+    executor: Optional[Executor] = None,
+) -> BatchReport:
+    """Run ``tasks`` on a process or thread pool under ``BatchScheduler``.
+
+    ``max_memory_mb`` bounds the estimated peak of all running jobs together (default:
+    ``STEGO_MAX_MEMORY_MB``, else physical memory). Threads (``processes=False``) skip
+    process start-up and pickling and share in-process caches; the heavy stages (SciPy
+    filters, PBKDF2, AES-GCM and most NumPy kernels) release the GIL. ``executor`` runs
+    the jobs on a caller's long-lived pool, which is left open, with ``max_workers`` jobs
+    at a time. A ``StegoEngineError`` fails only its own job and is recorded in the
+    report; any other exception aborts the batch.
+    """
+    model = model or load_cost_model()
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(tasks) or 1))
+    budget = batch_budget(max_memory_mb)
+    predicted = [model.predict(task.kind, task.pixels, task.bits) for task in tasks]
+    scheduler = BatchScheduler(predicted, [task.memory for task in tasks], workers, budget)
+    outcomes: Dict[int, Tuple[Any, float, Optional[str]]] = {}
+    starts: Dict[int, float] = {}
+    finishes: Dict[int, float] = {}
+    origin = time.perf_counter()
+
+    def clock() -> float:
+        return time.perf_counter() - origin
+
+    def dispatch(pool: Executor) -> None:
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        futures = {}
+        while not scheduler.done:
+            for index in scheduler.start(clock()):
+                starts[index] = clock()
+                futures[pool.submit(_timed_call, tasks[index].fn, tasks[index].args)] = index
+            completed, _running = wait(futures, return_when=FIRST_COMPLETED)
+            for future in completed:
+                index = futures.pop(future)
+                outcomes[index] = future.result()
+                finishes[index] = clock()
+                scheduler.finish(index)
+
+    if executor is not None:
+        dispatch(executor)
+    elif workers == 1:
+        while not scheduler.done:
+            for index in scheduler.start(clock()):
+                starts[index] = clock()
+                outcomes[index] = _timed_call(tasks[index].fn, tasks[index].args)
+                finishes[index] = clock()
+                scheduler.finish(index)
+    else:
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        with (ProcessPoolExecutor if processes else ThreadPoolExecutor)(max_workers=workers) as pool:
+            dispatch(pool)
+    records = [
+        JobRecord(
+            name=task.name,
+            kind=task.kind,
+            pixels=task.pixels,
+            bits=task.bits,
+            memory=task.memory,
+            predicted=predicted[index],
+            actual=outcomes[index][1] if outcomes[index][2] is None else None,
+            started=starts[index],
+            finished=finishes[index],
+            error=outcomes[index][2],
+        )
+        for index, task in enumerate(tasks)
+    ]
+    results = [outcomes[index][0] for index in range(len(tasks))]
+    return BatchReport(results, records, clock(), workers, budget)
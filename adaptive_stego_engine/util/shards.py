@@ -0,0 +1,99 @@
+"""Shard records for payloads split across several covers.
+
+Every shard carries the set id, its index, the shard count and the length and SHA-256
+digest of the whole payload. Records are only ever embedded inside authenticated
+(AES-GCM) streams, so these fields cannot be altered without failing decryption.
+"""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Iterable, List, Sequence
+
+from .exceptions import StegoEngineError
+
+SHARD_MAGIC = b"SHD1"
+SET_ID_LEN = 16
+DIGEST_LEN = 32
+SHARD_HEADER_LEN = len(SHARD_MAGIC) + SET_ID_LEN + 2 + 2 + 4 + DIGEST_LEN
+MAX_SHARDS = 2 ** 16 - 1
+
+
+@dataclass(frozen=True)
+class Shard:
+    set_id: bytes
+    index: int
+    total: int
+    payload_len: int
+    payload_digest: bytes
+    data: bytes
+
+
+def pack_shard(shard: Shard) -> bytes:
+    record = bytearray(SHARD_MAGIC)
+    record += shard.set_id
+    record += shard.index.to_bytes(2, "big")
+    record += shard.total.to_bytes(2, "big")
+    record += shard.payload_len.to_bytes(4, "big")
+    record += shard.payload_digest
+    record += shard.data
+    return bytes(record)
+
+
+def unpack_shard(record: bytes) -> Shard:
+    if len(record) < SHARD_HEADER_LEN or not record.startswith(SHARD_MAGIC):
+        raise StegoEngineError("Not a shard record")
+    idx = len(SHARD_MAGIC)
+    set_id = record[idx : idx + SET_ID_LEN]
+    idx += SET_ID_LEN
+    index = int.from_bytes(record[idx : idx + 2], "big")
+    total = int.from_bytes(record[idx + 2 : idx + 4], "big")
+    payload_len = int.from_bytes(record[idx + 4 : idx + 8], "big")
+    idx += 8
+    digest = record[idx : idx + DIGEST_LEN]
+    if not 0 <= index < total:
+        raise StegoEngineError("Corrupted shard index")
+    return Shard(set_id, index, total, payload_len, digest, record[SHARD_HEADER_LEN:])
+
+
+def split_payload(payload: bytes, sizes: Sequence[int], set_id: bytes) -> List[Shard]:
+    """Cut ``payload`` into consecutive shards of the given non-zero ``sizes``."""
+    if sum(sizes) != len(payload) or any(size <= 0 for size in sizes):
+        raise StegoEngineError("Shard sizes must be positive and cover the payload exactly")
+    if len(sizes) > MAX_SHARDS:
+        raise StegoEngineError(f"At most {MAX_SHARDS} shards are supported")
+    digest = hashlib.sha256(payload).digest()
+    shards = []
+    offset = 0
+    for index, size in enumerate(sizes):
+        shards.append(Shard(set_id, index, len(sizes), len(payload), digest, payload[offset : offset + size]))
+        offset += size
+    return shards
+
+
+def reassemble_shards(shards: Iterable[Shard]) -> bytes:
+    """Join shards given in any order, checking that they form one complete set."""
+    by_index = {}
+    first = None
+    for shard in shards:
+        first = first or shard
+        if (shard.set_id, shard.total, shard.payload_len, shard.payload_digest) != (
+            first.set_id,
+            first.total,
+            first.payload_len,
+            first.payload_digest,
+        ):
+            raise StegoEngineError("Shards belong to different payloads")
+        if shard.index in by_index:
+            raise StegoEngineError(f"Duplicate shard {shard.index + 1}/{shard.total}")
+        by_index[shard.index] = shard
+    if first is None:
+        raise StegoEngineError("No shards supplied")
+    missing = sorted(set(range(first.total)) - set(by_index))
+    if missing:
+        listed = ", ".join(str(index + 1) for index in missing)
+        raise StegoEngineError(f"Missing shard(s) {listed} of {first.total}")
+    payload = b"".join(by_index[index].data for index in range(first.total))
+    if len(payload) != first.payload_len or hashlib.sha256(payload).digest() != first.payload_digest:
+        raise StegoEngineError("Reassembled payload failed integrity check")
+    return payload
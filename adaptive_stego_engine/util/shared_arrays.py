@@ -0,0 +1,196 @@
+"""NumPy arrays in named shared-memory segments, passed to worker processes as small handles.
+
+A ``SharedArrayPool`` in the parent process owns every segment. Workers receive
+picklable ``SharedArray`` handles and map them in place with ``mapped()``; they never
+unlink a segment, so a worker that crashes cannot leak or remove one.
+"""
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from .exceptions import StegoEngineError
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+# Serialises segment creation and attachment, which temporarily patches the resource tracker.
+_tracker_lock = threading.Lock()
+# Mappings closed while an array view still referenced them; retried on every later close.
+_lingering: List["SharedMemory"] = []
+
+
+def _create(nbytes: int) -> "SharedMemory":
+    from multiprocessing import shared_memory
+
+    with _tracker_lock:
+        return shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+
+
+def _attach(name: str) -> "SharedMemory":
+    from multiprocessing import resource_tracker, shared_memory
+
+    with _tracker_lock:
+        try:
+            try:
+                return shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                pass
+            # Before Python 3.13 attaching registers the segment with the resource tracker,
+            # which unlinks it when the attaching process exits; only the owner may do that.
+            register = resource_tracker.register
+            resource_tracker.register = lambda *args, **kwargs: None
+            try:
+                return shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        except FileNotFoundError as exc:
+            raise StegoEngineError(f"Shared array {name} has been released") from exc
+
+
+def _close(segment: "SharedMemory") -> None:
+    """Unmap ``segment`` now, or as soon as no array view of it is left."""
+    with _tracker_lock:
+        _lingering.append(segment)
+        still_mapped = []
+        for pending in _lingering:
+            try:
+                pending.close()
+            except BufferError:
+                still_mapped.append(pending)
+        _lingering[:] = still_mapped
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Picklable handle to an array stored in the shared-memory segment ``name``."""
+
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64)) * np.dtype(self.dtype).itemsize
+
+    @contextmanager
+    def mapped(self, writeable: bool = False) -> Iterator[np.ndarray]:
+        """The array, backed by the segment without copying, for the duration of the block."""
+        segment = _attach(self.name)
+        try:
+            array = np.ndarray(self.shape, dtype=self.dtype, buffer=segment.buf)
+            array.flags.writeable = writeable
+            yield array
+        finally:
+            array = None
+            _close(segment)
+
+    def read(self) -> np.ndarray:
+        """A private copy of the array."""
+        segment = _attach(self.name)
+        try:
+            return np.ndarray(self.shape, dtype=self.dtype, buffer=segment.buf).copy()
+        finally:
+            _close(segment)
+
+
+def export_array(array: np.ndarray) -> SharedArray:
+    """Copy ``array`` into a new segment from a worker; the parent must ``adopt`` the handle.
+
+    Until it is adopted the segment is only cleaned up by the resource tracker at exit.
+    """
+    segment = _create(array.nbytes)
+    handle = SharedArray(segment.name, tuple(array.shape), array.dtype.str)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+    _close(segment)
+    return handle
+
+
+class SharedArrayPool:
+    """Owns shared segments and unlinks each one when its reference count reaches zero.
+
+    ``allocate``, ``share`` and ``adopt`` return handles holding one reference. Callers
+    ``acquire`` a handle for every job they hand it to and ``release`` it when the job
+    finishes, whether it succeeded, raised or its worker died. ``close`` (or leaving the
+    ``with`` block) unlinks whatever is left.
+    """
+
+    def __init__(self) -> None:
+        from multiprocessing import resource_tracker
+
+        # Start the tracker before any worker forks so every process registers with it.
+        resource_tracker.ensure_running()
+        self._lock = threading.Lock()
+        self._segments: Dict[str, "SharedMemory"] = {}
+        self._refs: Dict[str, int] = {}
+
+    def __enter__(self) -> "SharedArrayPool":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._segments)
+
+    def _own(self, segment: "SharedMemory") -> None:
+        with self._lock:
+            self._segments[segment.name] = segment
+            self._refs[segment.name] = 1
+
+    def allocate(self, shape: Tuple[int, ...], dtype: np.dtype | type | str) -> SharedArray:
+        """An uninitialised shared array, e.g. a stego buffer a worker fills in."""
+        shape = tuple(int(dim) for dim in shape)
+        dtype = np.dtype(dtype)
+        segment = _create(int(np.prod(shape, dtype=np.int64)) * dtype.itemsize)
+        self._own(segment)
+        return SharedArray(segment.name, shape, dtype.str)
+
+    def share(self, array: np.ndarray) -> SharedArray:
+        """Copy ``array`` into shared memory once; workers then map it without copying."""
+        handle = self.allocate(array.shape, array.dtype)
+        with handle.mapped(writeable=True) as view:
+            view[...] = array
+            del view
+        return handle
+
+    def adopt(self, handle: SharedArray) -> SharedArray:
+        """Take ownership of a segment a worker created with ``export_array``."""
+        self._own(_attach(handle.name))
+        return handle
+
+    def acquire(self, *handles: SharedArray) -> None:
+        with self._lock:
+            for handle in handles:
+                if handle.name not in self._refs:
+                    raise StegoEngineError(f"Shared array {handle.name} has been released")
+            for handle in handles:
+                self._refs[handle.name] += 1
+
+    def release(self, *handles: SharedArray) -> None:
+        released = []
+        with self._lock:
+            for handle in handles:
+                if handle.name not in self._refs:
+                    continue
+                self._refs[handle.name] -= 1
+                if self._refs[handle.name] == 0:
+                    del self._refs[handle.name]
+                    released.append(self._segments.pop(handle.name))
+        for segment in released:
+            segment.close()
+            segment.unlink()
+
+    def close(self) -> None:
+        with self._lock:
+            released = list(self._segments.values())
+            self._segments.clear()
+            self._refs.clear()
+        for segment in released:
+            segment.close()
+            segment.unlink()
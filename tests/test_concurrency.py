@@ -0,0 +1,85 @@
+"""Shared controllers under concurrent embeds and extracts, on small covers."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from adaptive_stego_engine.benchmarks.common import synthetic_cover
+from adaptive_stego_engine.embedder.cover_session import CoverSession
+from adaptive_stego_engine.embedder.embed_controller import EmbedController, EmbedSpec
+from adaptive_stego_engine.extractor.extract_controller import ExtractController, ExtractSpec
+from adaptive_stego_engine.util.asym_crypto import (
+    KEY_CACHE,
+    generate_rsa_keypair,
+    save_private_key_pem,
+    save_public_key_pem,
+)
+from adaptive_stego_engine.util.image_io import save_png
+from adaptive_stego_engine.util.layout import AUTO_TILES, StreamLayout
+from adaptive_stego_engine.util.locked_cache import LockedCache
+
+JOBS = 12
+THREADS = 4
+COVERS = 3
+RECIPIENTS = 2
+
+
+@pytest.fixture(scope="module")
+def jobs(tmp_path_factory):
+    """``(EmbedSpec, ExtractSpec, payload)`` triples cycling through covers, modes and layouts."""
+    directory = tmp_path_factory.mktemp("concurrency")
+    covers = []
+    for index in range(COVERS):
+        covers.append(str(directory / f"cover{index}.png"))
+        save_png(covers[-1], synthetic_cover(160 + 32 * index, 192, seed=index))
+    keys = []
+    for index in range(RECIPIENTS):
+        private, public = generate_rsa_keypair(1024)
+        keys.append((str(directory / f"key{index}.pem"), str(directory / f"key{index}.pub")))
+        save_private_key_pem(private, keys[-1][0])
+        save_public_key_pem(public, keys[-1][1])
+    rng = np.random.default_rng(0)
+    triples = []
+    for index in range(JOBS):
+        cover = covers[index % COVERS]
+        text = f"job {index}: " + rng.integers(0, 1 << 62, 4).tobytes().hex()
+        stego = str(directory / f"stego{index}.png")
+        layout = StreamLayout(tiles=AUTO_TILES) if index % 2 else StreamLayout()
+        private, public = keys[index % RECIPIENTS]
+        mode = ("password", "public", "multi")[index % 3]
+        if mode == "password":
+            embed = EmbedSpec(cover, text, mode, png_path=stego, password=f"pw{index}", layout=layout)
+            extract = ExtractSpec(stego, mode, password=f"pw{index}")
+        elif mode == "public":
+            embed = EmbedSpec(cover, text, mode, png_path=stego, public_key_path=public, layout=layout)
+            extract = ExtractSpec(stego, mode, private_key_path=private)
+        else:
+            recipients = tuple(key[1] for key in keys)
+            embed = EmbedSpec(cover, text, mode, png_path=stego, public_key_paths=recipients, layout=layout)
+            extract = ExtractSpec(stego, mode, private_key_path=private)
+        triples.append((embed, extract, text.encode("utf-8")))
+    return triples
+
+
+def test_shared_controllers_round_trip_and_parse_once(jobs):
+    sessions: LockedCache[CoverSession] = LockedCache(maxsize=COVERS * 2)
+    embedder, extractor = EmbedController(sessions=sessions), ExtractController()
+    KEY_CACHE.clear()
+    key_misses = KEY_CACHE.misses
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        list(pool.map(embedder.embed_spec, [job[0] for job in jobs]))
+        # Every stego image is read by two threads at once.
+        payloads = list(pool.map(extractor.extract_spec, [job[1] for job in jobs] * 2))
+    assert payloads == [job[2] for job in jobs] * 2
+    assert sessions.misses == COVERS
+    assert KEY_CACHE.misses - key_misses == 2 * RECIPIENTS
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_batches_round_trip(jobs, processes):
+    embedded = EmbedController().embed_batch([job[0] for job in jobs], max_workers=2, processes=processes)
+    extracted = ExtractController().extract_batch([job[1] for job in jobs], max_workers=2, processes=processes)
+    assert not embedded.errors + extracted.errors
+    assert extracted.results == [job[2] for job in jobs]
@@ -0,0 +1,60 @@
+"""On-disk decoded image cache: corruption recovery, versions and the size bound."""
+from __future__ import annotations
+
+import os
+
+import numpy as np
+
+from adaptive_stego_engine.benchmarks.common import synthetic_cover
+from adaptive_stego_engine.util.image_cache import ImageCache
+from adaptive_stego_engine.util.image_io import load_png, save_png
+
+
+def _entries(cache):
+    return sorted(path.name for path in cache.directory.glob("*.npy"))
+
+
+def test_malformed_entries_are_decoded_again(tmp_path):
+    cover = synthetic_cover(32, 48)
+    save_png(tmp_path / "cover.png", cover)
+    cache = ImageCache(tmp_path / "cache")
+    key = cache.key_for(tmp_path / "cover.png")
+
+    def wrong_shape(entry):
+        np.save(entry, np.zeros((4, 4), dtype=np.float32))
+
+    def truncated(entry):
+        entry.write_bytes(b"\x93NUMPY")
+
+    for corrupt in (wrong_shape, truncated):
+        load_png(tmp_path / "cover.png", cache=cache)
+        corrupt(cache.directory / f"{key}.npy")
+        assert np.array_equal(load_png(tmp_path / "cover.png", cache=cache), cover)
+        assert cache.get(key) is not None
+
+
+def test_new_version_replaces_old_entry(tmp_path):
+    path = tmp_path / "cover.png"
+    cache = ImageCache(tmp_path / "cache")
+    save_png(path, synthetic_cover(32, 48, seed=1))
+    load_png(path, cache=cache)
+    save_png(path, synthetic_cover(32, 48, seed=2))
+    os.utime(path, ns=(0, 0))
+    assert np.array_equal(load_png(path, cache=cache), synthetic_cover(32, 48, seed=2))
+    assert _entries(cache) == [f"{cache.key_for(path)}.npy"]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    paths = []
+    for index in range(3):
+        paths.append(tmp_path / f"cover{index}.png")
+        save_png(paths[-1], synthetic_cover(64, 64, seed=index))
+    entry_bytes = 64 * 64 * 3 + 128
+    cache = ImageCache(tmp_path / "cache", max_bytes=2 * entry_bytes)
+    load_png(paths[0], cache=cache)
+    load_png(paths[1], cache=cache)
+    first = cache.directory / f"{cache.key_for(paths[0])}.npy"
+    os.utime(cache.directory / f"{cache.key_for(paths[1])}.npy", ns=(1, 1))
+    os.utime(first, ns=(2, 2))
+    load_png(paths[2], cache=cache)
+    assert _entries(cache) == sorted([first.name, f"{cache.key_for(paths[2])}.npy"])
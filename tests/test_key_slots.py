@@ -0,0 +1,78 @@
+"""Multi-recipient key slots: placement, lookup cost and round trips."""
+from __future__ import annotations
+
+import pytest
+
+from adaptive_stego_engine.benchmarks.common import synthetic_cover
+from adaptive_stego_engine.embedder.embed_controller import EmbedController
+from adaptive_stego_engine.extractor.extract_controller import ExtractController
+from adaptive_stego_engine.util import key_slots
+from adaptive_stego_engine.util.asym_crypto import (
+    generate_rsa_keypair,
+    load_private_key_pem,
+    save_private_key_pem,
+    save_public_key_pem,
+)
+from adaptive_stego_engine.util.exceptions import StegoEngineError
+from adaptive_stego_engine.util.image_io import load_png, save_png
+from adaptive_stego_engine.util.layout import StreamLayout
+
+RECIPIENTS = 20
+
+
+@pytest.fixture(scope="module")
+def recipients(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("keys")
+    paths = []
+    for index in range(RECIPIENTS + 1):
+        private, public = generate_rsa_keypair(1024)
+        paths.append((directory / f"key{index}.pem", directory / f"key{index}.pub"))
+        save_private_key_pem(private, paths[-1][0])
+        save_public_key_pem(public, paths[-1][1])
+    return [(str(private), str(public)) for private, public in paths]
+
+
+@pytest.fixture(scope="module")
+def stego_path(recipients, tmp_path_factory):
+    directory = tmp_path_factory.mktemp("images")
+    cover = directory / "cover.png"
+    save_png(cover, synthetic_cover(600, 600))
+    public_keys = [public for _private, public in recipients[:RECIPIENTS]]
+    stego, _metrics = EmbedController().embed_from_text(
+        str(cover), "to twenty", "multi", public_key_paths=public_keys, layout=StreamLayout()
+    )
+    save_png(directory / "stego.png", stego)
+    return str(directory / "stego.png")
+
+
+def test_every_recipient_finds_its_slot_within_the_probe_limit(recipients, stego_path, monkeypatch):
+    rgb = load_png(stego_path)
+    decrypts = []
+    decrypt = key_slots.rsa_decrypt_key
+    monkeypatch.setattr(key_slots, "rsa_decrypt_key", lambda key, data: decrypts.append(1) or decrypt(key, data))
+    session_keys = set()
+    for private, _public in recipients[:RECIPIENTS]:
+        before = len(decrypts)
+        found = key_slots.find_key_slots(rgb, load_private_key_pem(private))
+        assert found is not None
+        assert len(decrypts) - before <= key_slots.SLOT_PROBES
+        session_keys.add(found[0].session_key)
+        assert found[0].count == RECIPIENTS
+    assert len(session_keys) == 1
+
+
+def test_twenty_recipients_round_trip(recipients, stego_path):
+    controller = ExtractController()
+    for private, _public in (recipients[0], recipients[RECIPIENTS - 1]):
+        assert controller.extract_from_image_asymmetric(stego_path, private) == b"to twenty"
+    with pytest.raises(StegoEngineError):
+        controller.extract_from_image_asymmetric(stego_path, recipients[RECIPIENTS][0])
+
+
+def test_slot_capacity_follows_the_cover(recipients, tmp_path):
+    assert key_slots.slot_capacity(600 * 600) >= RECIPIENTS
+    cover = tmp_path / "small.png"
+    save_png(cover, synthetic_cover(200, 200))
+    public_keys = [public for _private, public in recipients[:RECIPIENTS]]
+    with pytest.raises(StegoEngineError, match="too small"):
+        EmbedController().embed_from_text(str(cover), "x", "multi", public_key_paths=public_keys)
@@ -0,0 +1,57 @@
+"""Keyring matching of public-key and multi-recipient images."""
+from __future__ import annotations
+
+import pytest
+
+from adaptive_stego_engine.benchmarks.common import synthetic_cover
+from adaptive_stego_engine.embedder.embed_controller import EmbedController
+from adaptive_stego_engine.extractor.keyring import Keyring
+from adaptive_stego_engine.util.asym_crypto import generate_rsa_keypair, save_private_key_pem, save_public_key_pem
+from adaptive_stego_engine.util.exceptions import StegoEngineError
+from adaptive_stego_engine.util.image_io import save_png
+from adaptive_stego_engine.util.layout import StreamLayout
+
+
+@pytest.fixture(scope="module")
+def setup(tmp_path_factory):
+    root = tmp_path_factory.mktemp("keyring")
+    (root / "keys").mkdir()
+    public_keys = []
+    for index in range(3):
+        private, public = generate_rsa_keypair(1024)
+        save_private_key_pem(private, root / "keys" / f"key{index}.pem")
+        save_public_key_pem(public, root / f"key{index}.pub")
+        public_keys.append(str(root / f"key{index}.pub"))
+    (root / "keys" / "notes.pem").write_text("not a key")
+    save_png(root / "cover.png", synthetic_cover(320, 320))
+    return root, public_keys
+
+
+def _stego(root, name, **options):
+    cover = str(root / "cover.png")
+    stego, _metrics = EmbedController().embed_from_text(cover, "keyring", layout=StreamLayout(), **options)
+    save_png(root / name, stego)
+    return str(root / name)
+
+
+@pytest.mark.parametrize(
+    "mode, recipients, expected",
+    [("public", [2], "key2.pem"), ("multi", [1, 2], "key1.pem"), ("multi", [0], "key0.pem")],
+)
+def test_keyring_matches_its_key(setup, mode, recipients, expected):
+    root, public_keys = setup
+    if mode == "public":
+        stego = _stego(root, "public.png", mode=mode, public_key_path=public_keys[recipients[0]])
+    else:
+        stego = _stego(root, "multi.png", mode=mode, public_key_paths=[public_keys[i] for i in recipients])
+    keyring = Keyring.from_directory(root / "keys")
+    assert [path.name for path in keyring.skipped] == ["notes.pem"]
+    match = keyring.extract_with_keyring(stego)
+    assert (match.path.name, match.payload) == (expected, b"keyring")
+
+
+def test_keyring_reports_no_match_for_password_images(setup):
+    root, _public_keys = setup
+    stego = _stego(root, "password.png", mode="password", password="secret")
+    with pytest.raises(StegoEngineError, match="No key"):
+        Keyring.from_directory(root / "keys").extract_with_keyring(stego)
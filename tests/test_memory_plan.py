@@ -0,0 +1,25 @@
+"""Memory plans: ordering overrides and tile stream estimates."""
+from __future__ import annotations
+
+import logging
+
+from adaptive_stego_engine.util.layout import AUTO_TILES, PixelOrdering, StreamLayout
+from adaptive_stego_engine.util.memory_plan import plan_embed
+
+
+def test_budget_override_of_ordering_is_logged(caplog):
+    layout = StreamLayout(ordering=PixelOrdering.TIERED)
+    plan = plan_embed(4000, 4000, 1_000_000, layout, max_memory_mb=640)
+    assert plan.keyed_order
+    with caplog.at_level(logging.WARNING, logger="adaptive_stego_engine.util.memory_plan"):
+        assert plan.apply_layout(layout).ordering == PixelOrdering.KEYED
+    assert "TIERED ordering does not fit" in caplog.text
+
+
+def test_tile_streams_are_estimated_from_their_tiles():
+    whole = plan_embed(4000, 4000, 20000, StreamLayout()).peak
+    few = plan_embed(4000, 4000, 20000, StreamLayout(tiles=4)).peak
+    many = plan_embed(4000, 4000, 20000, StreamLayout(tiles=200)).peak
+    auto = plan_embed(4000, 4000, 20000, StreamLayout(tiles=AUTO_TILES)).peak
+    assert few < many < whole
+    assert auto < whole
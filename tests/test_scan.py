@@ -0,0 +1,25 @@
+"""Scanner texture focus: the fast entropy and its sensitivity to adaptive embedding."""
+from __future__ import annotations
+
+import numpy as np
+
+from adaptive_stego_engine.analyzer.entropy import entropy_by_counts, entropy_by_levels
+from adaptive_stego_engine.benchmarks.scan import mixed_cover
+from adaptive_stego_engine.embedder.cover_session import CoverSession, EmbedCredentials
+from adaptive_stego_engine.scanner.scan import scan_image
+from adaptive_stego_engine.util.layout import StreamLayout
+
+
+def test_entropy_by_counts_matches_reference():
+    rng = np.random.default_rng(0)
+    for shape, levels in (((40, 37), 256), ((33, 50), 6), ((3, 2), 4), ((16, 16), 1)):
+        gray = rng.integers(0, levels, shape).astype(np.uint8)
+        np.testing.assert_allclose(entropy_by_counts(gray), entropy_by_levels(gray), atol=1e-6)
+
+
+def test_texture_focus_reacts_more_to_low_adaptive_rates():
+    cover = mixed_cover(512, 512)
+    payload = np.random.default_rng(1).integers(0, 256, int(0.02 * cover.size / 8), dtype=np.uint8).tobytes()
+    stego, _metrics = CoverSession(cover).embed(payload, "password", EmbedCredentials(password="p"), StreamLayout())
+    rise = {focus: scan_image(stego, focus).score - scan_image(cover, focus).score for focus in ("image", "texture")}
+    assert rise["texture"] > max(0.01, 2 * rise["image"])
@@ -0,0 +1,132 @@
+"""Round-trip properties of the shared slot traversal on small random covers."""
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import pytest
+
+from adaptive_stego_engine.benchmarks.common import synthetic_cover
+from adaptive_stego_engine.embedder.drift_control import block_safety_checker, build_block_index
+from adaptive_stego_engine.embedder.embed_controller import EmbedController
+from adaptive_stego_engine.embedder.embedding import commit_embedding, embed_bits_low_level, plan_embedding
+from adaptive_stego_engine.embedder.noise_predictor import adjust_capacity_for_pixel
+from adaptive_stego_engine.embedder.segments import embed_segments, extract_segments, stream_capacity_bits
+from adaptive_stego_engine.embedder.slots import iter_slot_chunks, raw_capacity, write_bits
+from adaptive_stego_engine.embedder.traversal import analyse_stable_capacity
+from adaptive_stego_engine.extractor.extract_controller import LEGACY_UNSUPPORTED, ExtractController
+from adaptive_stego_engine.extractor.extraction import read_bits_prefix
+from adaptive_stego_engine.util.exceptions import CapacityError, QualityError, StegoEngineError
+from adaptive_stego_engine.util.image_io import save_png
+from adaptive_stego_engine.util.layout import PixelOrdering, StreamLayout
+
+SEEDS = range(8)
+
+
+def _random_cover(rng: np.random.Generator) -> np.ndarray:
+    height, width = (int(size) for size in rng.integers(16, 65, 2))
+    if rng.random() < 0.5:
+        return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    return synthetic_cover(height, width, seed=int(rng.integers(1 << 31)))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_raw_traversal_round_trips(seed):
+    rng = np.random.default_rng(seed)
+    rgb = _random_cover(rng)
+    flat = rgb.copy().reshape(-1, 3)
+    order = rng.permutation(flat.shape[0])
+    capacity_flat = rng.integers(0, 4, flat.shape[0], dtype=np.uint8)
+    total = int(capacity_flat.sum(dtype=np.int64))
+    bits = rng.integers(0, 2, int(rng.integers(0, total + 1)), dtype=np.uint8)
+    written = 0
+    for part in iter_slot_chunks(order, raw_capacity(capacity_flat), bits.size):
+        write_bits(flat, part.slot_pixels, part.slot_channels, bits[written : written + part.slot_pixels.size])
+        written += part.slot_pixels.size
+    stego = flat.reshape(rgb.shape)
+    full = read_bits_prefix(stego, order, capacity_flat)
+    assert written == bits.size
+    assert full.size == total
+    assert np.array_equal(full[: bits.size], bits)
+    assert np.array_equal(read_bits_prefix(stego, order, capacity_flat, bits.size), bits)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_legacy_plan_matches_scalar_embed_loop(seed):
+    rng = np.random.default_rng(seed)
+    rgb = _random_cover(rng)
+    height, width, _ = rgb.shape
+    order = rng.permutation(height * width)
+    capacity_flat = rng.integers(0, 4, height * width, dtype=np.uint8)
+    gray = rgb.astype(np.float32).mean(axis=2)
+    bits = rng.integers(0, 2, int(capacity_flat.sum()) // 8, dtype=np.uint8)
+    block_map, block_sizes = build_block_index(height, width)
+    positions = {block: np.flatnonzero(block_map == block).tolist() for block in range(block_sizes.size)}
+    try:
+        scalar = embed_bits_low_level(
+            rgb,
+            order,
+            capacity_flat,
+            bits.tolist(),
+            block_map,
+            np.zeros(block_sizes.size, dtype=bool),
+            positions,
+            gray,
+            adjust_capacity_for_pixel,
+            block_safety_checker,
+        )
+    except StegoEngineError:
+        with pytest.raises(StegoEngineError):
+            plan_embedding(rgb, order, capacity_flat, bits, block_map, block_sizes, gray)
+        return
+    plan = plan_embedding(rgb, order, capacity_flat, bits, block_map, block_sizes, gray)
+    assert np.array_equal(commit_embedding(rgb, plan), scalar)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_segmented_stream_round_trips_through_stego_analysis(seed):
+    rng = np.random.default_rng(seed)
+    rgb = _random_cover(rng)
+    reserved = np.zeros(0, dtype=np.int64)
+    order = rng.permutation(rgb.shape[0] * rgb.shape[1])
+    segments = int(rng.integers(1, 5))
+    stable = analyse_stable_capacity(rgb, reserved)
+    capacity = stream_capacity_bits(stable, segments, "roundtrip")
+    bits = rng.integers(0, 2, int(rng.integers(0, capacity + 1)), dtype=np.uint8)
+    stego = rgb.copy()
+    embed_segments(stego.reshape(-1, 3), order, stable, bits, segments, "roundtrip")
+    restable = analyse_stable_capacity(stego, reserved)
+    read = extract_segments(stego.reshape(-1, 3), order, restable, bits.size, segments, "roundtrip")
+    assert np.array_equal(read, bits)
+
+
+@pytest.mark.parametrize("ordering", list(PixelOrdering))
+@pytest.mark.parametrize("tiles", [0, -1])
+def test_controllers_round_trip_through_png(ordering, tiles, tmp_path):
+    rng = np.random.default_rng(int(ordering) * 2 + bool(tiles))
+    cover_path, stego_path = str(tmp_path / "cover.png"), str(tmp_path / "stego.png")
+    save_png(cover_path, synthetic_cover(128, 160, seed=int(rng.integers(1 << 31))))
+    payload = "".join(chr(int(code)) for code in rng.integers(32, 127, int(rng.integers(1, 65))))
+    layout = StreamLayout(segments=int(rng.integers(1, 4)), ordering=ordering, tiles=tiles)
+    stego, _metrics = EmbedController().embed_from_text(
+        cover_path, payload, "password", password="pw", aes_enabled=bool(rng.integers(2)), layout=layout
+    )
+    save_png(stego_path, stego)
+    assert ExtractController().extract_from_image_symmetric(stego_path, "pw") == payload.encode("utf-8")
+
+
+def test_default_layout_round_trips_and_legacy_is_refused(tmp_path):
+    cover_path, stego_path = str(tmp_path / "cover.png"), str(tmp_path / "stego.png")
+    save_png(cover_path, synthetic_cover(128, 160))
+    stego, _metrics = EmbedController().embed_from_text(cover_path, "default", "password", password="pw")
+    save_png(stego_path, stego)
+    assert ExtractController().extract_from_image_symmetric(stego_path, "pw") == b"default"
+    try:
+        stego, _metrics = EmbedController().embed_from_text(
+            cover_path, "legacy", "password", password="pw", layout=None
+        )
+    except (CapacityError, QualityError):
+        pytest.skip("cover too small for a legacy stream")
+    save_png(stego_path, stego)
+    with pytest.raises(StegoEngineError, match=re.escape(LEGACY_UNSUPPORTED)):
+        ExtractController().extract_from_image_symmetric(stego_path, "pw")